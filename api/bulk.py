@@ -0,0 +1,65 @@
+from django.conf import settings
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+
+class BulkCreateMixin:
+    '''Add a `bulk/` endpoint taking a list of objects.
+
+    Authentication and permissions are checked once per request, every
+    item is validated, the valid ones are created in one transaction
+    and each item gets its own result: status 201 with the created
+    object or status 400 with the errors.
+
+    Viewsets implement bulk_validate(items), returning an unsaved
+    instance or an errors dict per item, and bulk_create(instances).'''
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request, *args, **kwargs):
+        items = request.data
+        if not isinstance(items, list):
+            return Response(
+                {'detail': 'Ожидается список объектов.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(items) > settings.API_BULK_MAX_ITEMS:
+            return Response(
+                {
+                    'detail': (
+                        'Не больше '
+                        f'{settings.API_BULK_MAX_ITEMS} объектов за запрос.'
+                    ),
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        results = []
+        instances = []
+        for validated in self.bulk_validate(items):
+            if isinstance(validated, dict):
+                results.append({
+                    'status': status.HTTP_400_BAD_REQUEST,
+                    'errors': validated,
+                })
+            else:
+                results.append(None)
+                instances.append(validated)
+        created = iter(self.bulk_create(instances))
+        for position, result in enumerate(results):
+            if result is None:
+                results[position] = {
+                    'status': status.HTTP_201_CREATED,
+                    'data': self.get_serializer(next(created)).data,
+                }
+        return Response({'results': results})
+
+    def validate_items(self, items, **instance_kwargs):
+        '''Validate the items with the viewset serializer and build
+        unsaved instances of its model.'''
+        model = self.get_serializer_class().Meta.model
+        for item in items:
+            serializer = self.get_serializer(data=item)
+            if not serializer.is_valid():
+                yield serializer.errors
+                continue
+            yield model(**serializer.validated_data, **instance_kwargs)
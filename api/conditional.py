@@ -0,0 +1,29 @@
+from posts import pagecache
+
+
+class ConditionalMixin:
+    '''Answer conditional GET requests from the page cache versions
+    of the tags, formatted with the URL keyword arguments.'''
+    list_tags = ()
+    detail_tags = ()
+
+    def get_page_tags(self):
+        tags = self.detail_tags if self.detail else self.list_tags
+        return [tag.format(**self.kwargs) for tag in tags]
+
+    def conditional(self, handler, request, *args, **kwargs):
+        etag, last_modified = pagecache.validators(
+            request,
+            self.get_page_tags(),
+            per_user=False,
+        )
+        response = pagecache.conditional_response(request, etag, last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        return pagecache.set_validators(request, response, etag, last_modified)
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
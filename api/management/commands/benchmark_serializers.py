@@ -0,0 +1,126 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from posts.models import Group, Post
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.rows import RowSerializer
+from api.serializers import PostSerializer
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare serializing a list of posts with PostSerializer and '
+        'from values() rows.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=100,
+            help='Number of posts serialized per run.',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Number of runs of each serializer.',
+        )
+        parser.add_argument(
+            '--create',
+            action='store_true',
+            help='Add missing posts for the run and roll them back after.',
+        )
+        parser.add_argument(
+            '--query',
+            default='',
+            help='Query string of the list request, e.g. "expand=author".',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['create']:
+                self.create_posts(options['rows'])
+            self.run(options['rows'], options['repeat'], options['query'])
+            transaction.set_rollback(True)
+
+    def create_posts(self, count):
+        missing = count - Post.objects.count()
+        if missing <= 0:
+            return
+        author, _ = User.objects.get_or_create(username='benchmark')
+        group, _ = Group.objects.get_or_create(
+            slug='benchmark',
+            defaults={'title': 'Benchmark'},
+        )
+        for number in range(missing):
+            Post.objects.create(
+                text=f'Пост номер {number} ' * 20,
+                author=author,
+                group=group if number % 2 else None,
+            )
+
+    def run(self, rows, repeat, query):
+        request = Request(APIRequestFactory().get('/api/v1/posts/?' + query))
+        context = {'request': request}
+        queryset = PostSerializer.restrict_queryset(
+            Post.objects.order_by('-pub_date', '-id'),
+            request,
+        )[:rows]
+
+        serializer = RowSerializer(PostSerializer(context=context))
+        instances = list(queryset)
+        rows = list(queryset.values(*serializer.columns))
+
+        def serialize_instances():
+            return PostSerializer(
+                instances,
+                many=True,
+                context=context,
+            ).data
+
+        def serialize_rows():
+            serializer = RowSerializer(PostSerializer(context=context))
+            return [serializer.to_representation(row) for row in rows]
+
+        def fetch_and_serialize_instances():
+            instances[:] = queryset.all()
+            return serialize_instances()
+
+        def fetch_and_serialize_rows():
+            rows[:] = queryset.values(*serializer.columns)
+            return serialize_rows()
+
+        self.stdout.write(f'{len(rows)} posts, best of {repeat} runs:')
+        self.report(
+            'serialization',
+            self.measure(serialize_instances, repeat),
+            self.measure(serialize_rows, repeat),
+        )
+        self.report(
+            'query and serialization',
+            self.measure(fetch_and_serialize_instances, repeat),
+            self.measure(fetch_and_serialize_rows, repeat),
+        )
+
+    def report(self, title, model_time, rows_time):
+        self.stdout.write(
+            f'  {title}: ModelSerializer {model_time * 1000:.1f} ms, '
+            f'values() rows {rows_time * 1000:.1f} ms, '
+            f'{model_time / rows_time:.1f}x faster.'
+        )
+
+    def measure(self, function, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
@@ -0,0 +1,58 @@
+from django.conf import settings
+from posts.paginator import CursorPaginator
+from rest_framework import pagination
+from rest_framework.utils.urls import replace_query_param
+
+
+class CursorPagination(pagination.CursorPagination):
+    '''Cursor pagination with a client-defined page size
+    capped by API_MAX_PAGE_SIZE.'''
+    ordering = '-id'
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+
+
+class PostCursorPagination(CursorPagination):
+    ordering = ('-pub_date', '-id')
+
+
+class SearchCursorPagination(CursorPagination):
+    ordering = ('-score', '-id')
+
+
+class CommentCursorPagination(CursorPagination):
+    ordering = ('-created', '-id')
+
+
+class CommentThreadPagination(CursorPagination):
+    '''Comments in thread order, see posts.threads.'''
+    ordering = 'path'
+
+
+class GroupCursorPagination(CursorPagination):
+    ordering = 'id'
+
+
+class TimelinePagination(CursorPagination):
+    '''Cursor pagination over a list of (pub_date, post id) keys
+    of a materialized timeline.'''
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page = CursorPaginator(
+            queryset,
+            self.get_page_size(request),
+        ).get_page(request.query_params.get(self.cursor_query_param))
+        return list(self.page)
+
+    def get_next_link(self):
+        return self.get_link(self.page.next_cursor)
+
+    def get_previous_link(self):
+        return self.get_link(self.page.previous_cursor)
+
+    def get_link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
@@ -14,6 +14,6 @@ class ReadOnlyOrIsAuthenticatedOrIsAuthor(BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method in SAFE_METHODS:
             return True
-        elif request.user == obj.author:
+        elif request.user.pk == obj.author_id:
             return True
         return False
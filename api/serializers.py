@@ -1,34 +1,117 @@
 from django.contrib.auth import get_user_model
-from posts.models import Comment, Follow, Group, Post
+from django.db.models.functions import Substr
+from posts import follow_graph, images
+from posts.models import Comment, Follow, Group, Post, Recommendation
 from rest_framework import serializers
-from rest_framework.validators import UniqueTogetherValidator
+
+from .sparse import SparseFieldsMixin
 
 User = get_user_model()
 
+EXCERPT_LENGTH = 200
+ALREADY_FOLLOWING = 'Мы и с первого раза всё поняли.'
 
-class PostSerializer(serializers.ModelSerializer):
-    author = serializers.ReadOnlyField(source='author.username')
-    group = serializers.ReadOnlyField(source='group.id')
+
+class AuthorSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+
+    class Meta:
+        fields = [
+            'id',
+            'username',
+        ]
+        model = User
+
+
+class GroupSerializer(SparseFieldsMixin, serializers.ModelSerializer):
 
     class Meta:
         fields = '__all__'
-        model = Post
+        model = Group
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class PostSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     author = serializers.ReadOnlyField(source='author.username')
-    post = serializers.ReadOnlyField(source='post.id')
+    group = serializers.ReadOnlyField(source='group_id')
+    image_variants = serializers.SerializerMethodField()
+    excerpt = serializers.SerializerMethodField()
 
     class Meta:
         fields = '__all__'
-        model = Comment
+        model = Post
+        optional_fields = [
+            'excerpt',
+        ]
+        expandable_fields = {
+            'author': AuthorSerializer,
+            'group': GroupSerializer,
+        }
+        field_columns = {
+            'author': ['author__username'],
+        }
+        field_annotations = {
+            'excerpt': Substr('text', 1, EXCERPT_LENGTH),
+        }
+
+    def validate_image(self, image):
+        return images.validate_upload(image)
 
+    def get_image_variants(self, post):
+        return self.represent_image_variants(post.image_variants)
+
+    def represent_image_variants(self, value):
+        '''Resized copies of the image with their dimensions,
+        smallest first.'''
+        request = self.context.get('request')
+        return [
+            {
+                'url': (
+                    request.build_absolute_uri(variant.url)
+                    if request else variant.url
+                ),
+                'width': variant.width,
+                'height': variant.height,
+            }
+            for variant in images.load_variants(value)
+        ]
 
-class GroupSerializer(serializers.ModelSerializer):
+    def get_excerpt(self, post):
+        '''First EXCERPT_LENGTH characters of the text, cut
+        by the database when the queryset is restricted.'''
+        excerpt = post.__dict__.get('excerpt')
+        if excerpt is None:
+            excerpt = post.text[:EXCERPT_LENGTH]
+        return excerpt
+
+    def represent_excerpt(self, value):
+        return value
+
+
+class CommentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    author = serializers.ReadOnlyField(source='author.username')
+    post = serializers.ReadOnlyField(source='post_id')
 
     class Meta:
-        fields = '__all__'
-        model = Group
+        exclude = ['path']
+        model = Comment
+        expandable_fields = {
+            'author': AuthorSerializer,
+        }
+        field_columns = {
+            'author': ['author__username'],
+        }
+
+    def validate_parent(self, parent):
+        '''Replies stay in the thread of the post they were made to.'''
+        if self.instance is not None:
+            if getattr(parent, 'pk', None) != self.instance.parent_id:
+                raise serializers.ValidationError(
+                    'Ответ нельзя перенести в другую ветку.'
+                )
+            return parent
+        post_id = self.context['view'].kwargs.get('post_id')
+        if parent is not None and str(parent.post_id) != str(post_id):
+            raise serializers.ValidationError('Комментарий не найден.')
+        return parent
 
 
 class FollowSerializer(serializers.ModelSerializer):
@@ -48,19 +131,28 @@ class FollowSerializer(serializers.ModelSerializer):
             'following',
         ]
         model = Follow
-        validators = [
-            UniqueTogetherValidator(
-                queryset=Follow.objects.all(),
-                fields=[
-                    'user',
-                    'following'
-                ],
-                message='Мы и с первого раза всё поняли.',
-            ),
-        ]
+        # Replaces the unique together validator querying the table;
+        # a follow missing from the cached graph is caught by the view.
+        validators = []
+
+    def validate(self, data):
+        if follow_graph.is_following(data['user'].pk, data['following'].pk):
+            raise serializers.ValidationError(ALREADY_FOLLOWING)
+        return data
 
     def validate_following(self, following):
         if self.context.get('request').user == following:
             raise serializers.ValidationError(
                 'Подписываешься сам на себя? Не надо так.')
         return following
+
+
+class RecommendationSerializer(serializers.ModelSerializer):
+    suggested = AuthorSerializer(read_only=True)
+
+    class Meta:
+        fields = [
+            'suggested',
+            'score',
+        ]
+        model = Recommendation
@@ -0,0 +1,165 @@
+'''Sparse fieldsets.
+
+`?fields=id,pub_date` limits the output to the listed fields and
+`?expand=author` replaces the key of a related object with the object
+itself. The selection is applied to the queryset as well: only the
+columns behind the requested fields are fetched, related tables are
+joined only for the fields reading them and computed fields, such as
+the post excerpt, are calculated by the database.
+
+Read requests only; writes always use every field.'''
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def parse_names(request, param):
+    value = request.query_params.get(param)
+    if value is None:
+        return None
+    return list(dict.fromkeys(
+        name.strip() for name in value.split(',') if name.strip()
+    ))
+
+
+class SparseFieldsMixin:
+    '''Serializer mixin selecting fields by the request parameters.
+
+    Options of Meta:
+    optional_fields - fields given only when listed in `fields`;
+    expandable_fields - serializer classes of the expandable objects;
+    field_columns - model columns of the fields not named after them;
+    field_annotations - database expressions of computed fields.'''
+
+    @classmethod
+    def get_selection(cls, request):
+        '''Return the requested field names and the expanded ones.'''
+        available = cls.all_fields()
+        expandable = getattr(cls.Meta, 'expandable_fields', {})
+        fields = parse_names(request, FIELDS_PARAM)
+        if fields is None:
+            fields = cls.default_fields()
+        expand = parse_names(request, EXPAND_PARAM) or []
+        errors = {}
+        unknown = [name for name in fields if name not in available]
+        if unknown:
+            errors[FIELDS_PARAM] = [f'Неизвестные поля: {", ".join(unknown)}.']
+        unknown = [name for name in expand if name not in expandable]
+        if unknown:
+            errors[EXPAND_PARAM] = [
+                f'Эти поля не разворачиваются: {", ".join(unknown)}.'
+            ]
+        if errors:
+            raise ValidationError(errors)
+        return fields, [name for name in expand if name in fields]
+
+    @classmethod
+    def get_columns(cls, fields, expand=()):
+        '''Return the model columns and database expressions
+        needed to serialize the fields.'''
+        meta = cls.Meta
+        field_columns = getattr(meta, 'field_columns', {})
+        field_annotations = getattr(meta, 'field_annotations', {})
+        columns = []
+        annotations = {}
+        for name in fields:
+            if name in expand:
+                nested = meta.expandable_fields[name]
+                nested_columns, _ = nested.get_columns(nested.default_fields())
+                columns.append(name)
+                columns += [f'{name}__{column}' for column in nested_columns]
+            elif name in field_annotations:
+                annotations[name] = field_annotations[name]
+            else:
+                columns += field_columns.get(name, (name,))
+        return columns, annotations
+
+    @classmethod
+    def all_fields(cls):
+        '''Names of every field, including the optional ones.'''
+        if '_all_fields' not in cls.__dict__:
+            cls._all_fields = list(
+                super(SparseFieldsMixin, cls()).get_fields(),
+            )
+        return cls._all_fields
+
+    @classmethod
+    def default_fields(cls):
+        optional = getattr(cls.Meta, 'optional_fields', ())
+        return [name for name in cls.all_fields() if name not in optional]
+
+    @classmethod
+    def restrict_queryset(cls, queryset, request, required=()):
+        '''Fetch only what the requested fields need.'''
+        fields, expand = cls.get_selection(request)
+        columns, annotations = cls.get_columns(fields, expand)
+        columns = list(required) + columns
+        related = {
+            column.rsplit('__', 1)[0] for column in columns if '__' in column
+        }
+        queryset = queryset.select_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+        queryset = queryset.only(*related, *columns)
+        if annotations:
+            queryset = queryset.annotate(**annotations)
+        return queryset
+
+    def is_root(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if (
+            request is None
+            or request.method not in SAFE_METHODS
+            or not self.is_root()
+        ):
+            optional = getattr(self.Meta, 'optional_fields', ())
+            for name in optional:
+                fields.pop(name, None)
+            return fields
+        selected, expand = self.get_selection(request)
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        for name in expand:
+            fields[name] = expandable[name](read_only=True)
+        return {name: fields[name] for name in selected}
+
+
+class SparseQuerysetMixin:
+    '''Viewset mixin restricting the queryset to the fields
+    requested from its serializer.'''
+
+    def get_queryset(self):
+        return self.restrict_fields(super().get_queryset())
+
+    def restrict_fields(self, queryset):
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+        serializer_class = self.get_serializer_class()
+        return serializer_class.restrict_queryset(
+            queryset,
+            self.request,
+            required=self.get_required_columns(queryset.model),
+        )
+
+    def get_required_columns(self, model):
+        '''Columns read by the pagination.'''
+        ordering = getattr(self.paginator, 'ordering', ())
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        columns = []
+        for field in ordering:
+            try:
+                columns.append(model._meta.get_field(field.lstrip('-')).name)
+            except FieldDoesNotExist:
+                pass
+        return columns
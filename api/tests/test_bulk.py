@@ -0,0 +1,134 @@
+import pytest
+from posts.models import Comment, Follow, Post
+
+
+class TestBulkAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_bulk_posts(self, user_client, user, group_1):
+        data = [
+            {'text': 'Первый пост'},
+            {'text': 'Второй пост', 'group': group_1.id},
+            {'text': ''},
+            {'text': 'Пост в чужой группе', 'group': 404},
+        ]
+        response = user_client.post(
+            '/api/v1/posts/bulk/',
+            data=data,
+            format='json',
+        )
+
+        assert response.status_code == 200, (
+            'Проверьте, что POST запрос на `/api/v1/posts/bulk/` '
+            'с токеном авторизации возвращает статус 200'
+        )
+        results = response.json()['results']
+        assert [result['status'] for result in results] == [
+            201, 201, 400, 400
+        ], (
+            'Проверьте, что `/api/v1/posts/bulk/` возвращает статус '
+            'для каждого объекта'
+        )
+        assert 'text' in results[2]['errors']
+        assert 'group' in results[3]['errors']
+        assert results[1]['data']['group'] == group_1.id
+        assert results[0]['data']['author'] == user.username
+        assert Post.objects.count() == 2, (
+            'Проверьте, что `/api/v1/posts/bulk/` создаёт '
+            'только корректные объекты'
+        )
+        group_1.refresh_from_db()
+        user.profile.refresh_from_db()
+        assert group_1.post_count == 1
+        assert user.profile.posts_count == 2
+
+    @pytest.mark.django_db(transaction=True)
+    def test_bulk_comments(self, user_client, post):
+        response = user_client.post(
+            f'/api/v1/posts/{post.id}/comments/bulk/',
+            data=[{'text': 'Коммент 1'}, {'text': 'Коммент 2'}],
+            format='json',
+        )
+
+        assert response.status_code == 200
+        results = response.json()['results']
+        assert [result['data']['post'] for result in results] == [
+            post.id, post.id
+        ]
+        post.refresh_from_db()
+        assert post.comments_count == 2 == Comment.objects.count(), (
+            'Проверьте, что `/api/v1/posts/{post.id}/comments/bulk/` '
+            'создаёт комментарии и обновляет счётчик'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_bulk_follows(self, user_client, user, user_2, another_user,
+                          follow_1):
+        data = [
+            {'following': user_2.username},
+            {'following': user_2.username},
+            {'following': another_user.username},
+            {'following': user.username},
+            {'following': 'nobody'},
+            {},
+        ]
+        response = user_client.post(
+            '/api/v1/follow/bulk/',
+            data=data,
+            format='json',
+        )
+
+        assert response.status_code == 200
+        results = response.json()['results']
+        assert [result['status'] for result in results] == [
+            201, 400, 400, 400, 400, 400
+        ], (
+            'Проверьте, что `/api/v1/follow/bulk/` отклоняет '
+            'повторные подписки, '
+            'подписку на себя и на несуществующего пользователя'
+        )
+        assert results[0]['data'] == {
+            'user': user.username,
+            'following': user_2.username,
+        }
+        assert Follow.objects.filter(user=user).count() == 2
+        user_2.profile.refresh_from_db()
+        assert user_2.profile.followers_count == 1
+
+    @pytest.mark.django_db(transaction=True)
+    def test_bulk_not_list(self, user_client):
+        response = user_client.post(
+            '/api/v1/posts/bulk/',
+            data={'text': 'Пост'},
+            format='json',
+        )
+
+        assert response.status_code == 400, (
+            'Проверьте, что `/api/v1/posts/bulk/` принимает '
+            'только список объектов'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_bulk_too_many(self, user_client, settings):
+        settings.API_BULK_MAX_ITEMS = 2
+        response = user_client.post(
+            '/api/v1/posts/bulk/',
+            data=[{'text': 'Пост'}] * 3,
+            format='json',
+        )
+
+        assert response.status_code == 400
+        assert Post.objects.count() == 0
+
+    @pytest.mark.django_db(transaction=True)
+    def test_bulk_not_auth(self, client):
+        response = client.post(
+            '/api/v1/posts/bulk/',
+            data=[{'text': 'Пост'}],
+            content_type='application/json',
+        )
+
+        assert response.status_code == 401, (
+            'Проверьте, что `/api/v1/posts/bulk/` без токена авторизации '
+            'возвращает статус 401'
+        )
@@ -20,7 +20,7 @@ class TestCommentAPI:
             'Проверьте, что при GET запросе `/api/v1/posts/{post.id}/comments/` '
             'с токеном авторизации возвращаетсся статус 200'
         )
-        test_data = response.json()
+        test_data = response.json()['results']
         assert type(test_data) == list, (
             'Проверьте, что при GET запросе на `/api/v1/posts/{post.id}/comments/` возвращается список'
         )
@@ -160,3 +160,21 @@ class TestCommentAPI:
             'Проверьте, что при DELETE запросе `/api/v1/posts/{post.id}/comments/{comment.id}/` '
             'для не своего комментария возвращаете статус 403'
         )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_post_comments_count(self, user_client, post, comment_1_post,
+                                 comment_2_post):
+        response = user_client.get(f'/api/v1/posts/{post.id}/')
+        assert response.json().get('comments_count') == 2, (
+            'Проверьте, что `/api/v1/posts/{id}/` возвращает количество '
+            'комментариев `comments_count`'
+        )
+
+        response = user_client.delete(
+            f'/api/v1/posts/{post.id}/comments/{comment_1_post.id}/'
+        )
+        assert response.status_code == 204
+        response = user_client.get(f'/api/v1/posts/{post.id}/')
+        assert response.json().get('comments_count') == 1, (
+            'Проверьте, что удаление комментария уменьшает `comments_count`'
+        )
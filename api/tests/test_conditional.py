@@ -0,0 +1,42 @@
+import pytest
+
+
+class TestConditionalAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_posts_not_modified(self, client, user, post):
+        from posts.models import Post
+        response = client.get('/api/v1/posts/')
+
+        assert response.status_code == 200
+        assert response.has_header('ETag'), (
+            'Проверьте, что `/api/v1/posts/` возвращает заголовок ETag'
+        )
+        assert response.has_header('Last-Modified'), (
+            'Проверьте, что `/api/v1/posts/` возвращает заголовок '
+            'Last-Modified'
+        )
+        etag = response['ETag']
+        response = client.get('/api/v1/posts/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, (
+            'Проверьте, что `/api/v1/posts/` отвечает 304 на запрос '
+            'с актуальным ETag'
+        )
+        Post.objects.create(text='Новый пост', author=user)
+        response = client.get('/api/v1/posts/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что новый пост меняет ETag `/api/v1/posts/`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_comments_not_modified(self, client, user, post, another_post):
+        from posts.models import Comment
+        url = f'/api/v1/posts/{post.id}/comments/'
+        etag = client.get(url)['ETag']
+
+        Comment.objects.create(author=user, post=another_post, text='Коммент')
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304, (
+            'Проверьте, что комментарий к другому посту не меняет ETag'
+        )
+        Comment.objects.create(author=user, post=post, text='Коммент')
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
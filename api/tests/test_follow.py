@@ -1,4 +1,6 @@
 import pytest
+from django.core.cache import cache
+from posts import follow_graph
 from posts.models import Follow
 
 
@@ -35,7 +37,7 @@ class TestFollowAPI:
             'Проверьте, что при GET запросе `/api/v1/follow/` с токеном авторизации возвращается статус 200'
         )
 
-        test_data = response.json()
+        test_data = response.json()['results']
 
         assert type(test_data) == list, (
             'Проверьте, что при GET запросе на `/api/v1/follow/` возвращается список'
@@ -122,19 +124,42 @@ class TestFollowAPI:
             'Страница `/api/v1/follow/` не работает, проверьте view-функцию'
         )
 
-        test_data = response.json()
+        test_data = response.json()['results']
         assert len(test_data) == follow_user_cnt, (
             'Проверьте, что при GET запросе на `/api/v1/follow/` возвращается список всех подписчиков пользователя'
         )
 
         response = user_client.get(f'/api/v1/follow/?search={user_2.username}')
-        assert len(response.json()) == follow_user.filter(user=user_2).count(), (
+        assert len(response.json()['results']) == follow_user.filter(user=user_2).count(), (
             'Проверьте, что при GET запросе с параметром `search` на `/api/v1/follow/` '
             'возвращается список соответствующих подписчиков'
         )
 
         response = user_client.get(f'/api/v1/follow/?search={another_user.username}')
-        assert len(response.json()) == follow_user.filter(user=another_user).count(), (
+        assert len(response.json()['results']) == follow_user.filter(user=another_user).count(), (
             'Проверьте, что при GET запросе с параметром `search` на `/api/v1/follow/` '
             'возвращается список соответствующих подписчиков'
         )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_follow_stale_graph(self, user_client, user, user_2):
+        cache.clear()
+        follow_graph.following_ids(user.pk)
+        # Created without signals: the cached graph misses the follow.
+        Follow.objects.bulk_create([Follow(user=user, following=user_2)])
+        data = {'following': user_2.username}
+        response = user_client.post('/api/v1/follow/', data=data)
+        assert response.status_code == 400, (
+            'Проверьте, что повторная подписка, которой нет в закэшированном '
+            'графе, возвращает статус 400'
+        )
+        response = user_client.post(
+            '/api/v1/follow/bulk/',
+            data=[data],
+            format='json',
+        )
+        assert response.status_code == 400, (
+            'Проверьте, что `/api/v1/follow/bulk/` возвращает статус 400 '
+            'для подписки, которой нет в закэшированном графе'
+        )
+        assert Follow.objects.filter(user=user, following=user_2).count() == 1
@@ -26,7 +26,7 @@ class TestGroupAPI:
             'Проверьте, что при GET запросе `/api/v1/group/` с токеном авторизации возвращается статус 200'
         )
 
-        test_data = response.json()
+        test_data = response.json()['results']
 
         assert type(test_data) == list, (
             'Проверьте, что при GET запросе на `/api/v1/group/` возвращается список'
@@ -81,19 +81,19 @@ class TestGroupAPI:
         assert response.status_code == 200, (
             'Страница `/api/v1/posts/` не найдена, проверьте этот адрес в *urls.py*'
         )
-        test_data = response.json()
+        test_data = response.json()['results']
         assert len(test_data) == 3, (
             'Проверьте, что при GET запросе на `/api/v1/posts/` возвращается список всех постов'
         )
 
         response = user_client.get(f'/api/v1/posts/?group={group_2.id}')
-        assert len(response.json()) == 1, (
+        assert len(response.json()['results']) == 1, (
             'Проверьте, что при GET запросе с параметром `group` на `/api/v1/posts/` '
             'возвращается список соответствующих постов'
         )
 
         response = user_client.get(f'/api/v1/posts/?group={group_1.id}')
-        assert len(response.json()) == 2, (
+        assert len(response.json()['results']) == 2, (
             'Проверьте, что при GET запросе с параметром `group` на `/api/v1/posts/` '
             'возвращается список соответствующих постов'
         )
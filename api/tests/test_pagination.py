@@ -0,0 +1,47 @@
+import pytest
+from posts.models import Post
+
+
+class TestPaginationAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_posts_cursor_pages(self, user_client, user):
+        for i in range(5):
+            Post.objects.create(text=f'Тестовый пост {i}', author=user)
+
+        response = user_client.get('/api/v1/posts/?page_size=2')
+        test_data = response.json()
+        assert len(test_data['results']) == 2, (
+            'Проверьте, что `/api/v1/posts/` учитывает параметр `page_size`'
+        )
+        assert test_data['previous'] is None
+        ids = [item['id'] for item in test_data['results']]
+        while test_data['next']:
+            test_data = user_client.get(test_data['next']).json()
+            ids += [item['id'] for item in test_data['results']]
+
+        assert ids == list(
+            Post.objects.order_by('-pub_date', '-id').values_list(
+                'id',
+                flat=True,
+            )
+        ), (
+            'Проверьте, что ссылки `next` на `/api/v1/posts/` обходят '
+            'все посты по одному разу'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_page_size_cap(self, user_client, user):
+        from api.pagination import CursorPagination
+        for i in range(4):
+            Post.objects.create(text=f'Тестовый пост {i}', author=user)
+
+        max_page_size = CursorPagination.max_page_size
+        CursorPagination.max_page_size = 3
+        try:
+            response = user_client.get('/api/v1/posts/?page_size=1000')
+        finally:
+            CursorPagination.max_page_size = max_page_size
+        assert len(response.json()['results']) == 3, (
+            'Проверьте, что размер страницы ограничен `API_MAX_PAGE_SIZE`'
+        )
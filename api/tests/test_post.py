@@ -27,7 +27,7 @@ class TestPostAPI:
             'Проверьте, что при GET запросе `/api/v1/posts/` с токеном авторизации возвращаетсся статус 200'
         )
 
-        test_data = response.json()
+        test_data = response.json()['results']
 
         assert type(test_data) == list, (
             'Проверьте, что при GET запросе на `/api/v1/posts/` возвращается список'
@@ -153,3 +153,40 @@ class TestPostAPI:
         assert response.status_code == 403, (
             'Проверьте, что при DELETE запросе `/api/v1/posts/{id}/` для не своей статьи возвращаете статус 403'
         )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_post_image_variants(self, user_client, settings, tmp_path):
+        from io import BytesIO
+
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from PIL import Image
+
+        settings.MEDIA_ROOT = str(tmp_path)
+        buffer = BytesIO()
+        Image.new('RGB', (900, 300), 'red').save(buffer, 'JPEG')
+        image = SimpleUploadedFile(
+            'photo.jpg',
+            buffer.getvalue(),
+            'image/jpeg',
+        )
+
+        response = user_client.post(
+            '/api/v1/posts/',
+            data={'text': 'Статья с картинкой', 'image': image},
+            format='multipart',
+        )
+
+        assert response.status_code == 201
+        from posts import image_jobs
+        image_jobs.run(once=True)
+        variants = user_client.get(
+            f'/api/v1/posts/{response.json()["id"]}/'
+        ).json()['image_variants']
+        assert [(item['width'], item['height']) for item in variants] == [
+            (400, 133), (800, 267), (900, 300)
+        ], (
+            'Проверьте, что `/api/v1/posts/{id}/` возвращает уменьшенные '
+            'копии изображения с их размерами'
+        )
+        assert variants[0]['url'].startswith('http://testserver/media/blobs/')
+        assert variants[0]['url'].endswith('.webp')
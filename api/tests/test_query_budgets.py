@@ -0,0 +1,99 @@
+import pytest
+
+
+@pytest.fixture
+def many_posts(user, user_2, another_user, group_1):
+    from posts.models import Comment, Follow, Post
+    authors = [user, user_2, another_user]
+    posts = [
+        Post.objects.create(
+            text=f'Тестовый пост {number}',
+            author=authors[number % 3],
+            group=group_1 if number % 2 else None,
+        )
+        for number in range(9)
+    ]
+    for author in authors:
+        Comment.objects.create(author=author, post=posts[0], text='Коммент')
+    Follow.objects.create(user=user, following=user_2)
+    Follow.objects.create(user=user, following=another_user)
+    Follow.objects.create(user=user_2, following=user)
+    Follow.objects.create(user=another_user, following=user)
+    return posts
+
+
+class TestQueryBudgets:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_reads(self, user_client, settings, many_posts, group_1):
+        settings.QUERY_BUDGETS_STRICT = True
+        post = many_posts[0]
+        comment = post.comments.first()
+        urls = [
+            '/api/v1/posts/',
+            '/api/v1/posts/?expand=author,group',
+            '/api/v1/posts/search/?q=тестовый',
+            f'/api/v1/posts/{post.id}/',
+            f'/api/v1/posts/{post.id}/comments/',
+            f'/api/v1/posts/{post.id}/comments/{comment.id}/',
+            f'/api/v1/posts/{post.id}/comments/thread/',
+            f'/api/v1/posts/{post.id}/comments/thread/?parent={comment.id}',
+            '/api/v1/group/',
+            f'/api/v1/group/{group_1.id}/',
+            '/api/v1/follow/',
+            '/api/v1/feed/',
+            '/api/v1/recommendations/',
+        ]
+        for url in urls:
+            assert user_client.get(url).status_code == 200, (
+                f'Проверьте, что `{url}` укладывается в бюджет запросов'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_writes(self, user_client, settings, user, many_posts, group_1):
+        from posts.models import Post
+        settings.QUERY_BUDGETS_STRICT = True
+        post = Post.objects.filter(author=user).first()
+
+        response = user_client.post(
+            '/api/v1/posts/',
+            data={'text': 'Новый пост', 'group': group_1.id},
+        )
+        assert response.status_code == 201
+        response = user_client.patch(
+            f'/api/v1/posts/{post.id}/',
+            data={'text': 'Новый текст'},
+        )
+        assert response.status_code == 200
+        response = user_client.post(
+            f'/api/v1/posts/{post.id}/comments/',
+            data={'text': 'Новый коммент'},
+        )
+        assert response.status_code == 201
+        response = user_client.patch(
+            f'/api/v1/posts/{post.id}/comments/{response.json()["id"]}/',
+            data={'text': 'Другой коммент'},
+        )
+        assert response.status_code == 200
+        response = user_client.post(
+            '/api/v1/group/',
+            data={'title': 'Группа', 'slug': 'new-group'},
+        )
+        assert response.status_code == 201
+        response = user_client.delete(f'/api/v1/posts/{post.id}/')
+        assert response.status_code == 204, (
+            'Проверьте, что удаление поста с комментариями '
+            'укладывается в бюджет запросов'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_follow(self, user_client, settings, user):
+        from django.contrib.auth import get_user_model
+        settings.QUERY_BUDGETS_STRICT = True
+        get_user_model().objects.create_user(username='NewUser', password='1')
+
+        response = user_client.post(
+            '/api/v1/follow/',
+            data={'following': 'NewUser'},
+        )
+        assert response.status_code == 201
@@ -0,0 +1,41 @@
+import pytest
+from posts.models import Recommendation
+
+
+class TestRecommendationAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_list(self, client, user_client, user, user_2, another_user):
+        Recommendation.objects.create(user=user, suggested=user_2, score=1)
+        Recommendation.objects.create(
+            user=user,
+            suggested=another_user,
+            score=3,
+        )
+        Recommendation.objects.create(user=user_2, suggested=user, score=5)
+
+        response = client.get('/api/v1/recommendations/')
+        assert response.status_code == 401, (
+            'Проверьте, что `/api/v1/recommendations/` доступен только '
+            'авторизованным пользователям'
+        )
+        response = user_client.get('/api/v1/recommendations/')
+        assert response.status_code == 200, (
+            'Страница `/api/v1/recommendations/` не найдена'
+        )
+        assert response.json() == [
+            {
+                'suggested': {
+                    'id': another_user.id,
+                    'username': another_user.username,
+                },
+                'score': 3,
+            },
+            {
+                'suggested': {'id': user_2.id, 'username': user_2.username},
+                'score': 1,
+            },
+        ], (
+            'Проверьте, что `/api/v1/recommendations/` возвращает '
+            'рекомендации текущего пользователя, лучшие первыми'
+        )
@@ -0,0 +1,84 @@
+import json
+
+import pytest
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+
+def serialize(serializer_class, objects, path, params):
+    request = Request(APIRequestFactory().get(path, params))
+    data = serializer_class(
+        objects,
+        many=True,
+        context={'request': request},
+    ).data
+    return json.loads(JSONRenderer().render(data))
+
+
+class TestRowSerializers:
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('params', [
+        {},
+        {'fields': 'id,excerpt,image,group'},
+        {'expand': 'author,group'},
+    ])
+    def test_posts(self, client, user, group_1, post, params):
+        from api.serializers import PostSerializer
+        from posts import images
+        from posts.models import Post
+        Post.objects.create(
+            text='Пост с картинкой',
+            author=user,
+            image='posts/image.jpg',
+            image_variants=images.dump_variants([
+                images.Variant('posts/variants/image_400.webp', 400, 300),
+            ]),
+        )
+
+        response = client.get('/api/v1/posts/', params)
+
+        assert response.status_code == 200
+        posts = Post.objects.order_by('-pub_date', '-id')
+        assert response.json()['results'] == serialize(
+            PostSerializer,
+            posts,
+            '/api/v1/posts/',
+            params,
+        ), (
+            'Проверьте, что `/api/v1/posts/` возвращает то же, '
+            'что PostSerializer'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_comments(self, client, post, comment_1_post, comment_2_post):
+        from api.serializers import CommentSerializer
+        from posts.models import Comment
+        path = f'/api/v1/posts/{post.id}/comments/'
+
+        response = client.get(path)
+
+        assert response.status_code == 200
+        comments = Comment.objects.order_by('-created', '-id')
+        assert response.json()['results'] == serialize(
+            CommentSerializer,
+            comments,
+            path,
+            {},
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_groups(self, client, group_1, group_2, post):
+        from api.serializers import GroupSerializer
+        from posts.models import Group
+
+        response = client.get('/api/v1/group/')
+
+        assert response.status_code == 200
+        assert response.json()['results'] == serialize(
+            GroupSerializer,
+            Group.objects.order_by('id'),
+            '/api/v1/group/',
+            {},
+        )
@@ -0,0 +1,45 @@
+import pytest
+from posts.models import Post
+
+
+class TestSearchAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_search(self, client, user, post, post_2):
+        Post.objects.create(text='Тестовый тестовый пост', author=user)
+        Post.objects.create(text='Другой текст', author=user)
+
+        response = client.get(
+            '/api/v1/posts/search/',
+            {'q': 'тестовый', 'page_size': 2},
+        )
+
+        assert response.status_code == 200, (
+            'Проверьте, что `/api/v1/posts/search/` доступен '
+            'без токена авторизации'
+        )
+        test_data = response.json()
+        results = test_data['results']
+        assert len(results) == 2, (
+            'Проверьте, что `/api/v1/posts/search/` учитывает '
+            'параметр `page_size`'
+        )
+        assert results[0]['text'] == 'Тестовый тестовый пост', (
+            'Проверьте, что `/api/v1/posts/search/` возвращает '
+            'лучшие совпадения первыми'
+        )
+        results += client.get(test_data['next']).json()['results']
+        assert len(results) == 3, (
+            'Проверьте, что `/api/v1/posts/search/` возвращает только '
+            'посты со всеми словами запроса'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_search_empty_query(self, client, post):
+        response = client.get('/api/v1/posts/search/')
+
+        assert response.status_code == 200
+        assert response.json()['results'] == [], (
+            'Проверьте, что `/api/v1/posts/search/` без запроса '
+            'возвращает пустой список'
+        )
@@ -0,0 +1,107 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class TestSparseFieldsAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_fields(self, client, post, post_2):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/v1/posts/', {'fields': 'id,pub_date'})
+
+        assert response.status_code == 200
+        results = response.json()['results']
+        assert [set(result) for result in results] == [
+            {'id', 'pub_date'}
+        ] * 2, (
+            'Проверьте, что `/api/v1/posts/` возвращает только поля '
+            'из параметра `fields`'
+        )
+        sql = queries[-1]['sql']
+        assert '"text"' not in sql and 'auth_user' not in sql, (
+            'Проверьте, что `/api/v1/posts/` не загружает из базы '
+            'незапрошенные поля'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_default_fields(self, client, post):
+        response = client.get(f'/api/v1/posts/{post.id}/')
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data['text'] == post.text
+        assert data['author'] == post.author.username
+        assert data['group'] == post.group.id
+        assert 'excerpt' not in data, (
+            'Проверьте, что `/api/v1/posts/` без параметра `fields` '
+            'возвращает поля как раньше'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_excerpt(self, client, user):
+        from posts.models import Post
+        from api.serializers import EXCERPT_LENGTH
+        Post.objects.create(text='слово ' * EXCERPT_LENGTH, author=user)
+
+        response = client.get('/api/v1/posts/', {'fields': 'id,excerpt'})
+
+        assert response.status_code == 200
+        result = response.json()['results'][0]
+        assert set(result) == {'id', 'excerpt'}
+        text = 'слово ' * EXCERPT_LENGTH
+        assert result['excerpt'] == text[:EXCERPT_LENGTH], (
+            'Проверьте, что поле `excerpt` содержит начало текста поста'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_expand(self, client, user, post):
+        response = client.get(
+            '/api/v1/posts/',
+            {'fields': 'id,author,group', 'expand': 'author,group'},
+        )
+
+        assert response.status_code == 200
+        result = response.json()['results'][0]
+        assert result['author'] == {
+            'id': user.id,
+            'username': user.username,
+        }, (
+            'Проверьте, что параметр `expand` разворачивает автора поста'
+        )
+        assert result['group']['slug'] == post.group.slug
+
+    @pytest.mark.django_db(transaction=True)
+    def test_comments_fields(self, client, post, comment_1_post):
+        response = client.get(
+            f'/api/v1/posts/{post.id}/comments/',
+            {'fields': 'text,author', 'expand': 'author'},
+        )
+
+        assert response.status_code == 200
+        assert response.json()['results'] == [{
+            'text': comment_1_post.text,
+            'author': {
+                'id': comment_1_post.author.id,
+                'username': comment_1_post.author.username,
+            },
+        }]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_search_fields(self, client, post):
+        response = client.get(
+            '/api/v1/posts/search/',
+            {'q': 'тестовый', 'fields': 'id'},
+        )
+
+        assert response.status_code == 200
+        assert response.json()['results'] == [{'id': post.id}]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_unknown_fields(self, client, post):
+        response = client.get('/api/v1/posts/', {'fields': 'id,password'})
+        assert response.status_code == 400, (
+            'Проверьте, что `/api/v1/posts/` отклоняет неизвестные поля'
+        )
+        response = client.get('/api/v1/group/', {'expand': 'posts'})
+        assert response.status_code == 400
@@ -0,0 +1,74 @@
+import pytest
+from posts.models import Comment
+
+
+class TestCommentThreadAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_reply(self, user_client, post, post_2, comment_1_post):
+        url = f'/api/v1/posts/{post.id}/comments/'
+        response = user_client.post(
+            url,
+            data={'text': 'Ответ', 'parent': comment_1_post.id},
+        )
+        assert response.status_code == 201, (
+            'Проверьте, что POST запрос на '
+            '`/api/v1/posts/{post.id}/comments/` с полем `parent` '
+            'создаёт ответ'
+        )
+        assert response.json()['parent'] == comment_1_post.id
+        assert 'path' not in response.json()
+        reply = Comment.objects.get(pk=response.json()['id'])
+        assert reply.parent == comment_1_post
+
+        response = user_client.post(
+            f'/api/v1/posts/{post_2.id}/comments/',
+            data={'text': 'Ответ', 'parent': comment_1_post.id},
+        )
+        assert response.status_code == 400, (
+            'Проверьте, что нельзя ответить на комментарий другого поста'
+        )
+
+        response = user_client.patch(
+            f'{url}{reply.id}/',
+            data={'parent': ''},
+        )
+        assert response.status_code == 400, (
+            'Проверьте, что ответ нельзя перенести в другую ветку'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_thread(self, client, post, comment_1_post, comment_2_post):
+        reply = Comment.objects.create(
+            author=comment_2_post.author,
+            post=post,
+            text='Ответ',
+            parent=comment_1_post,
+        )
+        url = f'/api/v1/posts/{post.id}/comments/thread/'
+        response = client.get(url, {'page_size': 2})
+        assert response.status_code == 200, (
+            'Страница `/api/v1/posts/{post.id}/comments/thread/` не найдена'
+        )
+        data = response.json()
+        assert [item['id'] for item in data['results']] == [
+            comment_1_post.id,
+            reply.id,
+        ], (
+            'Проверьте, что ответы идут сразу за комментарием'
+        )
+        assert data['results'][1]['parent'] == comment_1_post.id
+        response = client.get(data['next'])
+        assert [item['id'] for item in response.json()['results']] == [
+            comment_2_post.id,
+        ]
+
+        response = client.get(url, {'parent': comment_1_post.id})
+        assert [item['id'] for item in response.json()['results']] == [
+            comment_1_post.id,
+            reply.id,
+        ], (
+            'Проверьте, что параметр `parent` оставляет только его ветку'
+        )
+        response = client.get(url, {'parent': 'x'})
+        assert response.status_code == 404
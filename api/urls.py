@@ -3,7 +3,8 @@ from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import (TokenObtainPairView,
                                             TokenRefreshView)
 
-from .views import CommentViewSet, FollowViewSet, GroupViewSet, PostViewSet
+from .views import (CommentViewSet, FeedViewSet, FollowViewSet, GroupViewSet,
+                    PostViewSet, RecommendationViewSet)
 
 router = DefaultRouter()
 router.register(
@@ -26,6 +27,16 @@ router.register(
     FollowViewSet,
     basename='follow_view',
 )
+router.register(
+    r'feed',
+    FeedViewSet,
+    basename='feed_view',
+)
+router.register(
+    r'recommendations',
+    RecommendationViewSet,
+    basename='recommendation_view',
+)
 
 urlpatterns = [
     path(
@@ -1,17 +1,38 @@
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
 from django.shortcuts import get_object_or_404
+from posts import bulk as post_bulk
+from posts import follow_graph, recommendations
+from posts import search as post_search
+from posts import threads
+from posts import timeline
 from posts.models import Comment, Follow, Group, Post
-from rest_framework import filters, viewsets
+from rest_framework import filters, mixins, serializers, viewsets
+from rest_framework.decorators import action
 
+from .bulk import BulkCreateMixin
+from .conditional import ConditionalMixin
 from .filters import PostsInGroupFilter
+from .pagination import (CommentCursorPagination, CommentThreadPagination,
+                         GroupCursorPagination, PostCursorPagination,
+                         SearchCursorPagination, TimelinePagination)
 from .permissions import ReadOnlyOrIsAuthenticatedOrIsAuthor
-from .serializers import (CommentSerializer, FollowSerializer, GroupSerializer,
-                          PostSerializer)
+from .rows import RowListMixin
+from .serializers import (ALREADY_FOLLOWING, CommentSerializer,
+                          FollowSerializer, GroupSerializer, PostSerializer,
+                          RecommendationSerializer)
+from .sparse import SparseQuerysetMixin
 
 User = get_user_model()
 
 
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewSet(
+    ConditionalMixin,
+    RowListMixin,
+    SparseQuerysetMixin,
+    BulkCreateMixin,
+    viewsets.ModelViewSet,
+):
     '''Provide access to objects of the Post model:
     get a given post or get all posts - works for
     all users (including unauthorized); create a new
@@ -24,6 +45,18 @@ class PostViewSet(viewsets.ModelViewSet):
     ]
     lookup_url_kwarg = 'post_id'
     filterset_class = PostsInGroupFilter
+    pagination_class = PostCursorPagination
+    list_tags = ('posts',)
+    detail_tags = ('post:{post_id}',)
+    query_budget = {
+        'list': 2,
+        'search': 3,
+        'retrieve': 2,
+        'create': 11,
+        'update': 8,
+        'partial_update': 8,
+        'destroy': 11,
+    }
 
     def perform_create(self, serializer):
         group_id = self.request.data.get('group')
@@ -35,8 +68,48 @@ class PostViewSet(viewsets.ModelViewSet):
             return serializer.save(author=self.request.user, group=group)
         return serializer.save(author=self.request.user)
 
+    @action(detail=False, pagination_class=SearchCursorPagination)
+    def search(self, request):
+        '''Posts containing every word of the `q` parameter,
+        best matches first.'''
+        return self.conditional(
+            lambda request: self.list_rows(self.restrict_fields(
+                post_search.search(request.query_params.get('q'))
+            )),
+            request,
+        )
+
+    def bulk_validate(self, items):
+        '''Load the groups of all items with one query.'''
+        groups = {
+            str(group.id): group
+            for group in Group.objects.filter(id__in=[
+                item['group'] for item in items
+                if isinstance(item, dict) and str(item.get('group')).isdigit()
+            ])
+        }
+        posts = self.validate_items(items, author=self.request.user)
+        for item, post in zip(items, posts):
+            group_id = item.get('group') if isinstance(item, dict) else None
+            if isinstance(post, dict) or not group_id:
+                yield post
+            elif str(group_id) not in groups:
+                yield {'group': ['Группа не найдена.']}
+            else:
+                post.group = groups[str(group_id)]
+                yield post
+
+    def bulk_create(self, posts):
+        return post_bulk.create_posts(posts)
+
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(
+    ConditionalMixin,
+    RowListMixin,
+    SparseQuerysetMixin,
+    BulkCreateMixin,
+    viewsets.ModelViewSet,
+):
     '''Provide access to objects of the Comment model:
     get a given comment or get all comments for a given post - works for all
     users (including unauthorized); create a new comment for a given
@@ -47,16 +120,60 @@ class CommentViewSet(viewsets.ModelViewSet):
         ReadOnlyOrIsAuthenticatedOrIsAuthor,
     ]
     lookup_url_kwarg = 'comment_id'
+    pagination_class = CommentCursorPagination
+    list_tags = ('post:{post_id}',)
+    detail_tags = ('post:{post_id}',)
+    query_budget = {
+        'list': 2,
+        'thread': 3,
+        'retrieve': 2,
+        'create': 6,
+        'update': 6,
+        'partial_update': 6,
+        'destroy': 6,
+    }
 
     def get_queryset(self):
-        return Comment.objects.filter(post=self.kwargs.get('post_id'))
+        return self.restrict_fields(
+            Comment.objects.filter(post=self.kwargs.get('post_id'))
+        )
+
+    @action(detail=False, pagination_class=CommentThreadPagination)
+    def thread(self, request, post_id):
+        '''Comments in thread order, each followed by its replies;
+        with `parent` only the thread starting with that comment.'''
+        return self.conditional(
+            lambda request: self.list_rows(self.thread_queryset(
+                request.query_params.get('parent'),
+            )),
+            request,
+        )
+
+    def thread_queryset(self, parent_id):
+        queryset = self.get_queryset()
+        parent = threads.comment_or_404(parent_id, self.kwargs.get('post_id'))
+        if parent is not None:
+            queryset = queryset.filter(path__startswith=parent.path)
+        return queryset
 
     def perform_create(self, serializer):
         post = get_object_or_404(Post, pk=self.kwargs.get('post_id'))
         return serializer.save(author=self.request.user, post=post)
 
+    def bulk_validate(self, items):
+        post = get_object_or_404(Post, pk=self.kwargs.get('post_id'))
+        return self.validate_items(items, author=self.request.user, post=post)
+
+    def bulk_create(self, comments):
+        return post_bulk.create_comments(comments)
 
-class GroupViewSet(viewsets.ModelViewSet):
+
+class GroupViewSet(
+    ConditionalMixin,
+    RowListMixin,
+    SparseQuerysetMixin,
+    viewsets.ModelViewSet,
+):
     '''Provide access to objects of the Group model:
     get a given group or get all groups - works for all users
     (including unauthorized); create a new group - works for
@@ -71,9 +188,18 @@ class GroupViewSet(viewsets.ModelViewSet):
     queryset = Group.objects.all()
     serializer_class = GroupSerializer
     lookup_url_kwarg = 'group_id'
+    pagination_class = GroupCursorPagination
+    # Groups show the number of their posts.
+    list_tags = ('groups', 'posts')
+    detail_tags = ('groups', 'posts')
+    query_budget = {
+        'list': 2,
+        'retrieve': 2,
+        'create': 3,
+    }
 
 
-class FollowViewSet(viewsets.ModelViewSet):
+class FollowViewSet(BulkCreateMixin, viewsets.ModelViewSet):
     '''Provide access to objects of the Follow model.'''
     http_method_names = [
         'get',
@@ -86,17 +212,106 @@ class FollowViewSet(viewsets.ModelViewSet):
     search_fields = [
         'user__username',
     ]
+    query_budget = {
+        'list': 2,
+        'create': 10,
+    }
 
     def get_queryset(self):
-        user = get_object_or_404(
-            User,
-            pk=self.request.user.pk
+        return Follow.objects.filter(
+            following=self.request.user,
+        ).select_related(
+            'user',
+            'following',
         )
-        return Follow.objects.filter(following=user)
 
     def perform_create(self, serializer):
         following = get_object_or_404(
             User,
             username=self.request.data.get('following')
         )
-        return serializer.save(user=self.request.user, following=following)
+        try:
+            with transaction.atomic():
+                return serializer.save(
+                    user=self.request.user,
+                    following=following,
+                )
+        except IntegrityError:
+            raise serializers.ValidationError(
+                {'non_field_errors': [ALREADY_FOLLOWING]},
+            )
+
+    def bulk_validate(self, items):
+        '''Check all items with one query for the users instead
+        of two per item made by FollowSerializer.'''
+        user = self.request.user
+        usernames = {
+            item.get('following') for item in items
+            if isinstance(item, dict)
+            and isinstance(item.get('following'), str)
+        }
+        users = User.objects.in_bulk(usernames, field_name='username')
+        followed = follow_graph.following_among(
+            user.pk,
+            [author.pk for author in users.values()],
+        )
+        for item in items:
+            username = None
+            if isinstance(item, dict):
+                username = item.get('following')
+            if not username:
+                yield {'following': ['Обязательное поле.']}
+            elif username not in users:
+                yield {
+                    'following': [
+                        f'Объект с username={username} не существует.'
+                    ],
+                }
+            elif users[username] == user:
+                yield {
+                    'following': ['Подписываешься сам на себя? Не надо так.'],
+                }
+            elif users[username].pk in followed:
+                yield {'non_field_errors': [ALREADY_FOLLOWING]}
+            else:
+                followed.add(users[username].pk)
+                yield Follow(user=user, following=users[username])
+
+    def bulk_create(self, follows):
+        try:
+            return post_bulk.create_follows(follows)
+        except IntegrityError:
+            raise serializers.ValidationError(
+                {'non_field_errors': [ALREADY_FOLLOWING]},
+            )
+
+
+class FeedViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    '''Provide the subscriptions feed of the current user
+    read from the materialized timeline.'''
+    serializer_class = PostSerializer
+    pagination_class = TimelinePagination
+    query_budget = {
+        'list': 4,
+    }
+
+    def list(self, request, *args, **kwargs):
+        entries = self.paginate_queryset(timeline.entries(request.user))
+        posts = timeline.get_posts(
+            [post_id for pub_date, post_id in entries]
+        )
+        serializer = self.get_serializer(posts, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class RecommendationViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    '''Provide the authors suggested to the current user,
+    computed by the recommend_authors command.'''
+    serializer_class = RecommendationSerializer
+    pagination_class = None
+    query_budget = {
+        'list': 2,
+    }
+
+    def get_queryset(self):
+        return recommendations.suggestions(self.request.user)
@@ -0,0 +1,9 @@
+import pytest
+from django.test import override_settings
+
+
+@pytest.fixture(autouse=True)
+def media_root(tmp_path):
+    '''Keep files uploaded by the tests out of the project media.'''
+    with override_settings(MEDIA_ROOT=str(tmp_path / 'media')):
+        yield
@@ -1,5 +1,6 @@
 from django.contrib import admin
 
+from . import search
 from .models import Comment, Group, Post
 
 
@@ -18,11 +19,20 @@ class PostAdmin(admin.ModelAdmin):
     )
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        '''Look the words up in the search index instead of
+        scanning the post texts.'''
+        if not search_term:
+            return queryset, False
+        found = search.search(search_term).values('pk')
+        return queryset.filter(pk__in=found), False
+
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = (
         'title',
         'description',
+        'post_count',
     )
     search_fields = (
         'title',
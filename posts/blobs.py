@@ -0,0 +1,103 @@
+'''Reference counts of the files in the content-addressed storage.
+
+A file may be shared by several posts and avatars, so it is deleted
+only when the last object referring to it drops it. Names of files
+saved before the storage counted references are ignored.
+
+The storage takes the reference to a file while holding its row lock,
+before it decides to skip writing a file which exists, and the file
+is deleted while the lock is held too, so a file being saved again is
+never deleted by a concurrent release. The reference taken by the
+storage is handed over to the next acquire of the name.'''
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F
+from yatter.storage import BLOBS_DIR
+
+from .models import MediaBlob
+
+_taken = ContextVar('taken_blobs', default=())
+
+
+def is_blob(name):
+    return bool(name) and name.startswith(f'{BLOBS_DIR}/')
+
+
+def add_reference(name):
+    MediaBlob.objects.select_for_update().get_or_create(name=name)
+    MediaBlob.objects.filter(name=name).update(
+        refcount=F('refcount') + 1,
+    )
+
+
+@contextmanager
+def reference(name):
+    '''Hold the row lock of the file in the block writing it and
+    take a reference for the next acquire of the name.'''
+    with transaction.atomic():
+        add_reference(name)
+        yield
+    _taken.set(_taken.get() + (name,))
+
+
+def take_over(name):
+    '''Return True and forget the reference taken by the storage
+    for the name, if there is one.'''
+    taken = list(_taken.get())
+    if name not in taken:
+        return False
+    taken.remove(name)
+    _taken.set(tuple(taken))
+    return True
+
+
+def acquire(*names):
+    for name in filter(is_blob, names):
+        if take_over(name):
+            continue
+        with transaction.atomic():
+            add_reference(name)
+
+
+def release_taken(*names):
+    '''Drop the references taken by the storage for files
+    which were saved again but are not used.'''
+    release(*filter(take_over, names))
+
+
+def release(*names):
+    '''Drop references and delete files nobody refers to.'''
+    for name in filter(is_blob, names):
+        with transaction.atomic():
+            blob = MediaBlob.objects.select_for_update().filter(
+                name=name,
+            ).first()
+            if blob is None:
+                continue
+            if blob.refcount > 1:
+                MediaBlob.objects.filter(pk=blob.pk).update(
+                    refcount=F('refcount') - 1,
+                )
+                continue
+            blob.delete()
+            default_storage.delete(name)
+
+
+def repair(names):
+    '''Set reference counts from all names in use; delete files
+    counted before which are not used any more.'''
+    counts = Counter(filter(is_blob, names))
+    for blob in MediaBlob.objects.iterator():
+        if blob.name not in counts:
+            blob.delete()
+            default_storage.delete(blob.name)
+    for name, refcount in counts.items():
+        MediaBlob.objects.update_or_create(
+            name=name,
+            defaults={'refcount': refcount},
+        )
+    return len(counts)
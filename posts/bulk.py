@@ -0,0 +1,111 @@
+'''Creation of many posts, comments or follows at once.
+
+Rows are inserted with bulk_create, which sends no signals, so the
+counters, timelines, search index and page cache are updated here
+with one statement per affected author, group or post instead of
+several per object.
+
+Backends unable to return primary keys of bulk inserted rows (SQLite)
+save the objects one by one and let the signals do the same work.'''
+from collections import Counter
+
+from django.db import connection, transaction
+
+from . import (counters, follow_graph, image_jobs, pagecache, recommendations,
+               search, threads, timeline)
+from .models import Comment, Follow, Group, ImageJob, Post
+
+BATCH_SIZE = 1000
+
+
+def can_bulk_insert():
+    return connection.features.can_return_ids_from_bulk_insert
+
+
+def create(model, objects, created):
+    '''Insert the objects in one transaction; created is called
+    with them when the signals were not sent.'''
+    with transaction.atomic():
+        if not can_bulk_insert():
+            for instance in objects:
+                instance.save()
+            return objects
+        model.objects.bulk_create(objects, batch_size=BATCH_SIZE)
+        created(objects)
+    return objects
+
+
+def create_posts(posts):
+    return create(Post, posts, posts_created)
+
+
+def create_comments(comments):
+    return create(Comment, comments, comments_created)
+
+
+def create_follows(follows):
+    return create(Follow, follows, follows_created)
+
+
+def posts_created(posts):
+    group_counts = Counter(post.group_id for post in posts if post.group_id)
+    for group_id, count in group_counts.items():
+        counters.change_group_count(group_id, count)
+    author_counts = Counter(post.author_id for post in posts)
+    for author_id, count in author_counts.items():
+        counters.change_profile_count(author_id, 'posts_count', count)
+    for post in posts:
+        post._loaded_group_id = post.group_id
+        if post.image:
+            image_jobs.image_saved(ImageJob.POST, post)
+    search.index_new_posts(posts)
+    timeline.push_posts(posts)
+    group_tags = [
+        f'group:{slug}' for slug in Group.objects.filter(
+            pk__in=group_counts,
+        ).values_list(
+            'slug',
+            flat=True,
+        )
+    ]
+    if group_tags:
+        # Post counts of the groups are shown on every page.
+        group_tags.append('groups')
+    pagecache.invalidate(
+        'posts',
+        *{f'user:{post.author.username}' for post in posts},
+        *group_tags
+    )
+
+
+def comments_created(comments):
+    threads.place(comments)
+    post_ids = Counter(comment.post_id for comment in comments)
+    for post_id, count in post_ids.items():
+        counters.change_comment_count(post_id, count)
+    posts = Post.objects.filter(pk__in=post_ids).select_related(
+        'author',
+        'group',
+    )
+    tags = {'posts'}
+    for post in posts:
+        tags.update([f'post:{post.pk}', f'user:{post.author.username}'])
+        if post.group is not None:
+            tags.add(f'group:{post.group.slug}')
+    pagecache.invalidate(*tags)
+
+
+def follows_created(follows):
+    for user_id, count in Counter(f.user_id for f in follows).items():
+        counters.change_profile_count(user_id, 'following_count', count)
+    for user_id, count in Counter(f.following_id for f in follows).items():
+        counters.change_profile_count(user_id, 'followers_count', count)
+    follow_graph.followed(follows)
+    recommendations.follows_changed(follows)
+    for follow in follows:
+        timeline.add_author(follow)
+    pagecache.invalidate(*{
+        f'user:{user.username}'
+        for follow in follows
+        for user in (follow.user, follow.following)
+    })
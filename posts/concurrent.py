@@ -0,0 +1,42 @@
+'''Run independent queries of a view at the same time.
+
+Django 2.2 has no async views, so the queries are sent from a shared
+pool of threads, each keeping its own database connection between
+calls. The response then waits for the slowest query instead of
+the sum of all of them.
+
+Inside a transaction the queries are run one by one in the calling
+thread: other connections would not see its changes.
+
+The functions run in a copy of the calling context, so per-request
+context variables such as the query recorder reach the pool.'''
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.VIEW_QUERY_THREADS,
+    thread_name_prefix='view-query',
+)
+
+
+def _call(function):
+    # Drop a connection broken or kept longer than CONN_MAX_AGE,
+    # as Django does at the start of each request.
+    close_old_connections()
+    return function()
+
+
+def gather(*functions):
+    '''Call the functions concurrently and return their results
+    in order; the first exception raised is propagated.'''
+    if len(functions) < 2 or connection.in_atomic_block:
+        return [function() for function in functions]
+    futures = [
+        _executor.submit(contextvars.copy_context().run, _call, function)
+        for function in functions[1:]
+    ]
+    first = functions[0]()
+    return [first] + [future.result() for future in futures]
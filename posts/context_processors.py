@@ -1,7 +1,8 @@
 import datetime as dt
 
-from django.db.models import Count
+from django.utils.functional import SimpleLazyObject
 
+from . import recommendations
 from .models import Group
 
 
@@ -14,11 +15,24 @@ def year(request):
 
 def all_groups(request):
     '''Display a list of all groups by the number of posts in them.'''
-    all_groups = Group.objects.annotate(
-        num_posts=Count('group_id')
-    ).order_by(
-        '-num_posts',
+    all_groups = Group.objects.order_by(
+        '-post_count',
     )[:10]
     return {
         'all_groups': all_groups,
     }
+
+
+def recommended_authors(request):
+    '''Who to follow suggestions for the sidebar, read only
+    by the templates showing them.'''
+    if not request.user.is_authenticated:
+        return {}
+    return {
+        'recommended_authors': SimpleLazyObject(
+            lambda: recommendations.unfollowed_suggestions(
+                request.user,
+                recommendations.SIDEBAR_SIZE,
+            )
+        ),
+    }
@@ -0,0 +1,142 @@
+'''Denormalized counters kept next to the rows they describe,
+so pages read them instead of aggregating.'''
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from users.models import UserProfile
+
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+BATCH_SIZE = 1000
+
+
+def change_group_count(group_id, delta):
+    '''Counters that drifted below the real value stop at zero
+    instead of failing the statement.'''
+    if group_id is not None:
+        Group.objects.filter(pk=group_id).update(
+            post_count=Greatest(F('post_count') + delta, 0),
+        )
+
+
+def change_profile_count(user_id, field, delta):
+    UserProfile.objects.filter(user_id=user_id).update(
+        **{field: Greatest(F(field) + delta, 0)}
+    )
+
+
+def post_saved(post, created):
+    '''Update the counters of the post author and group, including
+    the group the post was moved from.'''
+    if created:
+        change_group_count(post.group_id, 1)
+        change_profile_count(post.author_id, 'posts_count', 1)
+    elif hasattr(post, '_loaded_group_id'):
+        if post._loaded_group_id != post.group_id:
+            change_group_count(post._loaded_group_id, -1)
+            change_group_count(post.group_id, 1)
+    post._loaded_group_id = post.group_id
+
+
+def post_deleted(post):
+    change_group_count(post.group_id, -1)
+    change_profile_count(post.author_id, 'posts_count', -1)
+
+
+def change_comment_count(post_id, delta):
+    Post.objects.filter(pk=post_id).update(
+        comments_count=Greatest(F('comments_count') + delta, 0),
+    )
+
+
+def comment_changed(comment, delta):
+    change_comment_count(comment.post_id, delta)
+
+
+def follow_changed(follow, delta):
+    change_profile_count(follow.user_id, 'following_count', delta)
+    change_profile_count(follow.following_id, 'followers_count', delta)
+
+
+def count_subquery(queryset, field, outer_field='pk'):
+    '''Correlated COUNT(*) over queryset grouped by field.'''
+    return Coalesce(
+        Subquery(
+            queryset.filter(
+                **{field: OuterRef(outer_field)}
+            ).order_by().values(
+                field,
+            ).annotate(
+                total=Count('pk'),
+            ).values('total')
+        ),
+        0,
+    )
+
+
+def recount(queryset, batch_size=BATCH_SIZE, **expressions):
+    '''Recompute counters with UPDATE statements over primary key
+    ranges of batch_size rows, so no statement locks the whole table.'''
+    updated = 0
+    last_pk = queryset.order_by('-pk').values_list('pk', flat=True).first()
+    for start in range(0, (last_pk or 0) + 1, batch_size):
+        updated += queryset.filter(
+            pk__gte=start,
+            pk__lt=start + batch_size,
+        ).update(**expressions)
+    return updated
+
+
+def repair_groups(batch_size=BATCH_SIZE):
+    '''Recompute post counters of all groups.'''
+    return recount(
+        Group.objects.all(),
+        batch_size,
+        post_count=count_subquery(Post.objects.all(), 'group'),
+    )
+
+
+def repair_posts(batch_size=BATCH_SIZE):
+    '''Recompute comment counters of all posts.'''
+    return recount(
+        Post.objects.all(),
+        batch_size,
+        comments_count=count_subquery(Comment.objects.all(), 'post'),
+    )
+
+
+def repair_profiles(batch_size=BATCH_SIZE):
+    '''Create missing profiles and recompute their counters.'''
+    UserProfile.objects.bulk_create(
+        [
+            UserProfile(user_id=user_id) for user_id in User.objects.filter(
+                profile__isnull=True,
+            ).values_list(
+                'id',
+                flat=True,
+            )
+        ],
+        batch_size=batch_size,
+        ignore_conflicts=True,
+    )
+    return recount(
+        UserProfile.objects.all(),
+        batch_size,
+        followers_count=count_subquery(
+            Follow.objects.all(),
+            'following',
+            'user_id',
+        ),
+        following_count=count_subquery(
+            Follow.objects.all(),
+            'user',
+            'user_id',
+        ),
+        posts_count=count_subquery(
+            Post.objects.all(),
+            'author',
+            'user_id',
+        ),
+    )
@@ -0,0 +1,157 @@
+'''Who follows whom, kept in the cache.
+
+The ids of the authors a user follows are cached as one sorted array
+of unsigned ints, four bytes per subscription, loaded with a single
+query on a miss and updated in place when follows are created or
+deleted. Checking whether a user follows an author, or which authors
+of a whole page of posts they follow, is a binary search in that array
+instead of a query on the Follow table.
+
+A change is applied at once, for the rest of the request, and again
+when the transaction commits, for a concurrent request which reloaded
+the array before the commit. Two changes of the same user at the same
+moment may still lose one update, and a rolled back change stays: the
+array expires after GRAPH_TIMEOUT and is reloaded, and the unique
+constraint of Follow stays the final check, so views write to the
+Follow table whatever the array says.
+
+Pages marking the authors a signed in visitor follows depend on the
+"follows:<user id>" page cache tag, changed with the array.'''
+from array import array
+from bisect import bisect_left, insort
+from collections import defaultdict
+from itertools import groupby
+from operator import itemgetter
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+
+from . import pagecache
+from .models import Follow
+
+User = get_user_model()
+
+BATCH_SIZE = 1000
+GRAPH_KEY = 'follow_graph:{}'
+GRAPH_TIMEOUT = 60 * 60
+TYPECODE = 'I'
+
+
+def load(user_id):
+    return array(
+        TYPECODE,
+        Follow.objects.filter(
+            user_id=user_id,
+        ).order_by(
+            'following_id',
+        ).values_list(
+            'following_id',
+            flat=True,
+        ),
+    )
+
+
+def following_ids(user_id):
+    '''Sorted ids of the authors the user follows.'''
+    key = GRAPH_KEY.format(user_id)
+    ids = cache.get(key)
+    if ids is None:
+        ids = load(user_id)
+        cache.set(key, ids, GRAPH_TIMEOUT)
+    return ids
+
+
+def contains(ids, author_id):
+    position = bisect_left(ids, author_id)
+    return position < len(ids) and ids[position] == author_id
+
+
+def is_following(user_id, author_id):
+    return contains(following_ids(user_id), author_id)
+
+
+def following_count(user_id):
+    return len(following_ids(user_id))
+
+
+def following_among(user_id, author_ids):
+    '''Return the ids of the given authors followed by the user.'''
+    ids = following_ids(user_id)
+    return {author_id for author_id in author_ids if contains(ids, author_id)}
+
+
+def mark_followed(user, posts):
+    '''Set followed_author on the posts whose author the user follows.'''
+    if not user.is_authenticated:
+        return posts
+    followed = following_among(user.pk, {post.author_id for post in posts})
+    for post in posts:
+        post.followed_author = post.author_id in followed
+    return posts
+
+
+def update(follows, add):
+    '''Add or remove the follows in the cached arrays now and once
+    the transaction commits.'''
+    changes = defaultdict(list)
+    for follow in follows:
+        changes[follow.user_id].append(follow.following_id)
+    apply(changes, add)
+    transaction.on_commit(lambda: apply(changes, add))
+
+
+def apply(changes, add):
+    '''Add or remove the author ids of the users in the cached arrays;
+    arrays not in the cache are loaded when next needed.'''
+    keys = {GRAPH_KEY.format(user_id): user_id for user_id in changes}
+    changed = {}
+    for key, ids in cache.get_many(keys).items():
+        for author_id in changes[keys[key]]:
+            position = bisect_left(ids, author_id)
+            present = position < len(ids) and ids[position] == author_id
+            if add and not present:
+                insort(ids, author_id)
+            elif not add and present:
+                del ids[position]
+        changed[key] = ids
+    if changed:
+        cache.set_many(changed, GRAPH_TIMEOUT)
+    pagecache.invalidate(*(f'follows:{user_id}' for user_id in changes))
+
+
+def followed(follows):
+    update(follows, add=True)
+
+
+def unfollowed(follows):
+    update(follows, add=False)
+
+
+def rebuild(batch_size=BATCH_SIZE):
+    '''Cache the arrays of all users, reading the follows once.'''
+    rows = Follow.objects.order_by(
+        'user_id',
+        'following_id',
+    ).values_list(
+        'user_id',
+        'following_id',
+    )
+    graph = {
+        user_id: array(TYPECODE, map(itemgetter(1), group))
+        for user_id, group in groupby(
+            rows.iterator(chunk_size=batch_size),
+            itemgetter(0),
+        )
+    }
+    user_ids = User.objects.values_list('pk', flat=True)
+    batch = {}
+    cached = 0
+    for user_id in user_ids.iterator(chunk_size=batch_size):
+        batch[GRAPH_KEY.format(user_id)] = graph.get(user_id, array(TYPECODE))
+        if len(batch) >= batch_size:
+            cache.set_many(batch, GRAPH_TIMEOUT)
+            cached += len(batch)
+            batch = {}
+    cache.set_many(batch, GRAPH_TIMEOUT)
+    return cached + len(batch)
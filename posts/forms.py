@@ -1,5 +1,6 @@
 from django import forms
 
+from . import images
 from .models import Comment, Post
 
 
@@ -13,6 +14,9 @@ class PostForm(forms.ModelForm):
             'image',
         ]
 
+    def clean_image(self):
+        return images.validate_upload(self.cleaned_data['image'])
+
 
 class CommentForm(forms.ModelForm):
     '''Form to create a new comment.'''
@@ -0,0 +1,197 @@
+'''Queue of uploaded images for the process_images worker.
+
+The request only stores the upload and adds a job; decoding and
+resizing run in separate worker processes, which can be scaled
+independently of the web workers.
+
+A worker leases a job by setting its claimed_at and counting the
+attempt, and deletes the row only once the job is done. Rows locked
+by other workers are skipped where the database supports it, and the
+lease is taken with a conditional UPDATE, so only one of the workers
+racing for the same job gets it on any database. A job whose worker
+failed or died is leased again once released or after LEASE_TIMEOUT,
+until MAX_ATTEMPTS.'''
+import logging
+import time
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from users.models import UserProfile
+
+from . import blobs, images
+from .models import ImageJob, Post
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 3
+POLL_INTERVAL = 1
+LEASE_TIMEOUT = timedelta(minutes=10)
+
+
+def enqueue(kind, object_id):
+    ImageJob.objects.create(
+        kind=kind,
+        object_id=object_id,
+    )
+
+
+class ImageKind:
+    '''Where an image of the kind is kept and how it is resized.'''
+    def __init__(self, model, field, variants_field, widths, square=False):
+        self.model = model
+        self.field = field
+        self.variants_field = variants_field
+        self.widths = widths
+        self.square = square
+
+
+KINDS = {
+    ImageJob.POST: ImageKind(
+        Post,
+        'image',
+        'image_variants',
+        images.POST_IMAGE_WIDTHS,
+    ),
+    ImageJob.AVATAR: ImageKind(
+        UserProfile,
+        'avatar',
+        'avatar_variants',
+        images.AVATAR_SIZES,
+        square=True,
+    ),
+}
+
+
+def variant_names(instance, image_kind):
+    return [
+        variant.name for variant in images.load_variants(
+            getattr(instance, image_kind.variants_field)
+        )
+    ]
+
+
+def image_saved(kind, instance):
+    '''Release a replaced image with its variants, and take
+    and queue the new one.'''
+    image_kind = KINDS[kind]
+    image = getattr(instance, image_kind.field)
+    loaded = f'_loaded_{image_kind.field}'
+    loaded_name = getattr(instance, loaded, None)
+    if loaded_name == image.name:
+        blobs.release_taken(image.name)
+        return
+    setattr(instance, loaded, image.name)
+    blobs.acquire(image.name)
+    blobs.release(loaded_name)
+    if getattr(instance, image_kind.variants_field):
+        blobs.release(*variant_names(instance, image_kind))
+        setattr(instance, image_kind.variants_field, '')
+        image_kind.model.objects.filter(pk=instance.pk).update(
+            **{image_kind.variants_field: ''}
+        )
+    if image:
+        enqueue(kind, instance.pk)
+
+
+def image_deleted(kind, instance):
+    image_kind = KINDS[kind]
+    blobs.release(
+        getattr(instance, image_kind.field).name,
+        *variant_names(instance, image_kind)
+    )
+
+
+def resize(kind, object_id):
+    image_kind = KINDS[kind]
+    instance = image_kind.model.objects.filter(pk=object_id).first()
+    if instance is None:
+        return
+    image = getattr(instance, image_kind.field)
+    if not image or getattr(instance, image_kind.variants_field):
+        return
+    try:
+        variants = images.make_variants(
+            image,
+            image_kind.widths,
+            image_kind.square,
+        )
+    except images.UNREADABLE_IMAGE_ERRORS:
+        # Keep serving the original.
+        logger.warning('Cannot read %s image %s.', kind, object_id)
+        variants = []
+    names = [variant.name for variant in variants]
+    blobs.acquire(*names)
+    value = images.dump_variants(variants)
+    if not image_kind.model.objects.filter(
+        pk=object_id,
+        **{image_kind.field: image.name}
+    ).update(
+        **{image_kind.variants_field: value}
+    ):
+        # The image was replaced while it was being resized.
+        blobs.release(*names)
+        return
+    setattr(instance, image_kind.variants_field, value)
+    instance.save(update_fields=[image_kind.variants_field, 'updated'])
+
+
+def claim():
+    '''Lease the oldest free job, or return None.'''
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = ImageJob.objects.select_for_update(
+            skip_locked=True,
+        ).filter(
+            Q(claimed_at__isnull=True)
+            | Q(claimed_at__lt=now - LEASE_TIMEOUT)
+        )
+        for job in jobs[:10]:
+            if job.attempts >= MAX_ATTEMPTS:
+                logger.error('Image job %s was abandoned.', job)
+                job.delete()
+                continue
+            if ImageJob.objects.filter(
+                pk=job.pk,
+                claimed_at=job.claimed_at,
+            ).update(
+                claimed_at=now,
+                attempts=F('attempts') + 1,
+            ):
+                job.claimed_at = now
+                job.attempts += 1
+                return job
+    return None
+
+
+def process(job):
+    '''Run the leased job; delete it when done or out of attempts,
+    release it for another attempt otherwise.'''
+    leased = ImageJob.objects.filter(pk=job.pk, claimed_at=job.claimed_at)
+    try:
+        resize(job.kind, job.object_id)
+    except Exception:
+        logger.exception('Image job %s failed.', job)
+        if job.attempts < MAX_ATTEMPTS:
+            leased.update(claimed_at=None)
+        else:
+            leased.delete()
+        return False
+    leased.delete()
+    return True
+
+
+def run(once=False, poll_interval=POLL_INTERVAL):
+    '''Process jobs until the queue is empty if once is set,
+    forever otherwise. Return the number of processed jobs.'''
+    processed = 0
+    while True:
+        job = claim()
+        if job is not None:
+            process(job)
+            processed += 1
+        elif once:
+            return processed
+        else:
+            time.sleep(poll_interval)
@@ -0,0 +1,125 @@
+'''Resized variants of uploaded images.
+
+Feeds show images about 400px wide, so every uploaded image is resized
+once to a fixed set of widths and the variants are recorded next to the
+image. Templates and the API serve them as a srcset with explicit
+dimensions instead of the full-size upload.
+
+Variants are rotated according to the EXIF orientation and saved
+as WebP without any metadata. Resizing is done by the process_images
+worker, see image_jobs.'''
+import json
+import os
+from io import BytesIO
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation, ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+from PIL import Image, ImageOps
+
+# Pillow refuses to open images of more than twice this many pixels.
+Image.MAX_IMAGE_PIXELS = settings.MAX_IMAGE_PIXELS
+
+POST_IMAGE_WIDTHS = (400, 800, 1200)
+AVATAR_SIZES = (50, 300)
+WEBP_QUALITY = 80
+VARIANTS_DIR = 'variants'
+ALLOWED_FORMATS = ('JPEG', 'PNG', 'GIF', 'WEBP')
+# Missing, corrupted or not an image at all.
+UNREADABLE_IMAGE_ERRORS = (OSError, ValueError, SuspiciousFileOperation)
+
+
+class Variant(NamedTuple):
+    name: str
+    width: int
+    height: int
+
+    @property
+    def url(self):
+        return default_storage.url(self.name)
+
+
+def load_variants(value):
+    '''Decode variants stored in a text field, smallest first.'''
+    if not value:
+        return []
+    return [Variant(*item) for item in json.loads(value)]
+
+
+def dump_variants(variants):
+    return json.dumps([list(variant) for variant in variants])
+
+
+def srcset(variants):
+    return ', '.join(f'{variant.url} {variant.width}w' for variant in variants)
+
+
+def validate_upload(file):
+    '''Check size, format and dimensions of a new upload reading only
+    the image header: nothing is decoded before the worker resizes
+    an accepted image.'''
+    if not isinstance(file, UploadedFile):
+        return file
+    if file.size > settings.MAX_UPLOAD_SIZE:
+        raise ValidationError(
+            'Файл больше %(size)d МБ.',
+            params={'size': settings.MAX_UPLOAD_SIZE // (1024 * 1024)},
+        )
+    file.seek(0)
+    try:
+        with Image.open(file) as image:
+            image_format = image.format
+            width, height = image.size
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError('Загрузите изображение.')
+    finally:
+        file.seek(0)
+    if image_format not in ALLOWED_FORMATS:
+        raise ValidationError(
+            'Поддерживаются форматы %(formats)s.',
+            params={'formats': ', '.join(ALLOWED_FORMATS)},
+        )
+    if width * height > settings.MAX_IMAGE_PIXELS:
+        raise ValidationError('Изображение слишком большое.')
+    return file
+
+
+def make_variants(image, widths, square=False):
+    '''Save the image resized to each of the widths not exceeding
+    its own width; an image narrower than all of them gets a single
+    re-encoded variant. Square variants are cropped around the center
+    and made of every width.'''
+    image.open('rb')
+    with Image.open(image) as source:
+        original = ImageOps.exif_transpose(source)
+        original.load()
+    image.close()
+    has_alpha = original.mode in ('RGBA', 'LA', 'P')
+    original = original.convert('RGBA' if has_alpha else 'RGB')
+    stem = os.path.splitext(os.path.basename(image.name))[0]
+    directory = os.path.join(os.path.dirname(image.name), VARIANTS_DIR)
+    if square:
+        sizes = list(widths)
+    else:
+        sizes = [width for width in widths if width < original.width]
+        if len(sizes) < len(widths):
+            sizes.append(original.width)
+    variants = []
+    for width in sizes:
+        if square:
+            height = width
+            resized = ImageOps.fit(original, (width, height), Image.LANCZOS)
+        else:
+            height = max(1, round(original.height * width / original.width))
+            resized = original.resize((width, height), Image.LANCZOS)
+        buffer = BytesIO()
+        resized.save(buffer, 'WEBP', quality=WEBP_QUALITY, method=4)
+        name = default_storage.save(
+            os.path.join(directory, f'{stem}_{width}.webp'),
+            ContentFile(buffer.getvalue()),
+        )
+        variants.append(Variant(name, width, height))
+    return variants
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from posts import image_jobs
+
+
+class Command(BaseCommand):
+    help = 'Queue images uploaded before resized variants existed.'
+
+    def handle(self, *args, **options):
+        for kind, image_kind in image_jobs.KINDS.items():
+            pending = image_kind.model.objects.exclude(
+                **{image_kind.field: ''}
+            ).exclude(
+                **{f'{image_kind.field}__isnull': True}
+            ).filter(
+                **{image_kind.variants_field: ''}
+            )
+            queued = 0
+            for object_id in pending.values_list('id', flat=True).iterator():
+                image_jobs.enqueue(kind, object_id)
+                queued += 1
+            self.stdout.write(f'Queued {queued} {kind} images.')
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from posts import image_jobs
+
+
+class Command(BaseCommand):
+    help = 'Resize uploaded images queued by the web workers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit when the queue is empty.',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=image_jobs.POLL_INTERVAL,
+            help='Seconds to wait for new jobs when the queue is empty.',
+        )
+
+    def handle(self, *args, **options):
+        processed = image_jobs.run(
+            once=options['once'],
+            poll_interval=options['poll_interval'],
+        )
+        self.stdout.write(f'Processed {processed} images.')
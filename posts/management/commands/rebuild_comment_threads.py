@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts import threads
+
+
+class Command(BaseCommand):
+    help = 'Recompute the thread paths of all comments.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=threads.BATCH_SIZE,
+            help='Number of comments updated per statement.',
+        )
+
+    def handle(self, *args, **options):
+        updated = threads.rebuild(options['batch_size'])
+        self.stdout.write(f'Updated {updated} comments.')
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts import follow_graph
+
+
+class Command(BaseCommand):
+    help = 'Load the follow graph of all users into the cache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=follow_graph.BATCH_SIZE,
+            help='Number of users cached per request to the cache.',
+        )
+
+    def handle(self, *args, **options):
+        cached = follow_graph.rebuild(options['batch_size'])
+        self.stdout.write(f'Cached follows of {cached} users.')
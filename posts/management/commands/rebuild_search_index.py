@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index of the posts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=search.BATCH_SIZE,
+            help='Number of index rows inserted per statement.',
+        )
+
+    def handle(self, *args, **options):
+        indexed = search.rebuild(options['batch_size'])
+        self.stdout.write(f'Indexed {indexed} posts.')
@@ -0,0 +1,39 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Rebuild materialized subscriptions feeds from the Follow table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'usernames',
+            nargs='*',
+            help='Rebuild only timelines of these users.',
+        )
+        parser.add_argument(
+            '--demoted',
+            action='store_true',
+            help=(
+                'Only backfill posts of authors who fell back under '
+                'TIMELINE_FANOUT_LIMIT followers.'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        if options['demoted']:
+            demoted = timeline.demote_authors()
+            self.stdout.write(f'Fanned out {demoted} authors again.')
+            return
+        users = User.objects.filter(follower__isnull=False).distinct()
+        if options['usernames']:
+            users = User.objects.filter(username__in=options['usernames'])
+        rebuilt = 0
+        for user in users.iterator():
+            timeline.rebuild(user)
+            rebuilt += 1
+        self.stdout.write(f'Rebuilt {rebuilt} timelines.')
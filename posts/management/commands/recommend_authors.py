@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import recommendations
+
+
+class Command(BaseCommand):
+    help = (
+        'Compute who to follow suggestions for the users whose follows '
+        'changed since the previous run, or for all users with --full.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Recompute the suggestions of all users.',
+        )
+        parser.add_argument(
+            '--top-k',
+            type=int,
+            default=recommendations.TOP_K,
+            help='Number of suggestions kept per user.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=recommendations.BATCH_SIZE,
+            help='Number of users computed and saved at once.',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            from posts import recommender
+        except ImportError as error:
+            raise CommandError(f'{error}; install numpy and scipy.')
+        refreshed = recommender.refresh(
+            full=options['full'],
+            top_k=options['top_k'],
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(f'Recommended authors to {refreshed} users.')
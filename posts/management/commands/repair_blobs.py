@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from posts import blobs, image_jobs, images
+
+
+class Command(BaseCommand):
+    help = 'Recount references to the content-addressed media files.'
+
+    def handle(self, *args, **options):
+        names = []
+        for image_kind in image_jobs.KINDS.values():
+            rows = image_kind.model.objects.values_list(
+                image_kind.field,
+                image_kind.variants_field,
+            )
+            for name, variants in rows.iterator():
+                names.append(name)
+                names += [
+                    variant.name for variant in images.load_variants(variants)
+                ]
+        counted = blobs.repair(names)
+        self.stdout.write(f'Files in use: {counted}.')
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute denormalized counters after drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=counters.BATCH_SIZE,
+            help='Number of rows updated by one statement.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        updated = counters.repair_groups(batch_size)
+        self.stdout.write(f'Groups updated: {updated}.')
+        updated = counters.repair_posts(batch_size)
+        self.stdout.write(f'Posts updated: {updated}.')
+        updated = counters.repair_profiles(batch_size)
+        self.stdout.write(f'Profiles updated: {updated}.')
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+
+
+class Command(BaseCommand):
+    help = 'Cut materialized subscriptions feeds to TIMELINE_LENGTH entries.'
+
+    def handle(self, *args, **options):
+        trimmed = timeline.trim_all()
+        self.stdout.write(f'Trimmed {trimmed} timelines.')
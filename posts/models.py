@@ -2,10 +2,29 @@ from django.contrib.auth import get_user_model
 from django.db import models
 from django.urls import reverse
 
+from . import images
+
 User = get_user_model()
 
 
-class Group(models.Model):
+class CountersModel(models.Model):
+    '''Model with denormalized counters maintained by
+    UPDATE ... SET x = x + 1 and never written by save().'''
+    COUNTERS = ()
+
+    class Meta():
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTERS
+            ]
+        super().save(*args, **kwargs)
+
+
+class Group(CountersModel):
     '''Allows to post posts to groups.'''
     title = models.CharField(
         max_length=200,
@@ -27,6 +46,16 @@ class Group(models.Model):
         help_text='Здесь кратко опишите своё сообщество',
         blank=True,
     )
+    post_count = models.PositiveIntegerField(
+        default=0,
+        db_index=True,
+        editable=False,
+        verbose_name='Количество постов',
+    )
+
+    COUNTERS = (
+        'post_count',
+    )
 
     def __str__(self):
         return self.title
@@ -40,7 +69,7 @@ class Group(models.Model):
         )
 
 
-class Post(models.Model):
+class Post(CountersModel):
     '''Stores user blog posts.'''
     text = models.TextField(
         verbose_name='Текст',
@@ -71,13 +100,79 @@ class Post(models.Model):
         null=True,
         verbose_name='Изображение',
     )
+    image_variants = models.TextField(
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name='Уменьшенные копии изображения',
+    )
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Комментариев',
+    )
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения',
+    )
+
+    # image_variants is written only by the worker, see posts.image_jobs.
+    COUNTERS = (
+        'comments_count',
+        'image_variants',
+    )
 
     class Meta():
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=[
+                    '-pub_date',
+                    '-id',
+                ],
+                name='post_pub_date_idx',
+            ),
+            models.Index(
+                fields=[
+                    'group',
+                    '-pub_date',
+                    '-id',
+                ],
+                name='post_group_pub_date_idx',
+            ),
+            models.Index(
+                fields=[
+                    'author',
+                    '-pub_date',
+                    '-id',
+                ],
+                name='post_author_pub_date_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        '''Remember the loaded group to keep group counters
+        correct when the post is moved, and the loaded text and
+        image to reindex and resize only edited posts.'''
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_group_id = instance.__dict__.get('group_id')
+        instance._loaded_text = instance.__dict__.get('text')
+        instance._loaded_image = instance.__dict__.get('image')
+        return instance
+
+    @property
+    def variants(self):
+        '''Resized copies of the image, smallest first.'''
+        return images.load_variants(self.image_variants)
+
+    @property
+    def image_srcset(self):
+        return images.srcset(self.variants)
+
     def get_absolute_url(self):
         return reverse(
             'posts:post',
@@ -88,6 +183,17 @@ class Post(models.Model):
         )
 
 
+def cascade_with_post(collector, field, sub_objs, using):
+    '''CASCADE marking the comments as deleted with their post:
+    their signal handlers skip updating the post counter and pages
+    one comment at a time.'''
+    models.CASCADE(collector, field, sub_objs, using)
+    post_ids = {comment.post_id for comment in sub_objs}
+    for comment in collector.data.get(field.model, ()):
+        if comment.post_id in post_ids:
+            comment.deleted_with_post = True
+
+
 class Comment(models.Model):
     '''Stores user comments.'''
     text = models.TextField(
@@ -96,7 +202,7 @@ class Comment(models.Model):
     )
     post = models.ForeignKey(
         Post,
-        on_delete=models.CASCADE,
+        on_delete=cascade_with_post,
         related_name='comments',
         verbose_name='Пост',
     )
@@ -110,18 +216,61 @@ class Comment(models.Model):
         auto_now_add=True,
         verbose_name='Дата публикации',
     )
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.CASCADE,
+        related_name='replies',
+        blank=True,
+        null=True,
+        verbose_name='Ответ на',
+    )
+    path = models.CharField(
+        max_length=80,  # PATH_SEGMENT_LENGTH * MAX_DEPTH
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name='Путь в ветке',
+    )
+
+    PATH_SEGMENT_LENGTH = 10
+    MAX_DEPTH = 8
 
     class Meta():
         ordering = ['-created']
+        indexes = [
+            models.Index(
+                fields=[
+                    'post',
+                    'path',
+                ],
+                name='comment_post_path_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
+    @property
+    def depth(self):
+        '''Nesting level, 0 for comments on the post itself.'''
+        return max(len(self.path) // self.PATH_SEGMENT_LENGTH - 1, 0)
+
+
+def cascade_with_follower(collector, field, sub_objs, using):
+    '''CASCADE marking the follows as deleted with the follower:
+    their signal handlers do not queue a change for a user who is
+    being deleted.'''
+    models.CASCADE(collector, field, sub_objs, using)
+    user_ids = {follow.user_id for follow in sub_objs}
+    for follow in collector.data.get(field.model, ()):
+        if follow.user_id in user_ids:
+            follow.deleted_with_follower = True
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
         User,
-        on_delete=models.CASCADE,
+        on_delete=cascade_with_follower,
         related_name='follower',
         verbose_name='Подписчик',
     )
@@ -145,3 +294,193 @@ class Follow(models.Model):
 
     def __str__(self):
         return f'{self.user.username} subscribed to {self.following.username}'
+
+
+class TimelineEntry(models.Model):
+    '''Materialized subscriptions feed: one row per post
+    pushed into a follower's timeline.'''
+    owner = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Владелец ленты',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост',
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации',
+    )
+
+    class Meta():
+        ordering = ['-pub_date', '-post']
+        constraints = [
+            models.UniqueConstraint(
+                fields=[
+                    'owner',
+                    'post',
+                ],
+                name='unique_timeline_entry',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=[
+                    'owner',
+                    '-pub_date',
+                ],
+                name='timeline_owner_date_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.post_id} in {self.owner_id} timeline'
+
+
+class PostTerm(models.Model):
+    '''A word of the post text in the inverted search index.'''
+    term = models.CharField(
+        max_length=64,
+        verbose_name='Слово',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='terms',
+        verbose_name='Пост',
+    )
+    count = models.PositiveIntegerField(
+        default=1,
+        verbose_name='Число вхождений',
+    )
+
+    class Meta():
+        constraints = [
+            models.UniqueConstraint(
+                fields=[
+                    'term',
+                    'post',
+                ],
+                name='unique_post_term',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.term} in {self.post_id}'
+
+
+class ImageJob(models.Model):
+    '''An uploaded image waiting for the process_images worker.'''
+    POST = 'post'
+    AVATAR = 'avatar'
+    KIND_CHOICES = (
+        (POST, 'Изображение поста'),
+        (AVATAR, 'Аватар'),
+    )
+
+    kind = models.CharField(
+        max_length=20,
+        choices=KIND_CHOICES,
+        verbose_name='Тип',
+    )
+    object_id = models.PositiveIntegerField(
+        verbose_name='ID объекта',
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток',
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Дата создания',
+    )
+    claimed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Взято в работу',
+    )
+
+    class Meta():
+        ordering = ['created', 'id']
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id}'
+
+
+class MediaBlob(models.Model):
+    '''A file of the content-addressed media storage and the number
+    of post images, avatars and their variants referring to it.'''
+    name = models.CharField(
+        max_length=255,
+        unique=True,
+        verbose_name='Имя файла',
+    )
+    refcount = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число ссылок',
+    )
+
+    def __str__(self):
+        return f'{self.name} ({self.refcount})'
+
+
+class Recommendation(models.Model):
+    '''An author suggested to a user, scored by the number of the
+    authors the user follows who follow them.'''
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommendations',
+        verbose_name='Пользователь',
+    )
+    suggested = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommended_to',
+        verbose_name='Рекомендуемый автор',
+    )
+    score = models.PositiveIntegerField(
+        verbose_name='Общих подписок',
+    )
+
+    class Meta():
+        ordering = ['-score', 'suggested']
+        constraints = [
+            models.UniqueConstraint(
+                fields=[
+                    'user',
+                    'suggested',
+                ],
+                name='unique_recommendation',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=[
+                    'user',
+                    '-score',
+                ],
+                name='recommendation_user_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.suggested_id} for {self.user_id} ({self.score})'
+
+
+class FollowChange(models.Model):
+    '''A user whose follows changed since the recommendations
+    were computed.'''
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follow_changes',
+        verbose_name='Пользователь',
+    )
+
+    def __str__(self):
+        return str(self.user_id)
@@ -0,0 +1,206 @@
+'''Full-page cache for anonymous visitors.
+
+A page is stored under a key made of its full path and the versions
+of the tags it depends on ("post:1", "group:cats", ...). Changing
+a post, comment, group or profile bumps the versions of its tags,
+so pages rendered before the change are never read again.
+
+Only requests without session and messages cookies are served from
+the cache: such a request needs neither the session table nor
+per-visitor rendering, so a hit does not touch the database. Pages
+are stored by PageCacheMiddleware, placed above the session, CSRF
+and messages middleware, so a response setting any of their cookies
+is never stored.
+
+The same versions make the ETag and Last-Modified validators of the
+pages, so a conditional request for an unchanged page is answered
+with 304 before the view runs.'''
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.middleware.csrf import get_token
+from django.utils.cache import (get_conditional_response,
+                                patch_cache_control, patch_vary_headers)
+from django.utils.http import http_date, quote_etag
+
+TAG_KEY = 'pagecache:tag:{}'
+PAGE_KEY = 'pagecache:page:{}'
+SAFE_METHODS = ('GET', 'HEAD')
+
+COMMON_TAGS = (
+    'groups',
+)
+# Tags of the pages of signed in visitors, formatted with their id.
+VISITOR_TAGS = (
+    'follows:{}',
+    'recommendations:{}',
+)
+
+
+def tag_versions(tags):
+    '''Return the current versions of the tags, creating missing ones.'''
+    keys = [TAG_KEY.format(tag) for tag in tags]
+    versions = cache.get_many(keys)
+    missing = {key: time.time() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def invalidate(*tags):
+    '''Make every page depending on any of the tags stale.'''
+    now = time.time()
+    cache.set_many({TAG_KEY.format(tag): now for tag in tags}, None)
+
+
+def is_cacheable_request(request):
+    return (
+        request.method in SAFE_METHODS
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and CookieStorage.cookie_name not in request.COOKIES
+    )
+
+
+def is_cacheable_response(response):
+    return (
+        response.status_code == 200
+        and not response.cookies
+        and not response.streaming
+    )
+
+
+def page_key(request, tags):
+    versions = tag_versions(tags)
+    source = '|'.join(
+        [request.get_full_path()] + [repr(version) for version in versions]
+    )
+    return PAGE_KEY.format(hashlib.md5(source.encode()).hexdigest())
+
+
+def anonymous_cache_page(*tags):
+    '''Cache the view for anonymous visitors; tags are formatted
+    with the view keyword arguments.'''
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not is_cacheable_request(request):
+                return view(request, *args, **kwargs)
+            page_tags = [tag.format(**kwargs) for tag in tags]
+            key = page_key(request, page_tags + list(COMMON_TAGS))
+            response = cache.get(key)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                response.pagecache_key = key
+            return response
+        return wrapper
+    return decorator
+
+
+class PageCacheMiddleware:
+    '''Store the pages rendered by anonymous_cache_page views once
+    the middleware below have set their cookies.'''
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        key = getattr(response, 'pagecache_key', None)
+        if key is not None:
+            del response.pagecache_key
+            if is_cacheable_response(response):
+                cache.set(key, response, settings.ANONYMOUS_CACHE_TIMEOUT)
+        return response
+
+
+def validators(request, tags, per_user=True):
+    '''Return the ETag and the Last-Modified timestamp of a page
+    depending on the tags; None for pages which must be rendered.
+
+    Pages of signed in visitors get an ETag of their own, depending
+    on the VISITOR_TAGS too, and no Last-Modified, which cannot tell
+    visitors apart. Their ETag
+    changes with the session key and the CSRF secret as well: a page
+    kept from before signing in again has a stale CSRF token. The
+    secret is made here if the visitor has none yet, so the first
+    page already sets the cookie the ETag depends on. Last-Modified
+    has one second precision, If-None-Match takes precedence.'''
+    if CookieStorage.cookie_name in request.COOKIES:
+        return None, None
+    tags = list(tags) + list(COMMON_TAGS)
+    visitor = ''
+    if per_user and not is_cacheable_request(request):
+        if request.user.is_authenticated:
+            tags += [tag.format(request.user.pk) for tag in VISITOR_TAGS]
+        session = getattr(request, 'session', None)
+        get_token(request)
+        visitor = ':'.join([
+            str(request.user.pk or ''),
+            getattr(session, 'session_key', None) or '',
+            request.META['CSRF_COOKIE'],
+        ])
+    versions = tag_versions(tags)
+    source = '|'.join([str(visitor)] + [repr(version) for version in versions])
+    etag = hashlib.md5(source.encode()).hexdigest()
+    last_modified = None if visitor else int(max(versions))
+    return etag, last_modified
+
+
+def conditional_response(request, etag, last_modified):
+    '''Return 304 (or 412) when the validators match the request.'''
+    if etag is None or request.method not in SAFE_METHODS:
+        return None
+    return get_conditional_response(
+        request,
+        etag=quote_etag(etag),
+        last_modified=last_modified,
+    )
+
+
+def set_validators(request, response, etag, last_modified):
+    if (
+        etag is None
+        or request.method not in SAFE_METHODS
+        or response.status_code not in (200, 304)
+    ):
+        return response
+    response['ETag'] = quote_etag(etag)
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    # Revalidate on every use instead of guessing a lifetime
+    # from Last-Modified.
+    patch_cache_control(
+        response,
+        no_cache=True,
+        private=last_modified is None,
+    )
+    patch_vary_headers(response, ('Cookie',))
+    return response
+
+
+def conditional_page(*tags):
+    '''Answer conditional requests for the view from the versions
+    of the tags, formatted with the view keyword arguments.'''
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            page_tags = [tag.format(**kwargs) for tag in tags]
+            etag, last_modified = validators(request, page_tags)
+            response = conditional_response(request, etag, last_modified)
+            if response is None:
+                response = view(request, *args, **kwargs)
+            return set_validators(request, response, etag, last_modified)
+        return wrapper
+    return decorator
+
+
+def tagged_page(*tags):
+    '''Validators for every visitor and the full-page cache for
+    anonymous ones.'''
+    def decorator(view):
+        return conditional_page(*tags)(anonymous_cache_page(*tags)(view))
+    return decorator
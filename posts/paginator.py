@@ -0,0 +1,181 @@
+import json
+import math
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from numbers import Real
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import is_naive
+
+# Integer keys beyond the range of a 64-bit column fail in the query.
+MAX_INTEGER = 2 ** 63 - 1
+NEXT = 'next'
+PREVIOUS = 'previous'
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(direction, keys):
+    values = [
+        value.isoformat() if isinstance(value, datetime) else value
+        for value in keys
+    ]
+    payload = json.dumps([direction, values], separators=(',', ':'))
+    return urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_key(value):
+    '''Return a key of the cursor: a finite number, an aware datetime
+    or a string; raise ValueError for anything else.'''
+    if isinstance(value, Real) and not isinstance(value, bool):
+        if not math.isfinite(value) or (
+            isinstance(value, int) and abs(value) > MAX_INTEGER
+        ):
+            raise ValueError(value)
+        return value
+    if not isinstance(value, str):
+        raise ValueError(value)
+    moment = parse_datetime(value)
+    if moment is None:
+        return value
+    if is_naive(moment):
+        raise ValueError(value)
+    return moment
+
+
+def decode_cursor(cursor):
+    try:
+        payload = urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        direction, values = json.loads(payload)
+        if not isinstance(values, list):
+            raise InvalidCursor(cursor)
+        keys = tuple(decode_key(value) for value in values)
+    except (TypeError, ValueError, OverflowError):
+        raise InvalidCursor(cursor)
+    if direction not in (NEXT, PREVIOUS):
+        raise InvalidCursor(cursor)
+    return direction, keys
+
+
+class CursorPaginator(Paginator):
+    '''Keyset pagination: a page is addressed by an opaque cursor with
+    the ordering key of its neighbour, so neither COUNT(*) nor OFFSET
+    is ever issued.
+
+    object_list is either a queryset or a list of key tuples sorted
+    in descending order.'''
+    def __init__(self, object_list, per_page, ordering=('pub_date', 'id')):
+        super().__init__(object_list, per_page)
+        self.ordering = ordering
+        self._num_pages = 1
+
+    @property
+    def num_pages(self):
+        return self._num_pages
+
+    def get_page(self, cursor):
+        '''Return a page for the cursor; start from the newest
+        objects if the cursor is missing or invalid.'''
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page(None)
+
+    def page(self, cursor):
+        direction, keys = NEXT, None
+        if cursor:
+            direction, keys = decode_cursor(cursor)
+            keys = self._clean_keys(cursor, keys)
+        items = self._fetch(direction, keys)
+        has_more = len(items) > self.per_page
+        items = items[:self.per_page]
+        if direction == PREVIOUS:
+            items.reverse()
+            has_previous, has_next = has_more, True
+        else:
+            has_previous, has_next = keys is not None, has_more
+        number = 2 if has_previous else 1
+        self._num_pages = number + 1 if has_next else number
+        page = self._get_page(items, number, self)
+        page.next_cursor = None
+        page.previous_cursor = None
+        if items and has_next:
+            page.next_cursor = encode_cursor(NEXT, self._keys(items[-1]))
+        if items and has_previous:
+            page.previous_cursor = encode_cursor(
+                PREVIOUS,
+                self._keys(items[0]),
+            )
+        return page
+
+    def _clean_keys(self, cursor, keys):
+        '''Return the keys converted to the types of the ordering
+        fields, raise InvalidCursor if they do not fit.'''
+        if len(keys) != len(self.ordering):
+            raise InvalidCursor(cursor)
+        if not isinstance(self.object_list, QuerySet):
+            sample = self.object_list[0] if self.object_list else keys
+            for key, value in zip(keys, sample):
+                numeric = isinstance(value, Real)
+                if numeric != isinstance(key, Real) or (
+                    not numeric and type(key) is not type(value)
+                ):
+                    raise InvalidCursor(cursor)
+            return keys
+        query = self.object_list.query
+        try:
+            return tuple(
+                self._field(query, field).to_python(key)
+                for field, key in zip(self.ordering, keys)
+            )
+        except (FieldDoesNotExist, ValidationError, OverflowError):
+            raise InvalidCursor(cursor)
+
+    def _field(self, query, name):
+        if name in query.annotations:
+            return query.annotations[name].output_field
+        return query.model._meta.get_field(name)
+
+    def _keys(self, item):
+        if isinstance(item, tuple):
+            return item
+        return tuple(getattr(item, field) for field in self.ordering)
+
+    def _fetch(self, direction, keys):
+        '''Return up to per_page + 1 objects after the keys, the nearest
+        objects first.'''
+        limit = self.per_page + 1
+        if not isinstance(self.object_list, QuerySet):
+            if keys is None:
+                return list(self.object_list[:limit])
+            if direction == NEXT:
+                return [
+                    item for item in self.object_list if item < keys
+                ][:limit]
+            return [
+                item for item in self.object_list if item > keys
+            ][::-1][:limit]
+        queryset = self.object_list
+        if keys is not None:
+            lookup = 'lt' if direction == NEXT else 'gt'
+            queryset = queryset.filter(self._keyset_filter(keys, lookup))
+        if direction == NEXT:
+            ordering = [f'-{field}' for field in self.ordering]
+        else:
+            ordering = list(self.ordering)
+        return list(queryset.order_by(*ordering)[:limit])
+
+    def _keyset_filter(self, keys, lookup):
+        '''Build (a, b) < (x, y) as a < x OR (a = x AND b < y).'''
+        condition = Q()
+        for position, field in enumerate(self.ordering):
+            term = Q(**{f'{field}__{lookup}': keys[position]})
+            for previous, value in zip(self.ordering[:position], keys):
+                term &= Q(**{previous: value})
+            condition |= term
+        return condition
@@ -0,0 +1,56 @@
+'''Who to follow.
+
+Users are suggested the authors followed by the authors they follow,
+best first. The suggestions are computed offline by the
+recommend_authors command (see recommender) and read with one lookup
+through the (user, score) index; follow changes only mark the user for
+the next incremental run, and authors followed since then are left out
+of the sidebar by the cached follow graph.
+
+Pages showing the suggestions depend on the "recommendations:<user id>"
+page cache tag, changed when the suggestions of the user are saved.'''
+from . import follow_graph, pagecache
+from .models import FollowChange, Recommendation
+
+BATCH_SIZE = 1000
+TOP_K = 20
+SIDEBAR_SIZE = 5
+
+
+def suggestions(user, limit=TOP_K):
+    return Recommendation.objects.filter(
+        user=user,
+    ).select_related(
+        'suggested',
+    )[:limit]
+
+
+def unfollowed_suggestions(user, limit):
+    '''Suggestions of authors the user does not follow yet.'''
+    best = list(suggestions(user))
+    followed = follow_graph.following_among(
+        user.pk,
+        [recommendation.suggested_id for recommendation in best],
+    )
+    return [
+        recommendation for recommendation in best
+        if recommendation.suggested_id not in followed
+    ][:limit]
+
+
+def suggestions_changed(user_ids):
+    pagecache.invalidate(
+        *(f'recommendations:{user_id}' for user_id in user_ids)
+    )
+
+
+def follows_changed(follows):
+    '''Mark the followers for the next refresh, except the ones
+    being deleted.'''
+    FollowChange.objects.bulk_create([
+        FollowChange(user_id=user_id)
+        for user_id in {
+            follow.user_id for follow in follows
+            if not getattr(follow, 'deleted_with_follower', False)
+        }
+    ])
@@ -0,0 +1,139 @@
+'''Friend-of-friend recommendations over the follow graph.
+
+The follows are loaded into a sparse CSR adjacency matrix A, where
+A[u, v] = 1 when u follows v. Row u of A @ A counts for every author the
+authors followed by u who follow them; the best scored ones which u
+neither is nor follows are its suggestions. The product is computed for
+batches of rows, so only a slice of it is in memory at once.
+
+An incremental refresh recomputes only the users whose follows changed
+since the previous run and their followers, the only users whose two
+hop neighbourhood could have changed.
+
+Requires NumPy and SciPy.'''
+from itertools import chain
+
+import numpy as np
+from django.db import connection, transaction
+from django.db.models import Max
+from scipy import sparse
+
+from .models import Follow, FollowChange, Recommendation
+from .recommendations import BATCH_SIZE, TOP_K, suggestions_changed
+
+
+class FollowGraph:
+    '''Follows as a CSR matrix over dense indices of the user ids.'''
+
+    def __init__(self, batch_size=BATCH_SIZE):
+        rows = Follow.objects.values_list('user_id', 'following_id')
+        edges = np.fromiter(
+            chain.from_iterable(rows.iterator(chunk_size=batch_size)),
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        self.ids = np.unique(edges)
+        size = len(self.ids)
+        self.follows = sparse.csr_matrix(
+            (
+                np.ones(len(edges), dtype=np.int32),
+                (
+                    np.searchsorted(self.ids, edges[:, 0]),
+                    np.searchsorted(self.ids, edges[:, 1]),
+                ),
+            ),
+            shape=(size, size),
+        )
+        self.followed_by = self.follows.tocsc()
+
+    def indices(self, user_ids):
+        '''Matrix indices of the users, skipping users not in the graph.'''
+        user_ids = np.asarray(sorted(user_ids), dtype=np.int64)
+        if not len(self.ids) or not len(user_ids):
+            return np.array([], dtype=np.int64)
+        positions = np.searchsorted(self.ids, user_ids)
+        positions[positions == len(self.ids)] = 0
+        return positions[self.ids[positions] == user_ids]
+
+    def with_followers(self, indices):
+        return np.union1d(indices, self.followed_by[:, indices].indices)
+
+    def suggest(self, indices, top_k):
+        '''Yield the user id and its best (author id, score) pairs
+        for each of the indices.'''
+        follows = self.follows[indices]
+        paths = follows @ self.follows
+        own = sparse.csr_matrix(
+            (
+                np.ones(len(indices), dtype=np.int32),
+                (np.arange(len(indices)), indices),
+            ),
+            shape=paths.shape,
+        )
+        # Drop the authors already followed and the users themselves.
+        paths = paths - paths.multiply((follows + own).astype(bool))
+        paths.eliminate_zeros()
+        for row, index in enumerate(indices):
+            start, end = paths.indptr[row], paths.indptr[row + 1]
+            authors = self.ids[paths.indices[start:end]]
+            scores = paths.data[start:end]
+            best = np.lexsort((authors, -scores))[:top_k]
+            yield int(self.ids[index]), zip(
+                authors[best].tolist(),
+                scores[best].tolist(),
+            )
+
+
+def insert(rows):
+    '''Insert (user id, author id, score) rows with one executemany
+    call: building millions of model instances for bulk_create takes
+    far longer than computing them.'''
+    quote = connection.ops.quote_name
+    meta = Recommendation._meta
+    columns = ', '.join(
+        quote(meta.get_field(name).column)
+        for name in ('user', 'suggested', 'score')
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {quote(meta.db_table)} ({columns}) '
+            'VALUES (%s, %s, %s)',
+            rows,
+        )
+
+
+def save(user_ids, suggestions):
+    '''Replace the recommendations of the users.'''
+    rows = [
+        (user_id, suggested_id, score)
+        for user_id, best in suggestions
+        for suggested_id, score in best
+    ]
+    with transaction.atomic():
+        Recommendation.objects.filter(user_id__in=user_ids).delete()
+        insert(rows)
+    suggestions_changed(user_ids)
+
+
+def refresh(full=False, top_k=TOP_K, batch_size=BATCH_SIZE):
+    '''Recompute the recommendations of all users, or of the users
+    affected by the follows changed since the previous run; return
+    the number of users processed.'''
+    last_change = FollowChange.objects.aggregate(last=Max('pk'))['last']
+    changes = FollowChange.objects.filter(pk__lte=last_change or 0)
+    graph = FollowGraph(batch_size)
+    if full:
+        indices = np.arange(len(graph.ids))
+    else:
+        changed = changes.values_list('user_id', flat=True).distinct()
+        indices = graph.with_followers(graph.indices(changed))
+    # Users who follow nobody any more have nothing to suggest.
+    stale = Recommendation.objects.exclude(
+        user__in=Follow.objects.values('user'),
+    )
+    suggestions_changed(set(stale.values_list('user_id', flat=True)))
+    stale.delete()
+    for start in range(0, len(indices), batch_size):
+        batch = indices[start:start + batch_size]
+        save(graph.ids[batch].tolist(), graph.suggest(batch, top_k))
+    changes.delete()
+    return len(indices)
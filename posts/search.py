@@ -0,0 +1,145 @@
+'''Full-text search over the posts.
+
+Post texts are split into lowercase words kept in the PostTerm table,
+an inverted index with one row per word and post. The index is updated
+when a post is saved, and a query reads only the rows of its own words
+through the (term, post) index instead of scanning every post text.
+
+Posts containing all words of the query are ranked by the total
+number of occurrences of those words. The candidates are taken from
+the postings of the rarest word, the newest MAX_CANDIDATES of them,
+and only their rows of the other words are read: a query mixing
+a common word with a rare one costs as little as the rare one.
+Word frequencies are counted once and cached for TERM_COUNT_TIMEOUT.'''
+import re
+from collections import Counter
+
+from django.core.cache import cache
+from django.db.models import Count, Sum
+
+from .models import Post, PostTerm
+
+BATCH_SIZE = 1000
+MAX_QUERY_TERMS = 10
+MAX_CANDIDATES = 10000
+TERM_COUNT_TIMEOUT = 60 * 60
+MIN_TERM_LENGTH = 2
+TERM_MAX_LENGTH = PostTerm._meta.get_field('term').max_length
+WORD_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    '''Split the text into lowercase words suitable for the index.'''
+    return [
+        word[:TERM_MAX_LENGTH]
+        for word in WORD_RE.findall(text.lower().replace('ё', 'е'))
+        if len(word) >= MIN_TERM_LENGTH
+    ]
+
+
+def index_post(post):
+    '''Replace the index rows of the post; skip posts whose text
+    has not changed since they were loaded.'''
+    if getattr(post, '_loaded_text', None) == post.text:
+        return
+    PostTerm.objects.filter(post=post).delete()
+    PostTerm.objects.bulk_create(
+        [
+            PostTerm(term=term, post=post, count=count)
+            for term, count in Counter(tokenize(post.text)).items()
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    post._loaded_text = post.text
+
+
+def index_new_posts(posts, batch_size=BATCH_SIZE):
+    '''Index posts which have no index rows yet.'''
+    PostTerm.objects.bulk_create(
+        (
+            PostTerm(term=term, post_id=post.pk, count=count)
+            for post in posts
+            for term, count in Counter(tokenize(post.text)).items()
+        ),
+        batch_size=batch_size,
+    )
+    for post in posts:
+        post._loaded_text = post.text
+
+
+def rebuild(batch_size=BATCH_SIZE):
+    '''Reindex all posts.'''
+    PostTerm.objects.all().delete()
+    indexed = 0
+    terms = []
+    posts = Post.objects.only('id', 'text').order_by('id')
+    for post in posts.iterator(chunk_size=batch_size):
+        terms += [
+            PostTerm(term=term, post_id=post.id, count=count)
+            for term, count in Counter(tokenize(post.text)).items()
+        ]
+        if len(terms) >= batch_size:
+            PostTerm.objects.bulk_create(terms, batch_size=batch_size)
+            terms = []
+        indexed += 1
+    PostTerm.objects.bulk_create(terms, batch_size=batch_size)
+    return indexed
+
+
+def query_terms(query):
+    return list(dict.fromkeys(tokenize(query or '')))[:MAX_QUERY_TERMS]
+
+
+def term_counts(terms):
+    '''Number of posts containing each of the terms.'''
+    keys = {f'search:term:{term}': term for term in terms}
+    counts = {
+        keys[key]: count for key, count in cache.get_many(keys).items()
+    }
+    missing = [term for term in terms if term not in counts]
+    if missing:
+        found = dict.fromkeys(missing, 0)
+        found.update(
+            PostTerm.objects.filter(
+                term__in=missing,
+            ).order_by().values_list(
+                'term',
+            ).annotate(
+                Count('id'),
+            )
+        )
+        cache.set_many(
+            {f'search:term:{term}': count for term, count in found.items()},
+            TERM_COUNT_TIMEOUT,
+        )
+        counts.update(found)
+    return counts
+
+
+def search(query):
+    '''Return posts containing every word of the query, annotated
+    with their score; to be ordered by (score, id).'''
+    terms = query_terms(query)
+    queryset = Post.objects.filter(
+        terms__term__in=terms,
+    ).annotate(
+        score=Sum('terms__count'),
+        matched=Count('terms'),
+    ).filter(
+        matched=len(terms),
+    ).select_related(
+        'author',
+        'group',
+        'author__profile',
+    )
+    if not terms:
+        return queryset.none()
+    counts = term_counts(terms)
+    candidates = PostTerm.objects.filter(
+        term=min(terms, key=counts.get),
+    ).order_by(
+        '-post_id',
+    ).values(
+        'post_id',
+    )[:MAX_CANDIDATES]
+    return queryset.filter(pk__in=candidates)
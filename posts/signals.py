@@ -0,0 +1,135 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from users.models import UserProfile
+
+from . import (counters, follow_graph, image_jobs, pagecache, recommendations,
+               search, threads, timeline)
+from .models import Comment, Follow, Group, ImageJob, Post
+
+
+def post_tags(post):
+    '''Page cache tags of the pages showing the post.'''
+    tags = [
+        'posts',
+        f'post:{post.pk}',
+        f'user:{post.author.username}',
+    ]
+    group_ids = {post.group_id, getattr(post, '_loaded_group_id', None)}
+    group_ids.discard(None)
+    if group_ids:
+        tags += [
+            f'group:{slug}' for slug in Group.objects.filter(
+                pk__in=group_ids,
+            ).values_list(
+                'slug',
+                flat=True,
+            )
+        ]
+    return tags
+
+
+def group_count_changed(post, created):
+    '''Whether saving the post changes the post count of a group,
+    shown on every page.'''
+    if created:
+        return post.group_id is not None
+    return getattr(post, '_loaded_group_id', post.group_id) != post.group_id
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, raw, **kwargs):
+    '''Push a new post into the followers timelines.'''
+    if created and not raw:
+        timeline.push_post(instance)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw, **kwargs):
+    if not raw:
+        tags = post_tags(instance)
+        if group_count_changed(instance, created):
+            tags.append('groups')
+        pagecache.invalidate(*tags)
+        counters.post_saved(instance, created)
+        if created:
+            search.index_new_posts([instance])
+        else:
+            search.index_post(instance)
+        image_jobs.image_saved(ImageJob.POST, instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    tags = post_tags(instance)
+    if instance.group_id is not None:
+        tags.append('groups')
+    pagecache.invalidate(*tags)
+    timeline.forget_recent_posts(instance.author_id)
+    counters.post_deleted(instance)
+    image_jobs.image_deleted(ImageJob.POST, instance)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        threads.place([instance])
+        counters.comment_changed(instance, 1)
+    if not raw:
+        pagecache.invalidate(*post_tags(instance.post))
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    if getattr(instance, 'deleted_with_post', False):
+        return
+    counters.comment_changed(instance, -1)
+    post = Post.objects.select_related('author').filter(
+        pk=instance.post_id,
+    ).first()
+    if post is not None:
+        pagecache.invalidate(*post_tags(post))
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        counters.follow_changed(instance, 1)
+        follow_graph.followed([instance])
+        recommendations.follows_changed([instance])
+        timeline.add_author(instance)
+        pagecache.invalidate(
+            f'user:{instance.user.username}',
+            f'user:{instance.following.username}',
+        )
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.follow_changed(instance, -1)
+    follow_graph.unfollowed([instance])
+    recommendations.follows_changed([instance])
+    timeline.remove_author(instance)
+    pagecache.invalidate(
+        f'user:{instance.user.username}',
+        f'user:{instance.following.username}',
+    )
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        pagecache.invalidate('groups', f'group:{instance.slug}')
+
+
+@receiver(post_save, sender=UserProfile)
+def profile_changed(sender, instance, created, raw, **kwargs):
+    if not created and not raw:
+        pagecache.invalidate('authors', f'user:{instance.user.username}')
+    if not raw:
+        image_jobs.image_saved(ImageJob.AVATAR, instance)
+
+
+@receiver(post_delete, sender=UserProfile)
+def profile_deleted(sender, instance, **kwargs):
+    image_jobs.image_deleted(ImageJob.AVATAR, instance)
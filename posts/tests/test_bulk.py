@@ -0,0 +1,116 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from .. import bulk, search, timeline
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class BulkTests(TestCase):
+    '''Check objects inserted without signals are accounted for.
+
+    SQLite cannot return primary keys of bulk inserted rows, so the
+    rows are inserted and read back the way bulk.create does it on
+    other backends.'''
+    @classmethod
+    def setUpClass(cls):
+        '''Create test objects in db.'''
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            'author',
+            password='dfltusrpsswrd',
+        )
+        cls.follower = User.objects.create_user(
+            'follower',
+            password='dfltusrpsswrd',
+        )
+        cls.group = Group.objects.create(
+            title='Название группы',
+            slug='test_group',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def insert(self, model, objects):
+        model.objects.bulk_create(objects)
+        return list(model.objects.order_by('pk'))
+
+    def test_posts_created(self):
+        '''Check counters, search index and feeds of inserted posts.'''
+        Follow.objects.create(
+            user=BulkTests.follower,
+            following=BulkTests.author,
+        )
+        posts = self.insert(Post, [
+            Post(text='Первый пост', author=BulkTests.author),
+            Post(
+                text='Второй пост',
+                author=BulkTests.author,
+                group=BulkTests.group,
+            ),
+        ])
+        bulk.posts_created(posts)
+        BulkTests.group.refresh_from_db()
+        self.assertEqual(BulkTests.group.post_count, 1)
+        self.assertEqual(
+            User.objects.get(pk=BulkTests.author.pk).profile.posts_count,
+            2,
+        )
+        self.assertEqual(
+            list(search.search('пост').order_by('id')),
+            posts,
+        )
+        self.assertEqual(
+            timeline.post_ids(BulkTests.follower),
+            [posts[1].pk, posts[0].pk],
+        )
+
+    def test_comments_created(self):
+        '''Check comment counters of inserted comments.'''
+        post = Post.objects.create(
+            text='Тело поста',
+            author=BulkTests.author,
+        )
+        comments = self.insert(Comment, [
+            Comment(text='Коммент', author=BulkTests.follower, post=post)
+            for _ in range(3)
+        ])
+        bulk.comments_created(comments)
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 3)
+
+    def test_follows_created(self):
+        '''Check profile counters and feeds of inserted follows.'''
+        post = Post.objects.create(
+            text='Тело поста',
+            author=BulkTests.author,
+        )
+        timeline.rebuild(BulkTests.follower)
+        follows = self.insert(Follow, [
+            Follow(user=BulkTests.follower, following=BulkTests.author),
+        ])
+        bulk.follows_created(follows)
+        profiles = {
+            user.username: user.profile
+            for user in User.objects.select_related('profile')
+        }
+        self.assertEqual(profiles['author'].followers_count, 1)
+        self.assertEqual(profiles['follower'].following_count, 1)
+        self.assertEqual(timeline.post_ids(BulkTests.follower), [post.pk])
+
+    def test_create_saves_one_by_one_on_sqlite(self):
+        '''Check objects are saved with signals when primary keys
+        of bulk inserted rows are not returned.'''
+        if bulk.can_bulk_insert():
+            self.skipTest('Backend returns ids of bulk inserted rows.')
+        posts = bulk.create_posts([
+            Post(text='Пост', author=BulkTests.author),
+        ])
+        self.assertIsNotNone(posts[0].pk)
+        self.assertEqual(
+            User.objects.get(pk=BulkTests.author.pk).profile.posts_count,
+            1,
+        )
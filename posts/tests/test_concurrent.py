@@ -0,0 +1,66 @@
+import threading
+from contextvars import ContextVar
+
+from django.test import TestCase, TransactionTestCase
+
+from ..concurrent import gather
+
+
+request_id = ContextVar('request_id', default=None)
+
+
+def thread_name():
+    return threading.current_thread().name
+
+
+class GatherTests(TransactionTestCase):
+    '''Check concurrent calls of independent functions.
+
+    Pooled threads keep connections opened by earlier tests and check
+    them before each call, so database access must be allowed.'''
+    def test_results_in_order(self):
+        '''Check results come in order and every function but
+        the first runs in another thread.'''
+        barrier = threading.Barrier(3, timeout=5)
+
+        def wait(value):
+            barrier.wait()
+            return value, thread_name()
+
+        results = gather(
+            lambda: wait(1),
+            lambda: wait(2),
+            lambda: wait(3),
+        )
+        self.assertEqual([value for value, name in results], [1, 2, 3])
+        self.assertEqual(results[0][1], thread_name())
+        self.assertEqual(len({name for value, name in results}), 3)
+
+    def test_exception(self):
+        '''Check an exception from any function reaches the caller.'''
+        def fail():
+            raise LookupError
+
+        with self.assertRaises(LookupError):
+            gather(lambda: None, fail)
+
+    def test_context_passed(self):
+        '''Check functions see the caller's context variables.'''
+        token = request_id.set(42)
+        try:
+            self.assertEqual(
+                gather(request_id.get, request_id.get),
+                [42, 42],
+            )
+        finally:
+            request_id.reset(token)
+
+
+class GatherInTransactionTests(TestCase):
+    def test_sequential_in_transaction(self):
+        '''Check functions run in the calling thread inside
+        a transaction.'''
+        self.assertEqual(
+            gather(thread_name, thread_name),
+            [thread_name(), thread_name()],
+        )
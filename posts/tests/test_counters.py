@@ -0,0 +1,233 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.test import TestCase
+from users.models import UserProfile
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+    '''Check denormalized counters are kept correct.'''
+    @classmethod
+    def setUpClass(cls):
+        '''Create test objects in db.'''
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            'user_name',
+            password='dfltusrpsswrd',
+        )
+        cls.group = Group.objects.create(
+            title='Название группы',
+            slug='test_group',
+        )
+        cls.one_more_group = Group.objects.create(
+            title='Название дополнительной группы',
+            slug='test_one_more_group',
+        )
+
+    def post_counts(self):
+        return dict(Group.objects.values_list('slug', 'post_count'))
+
+    def test_group_post_count(self):
+        '''Check group counters follow creating, moving and deleting
+        posts.'''
+        post = Post.objects.create(
+            text='Тело поста',
+            author=CountersTests.user,
+            group=CountersTests.group,
+        )
+        self.assertEqual(
+            self.post_counts(),
+            {'test_group': 1, 'test_one_more_group': 0},
+        )
+        post = Post.objects.get(pk=post.pk)
+        post.group = CountersTests.one_more_group
+        post.save()
+        self.assertEqual(
+            self.post_counts(),
+            {'test_group': 0, 'test_one_more_group': 1},
+        )
+        post.delete()
+        self.assertEqual(
+            self.post_counts(),
+            {'test_group': 0, 'test_one_more_group': 0},
+        )
+
+    def test_repair_counters(self):
+        '''Check the repair command recomputes drifted counters.'''
+        Post.objects.bulk_create([
+            Post(
+                text=f'Тело поста {i}',
+                author=CountersTests.user,
+                group=CountersTests.one_more_group,
+            ) for i in range(3)
+        ])
+        call_command('repair_counters', stdout=StringIO())
+        self.assertEqual(
+            self.post_counts(),
+            {'test_group': 0, 'test_one_more_group': 3},
+        )
+
+    def test_group_post_count_not_negative(self):
+        '''Check deleting a post missing from a drifted counter
+        leaves it at zero.'''
+        post = Post.objects.create(
+            text='Тело поста',
+            author=CountersTests.user,
+            group=CountersTests.group,
+        )
+        Group.objects.update(post_count=0)
+        post.delete()
+        self.assertEqual(
+            self.post_counts(),
+            {'test_group': 0, 'test_one_more_group': 0},
+        )
+
+    def test_profile_counters(self):
+        '''Check profile counters follow posts and subscriptions.'''
+        follower = User.objects.create_user(
+            'follower',
+            password='dfltusrpsswrd',
+        )
+        subscription = Follow.objects.create(
+            user=follower,
+            following=CountersTests.user,
+        )
+        post = Post.objects.create(
+            text='Тело поста',
+            author=CountersTests.user,
+        )
+        author_profile = UserProfile.objects.get(user=CountersTests.user)
+        follower_profile = UserProfile.objects.get(user=follower)
+        self.assertEqual(author_profile.followers_count, 1)
+        self.assertEqual(author_profile.posts_count, 1)
+        self.assertEqual(follower_profile.following_count, 1)
+        author_profile.status = 'Новый статус'
+        subscription.delete()
+        post.delete()
+        author_profile.save()
+        author_profile.refresh_from_db()
+        self.assertEqual(author_profile.followers_count, 0)
+        self.assertEqual(author_profile.posts_count, 0)
+        self.assertEqual(author_profile.status, 'Новый статус')
+
+    def test_profile_counters_not_negative(self):
+        '''Check unfollowing with drifted profile counters leaves
+        them at zero.'''
+        follower = User.objects.create_user(
+            'follower',
+            password='dfltusrpsswrd',
+        )
+        subscription = Follow.objects.create(
+            user=follower,
+            following=CountersTests.user,
+        )
+        UserProfile.objects.update(followers_count=0, following_count=0)
+        subscription.delete()
+        self.assertEqual(
+            set(UserProfile.objects.values_list(
+                'followers_count',
+                'following_count',
+            )),
+            {(0, 0)},
+        )
+
+    def test_repair_creates_missing_profiles(self):
+        '''Check the repair command creates profiles with counters.'''
+        Post.objects.create(
+            text='Тело поста',
+            author=CountersTests.user,
+        )
+        UserProfile.objects.all().delete()
+        call_command('repair_counters', stdout=StringIO())
+        self.assertEqual(
+            UserProfile.objects.get(user=CountersTests.user).posts_count,
+            1,
+        )
+
+    def test_post_comments_count(self):
+        '''Check comment counters and that editing a post does not
+        overwrite them.'''
+        post = Post.objects.create(
+            text='Тело поста',
+            author=CountersTests.user,
+        )
+        comment = Comment.objects.create(
+            text='Комментарий',
+            author=CountersTests.user,
+            post=post,
+        )
+        Comment.objects.create(
+            text='Ещё комментарий',
+            author=CountersTests.user,
+            post=post,
+        )
+        post.text = 'Изменённый текст'
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 2)
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        Post.objects.filter(pk=post.pk).update(comments_count=10)
+        call_command(
+            'repair_counters',
+            batch_size=1,
+            stdout=StringIO(),
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+
+    def test_post_comments_count_not_negative(self):
+        '''Check deleting a comment with a drifted counter leaves it
+        at zero.'''
+        post = Post.objects.create(
+            text='Тело поста',
+            author=CountersTests.user,
+        )
+        comment = Comment.objects.create(
+            text='Комментарий',
+            author=CountersTests.user,
+            post=post,
+        )
+        Post.objects.filter(pk=post.pk).update(comments_count=0)
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+
+    def test_post_delete_rolled_back(self):
+        '''Check comments deleted after a rolled back deletion
+        of their post still update its counter.'''
+        post = Post.objects.create(
+            text='Тестовый текст',
+            author=CountersTests.user,
+        )
+        comments = [
+            Comment.objects.create(
+                text='Комментарий',
+                author=CountersTests.user,
+                post=post,
+            )
+            for _ in range(2)
+        ]
+
+        def fail(**kwargs):
+            raise RuntimeError
+
+        post_delete.connect(fail, sender=Comment)
+        try:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                Post.objects.get(pk=post.pk).delete()
+        finally:
+            post_delete.disconnect(fail, sender=Comment)
+        comments[0].delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        post.delete()
+        self.assertFalse(Comment.objects.filter(pk=comments[1].pk).exists())
@@ -0,0 +1,118 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+
+from .. import bulk, follow_graph
+from ..models import Follow, FollowChange, Post
+
+User = get_user_model()
+
+
+class FollowGraphTests(TestCase):
+    '''Check the cached follow graph follows the Follow table.'''
+    @classmethod
+    def setUpClass(cls):
+        '''Create test objects in db.'''
+        super().setUpClass()
+        cls.follower = User.objects.create_user(
+            'follower',
+            password='dfltusrpsswrd',
+        )
+        cls.authors = [
+            User.objects.create_user(
+                f'author_{number}',
+                password='dfltusrpsswrd',
+            )
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def follow(self, author):
+        return Follow.objects.create(
+            user=FollowGraphTests.follower,
+            following=author,
+        )
+
+    def test_updates(self):
+        '''Подписки и отписки меняют закэшированный массив без запросов.'''
+        follower = FollowGraphTests.follower
+        first, second, third = FollowGraphTests.authors
+        self.assertEqual(follow_graph.following_count(follower.pk), 0)
+        self.follow(third)
+        subscription = self.follow(first)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                list(follow_graph.following_ids(follower.pk)),
+                [first.pk, third.pk],
+            )
+            self.assertTrue(follow_graph.is_following(follower.pk, first.pk))
+            self.assertFalse(follow_graph.is_following(follower.pk, second.pk))
+        subscription.delete()
+        self.assertEqual(
+            follow_graph.following_among(
+                follower.pk,
+                [first.pk, second.pk, third.pk],
+            ),
+            {third.pk},
+        )
+
+    def test_bulk_and_rebuild(self):
+        '''Массовые подписки и команда восстановления дают тот же граф.'''
+        follower = FollowGraphTests.follower
+        follow_graph.following_ids(follower.pk)
+        follows = [
+            Follow(user=follower, following=author)
+            for author in FollowGraphTests.authors
+        ]
+        Follow.objects.bulk_create(follows)
+        bulk.follows_created(follows)
+        expected = sorted(author.pk for author in FollowGraphTests.authors)
+        self.assertEqual(
+            list(follow_graph.following_ids(follower.pk)),
+            expected,
+        )
+        cache.clear()
+        self.assertEqual(
+            follow_graph.rebuild(batch_size=1),
+            User.objects.count(),
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                list(follow_graph.following_ids(follower.pk)),
+                expected,
+            )
+            self.assertEqual(
+                follow_graph.following_count(FollowGraphTests.authors[0].pk),
+                0,
+            )
+
+    def test_mark_followed(self):
+        '''Посты отмечаются одной проверкой на всю страницу.'''
+        first, second, _ = FollowGraphTests.authors
+        self.follow(first)
+        follow_graph.following_ids(FollowGraphTests.follower.pk)
+        posts = [
+            Post.objects.create(text='Первый', author=first),
+            Post.objects.create(text='Второй', author=second),
+        ]
+        with self.assertNumQueries(0):
+            follow_graph.mark_followed(FollowGraphTests.follower, posts)
+        self.assertEqual(
+            [post.followed_author for post in posts],
+            [True, False],
+        )
+
+    def test_delete_follower(self):
+        '''Check a user who follows someone can be deleted.'''
+        follower = User.objects.create_user('leaving')
+        Follow.objects.create(
+            user=follower,
+            following=FollowGraphTests.authors[0],
+        )
+        FollowChange.objects.all().delete()
+        follower.delete()
+        connection.check_constraints()
+        self.assertFalse(FollowChange.objects.exists())
@@ -84,8 +84,10 @@ class CreatePostFormTests(TestCase):
             group=CreatePostFormTests.group
         ).count()
         self.assertRedirects(response, reverse('posts:index'))
-        self.assertTrue(Post.objects.filter(
-            image='posts/small.gif').exists())
+        self.assertRegex(
+            Post.objects.get(text='Пост').image.name,
+            r'^blobs/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.gif$',
+        )
         self.assertEqual(
             post_count_after,
             post_count_before + 1,
@@ -0,0 +1,303 @@
+import os
+import shutil
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from yatter.settings import BASE_DIR
+from .. import image_jobs
+from ..models import ImageJob, MediaBlob, Post
+
+User = get_user_model()
+
+
+def make_image(name='photo.jpg', size=(1000, 500), exif=None):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, 'JPEG', exif=exif or b'')
+    return SimpleUploadedFile(
+        name=name,
+        content=buffer.getvalue(),
+        content_type='image/jpeg',
+    )
+
+
+@override_settings(MEDIA_ROOT=os.path.join(BASE_DIR, 'temp_dir'))
+class ImageVariantsTests(TestCase):
+    '''Check resized copies of post images.'''
+    @classmethod
+    def setUpClass(cls):
+        '''Create test objects in db.'''
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            'user_name',
+            password='dfltusrpsswrd',
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(ImageVariantsTests.user)
+
+    def test_variants_on_upload(self):
+        '''Check an upload is queued and the worker makes copies
+        of the configured widths without upscaling.'''
+        self.authorized_client.post(
+            reverse('posts:new_post'),
+            data={
+                'text': 'Пост',
+                'image': make_image(),
+            },
+        )
+        post = Post.objects.get()
+        self.assertEqual(post.variants, [])
+        self.assertTrue(
+            ImageJob.objects.filter(kind=ImageJob.POST, object_id=post.pk)
+        )
+        self.assertEqual(image_jobs.run(once=True), 1)
+        self.assertFalse(ImageJob.objects.exists())
+        post = Post.objects.get()
+        self.assertEqual(
+            [(variant.width, variant.height) for variant in post.variants],
+            [(400, 200), (800, 400), (1000, 500)],
+        )
+        for variant in post.variants:
+            self.assertTrue(variant.name.endswith('.webp'))
+            self.assertTrue(default_storage.exists(variant.name))
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertContains(response, f'srcset="{post.image_srcset}"')
+        self.assertContains(response, 'width="400" height="200"')
+
+    def test_variants_kept_on_text_edit(self):
+        '''Check editing the text keeps the copies and deleting
+        the post removes them.'''
+        post = Post.objects.create(
+            text='Пост',
+            author=ImageVariantsTests.user,
+            image=make_image(),
+        )
+        image_jobs.run(once=True)
+        variants = Post.objects.get(pk=post.pk).image_variants
+        post = Post.objects.get(pk=post.pk)
+        post.text = 'Новый текст'
+        post.save()
+        self.assertEqual(
+            Post.objects.get(pk=post.pk).image_variants,
+            variants,
+        )
+        names = [variant.name for variant in post.variants]
+        post.delete()
+        for name in names:
+            self.assertFalse(default_storage.exists(name))
+
+    def test_variants_kept_on_stale_save(self):
+        '''Check saving a post or a profile loaded before the worker
+        finished keeps the copies.'''
+        post = Post.objects.create(
+            text='Пост',
+            author=ImageVariantsTests.user,
+            image=make_image(),
+        )
+        post = Post.objects.get(pk=post.pk)
+        self.authorized_client.post(
+            reverse(
+                'users:edit_profile',
+                kwargs={'username': ImageVariantsTests.user.username},
+            ),
+            data={'avatar': make_image('avatar.jpg', (200, 100))},
+        )
+        profile = User.objects.get(pk=ImageVariantsTests.user.pk).profile
+        image_jobs.run(once=True)
+        post.text = 'Новый текст'
+        post.save()
+        profile.status = 'Статус'
+        profile.save()
+        self.assertTrue(Post.objects.get(pk=post.pk).image_variants)
+        profile.refresh_from_db()
+        self.assertTrue(profile.avatar_variants)
+
+    def test_unreadable_image(self):
+        '''Check a broken file does not prevent saving the post.'''
+        post = Post.objects.create(
+            text='Пост',
+            author=ImageVariantsTests.user,
+            image=SimpleUploadedFile('broken.jpg', b'not an image'),
+        )
+        image_jobs.run(once=True)
+        post = Post.objects.get(pk=post.pk)
+        self.assertEqual(post.image_variants, '[]')
+        self.assertFalse(ImageJob.objects.exists())
+
+    def test_exif_orientation_and_stripping(self):
+        '''Check copies are rotated by EXIF and carry no metadata.'''
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        post = Post.objects.create(
+            text='Пост',
+            author=ImageVariantsTests.user,
+            image=make_image(size=(600, 300), exif=exif.tobytes()),
+        )
+        image_jobs.run(once=True)
+        variant = Post.objects.get(pk=post.pk).variants[-1]
+        self.assertEqual((variant.width, variant.height), (300, 600))
+        with default_storage.open(variant.name) as stored:
+            with Image.open(stored) as image:
+                self.assertEqual(image.format, 'WEBP')
+                self.assertFalse(image.getexif())
+
+    def test_failed_job_is_retried(self):
+        '''Check a failed job is retried a limited number of times.'''
+        image_jobs.enqueue(ImageJob.POST, 1)
+        with mock.patch.object(
+            image_jobs,
+            'resize',
+            side_effect=OSError,
+        ) as resize:
+            with self.assertLogs('posts.image_jobs', 'ERROR'):
+                image_jobs.run(once=True)
+        self.assertEqual(resize.call_count, image_jobs.MAX_ATTEMPTS)
+        self.assertFalse(ImageJob.objects.exists())
+
+    def test_job_is_leased(self):
+        '''Check a claimed job stays queued until it is done and is
+        claimed again when its lease expires.'''
+        image_jobs.enqueue(ImageJob.POST, 1)
+        job = image_jobs.claim()
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNone(image_jobs.claim())
+        ImageJob.objects.update(
+            claimed_at=job.claimed_at - image_jobs.LEASE_TIMEOUT,
+        )
+        job = image_jobs.claim()
+        self.assertEqual(job.attempts, 2)
+        self.assertTrue(ImageJob.objects.exists())
+        self.assertTrue(image_jobs.process(job))
+        self.assertFalse(ImageJob.objects.exists())
+
+    def test_avatar_sizes(self):
+        '''Check an avatar from the profile form is resized to 50
+        and 300 pixels and the profile page shows the copy.'''
+        self.authorized_client.post(
+            reverse(
+                'users:edit_profile',
+                kwargs={'username': ImageVariantsTests.user.username},
+            ),
+            data={
+                'status': 'Статус',
+                'about': 'Обо мне',
+                'avatar': make_image('avatar.jpg', (200, 100)),
+            },
+        )
+        image_jobs.run(once=True)
+        profile = User.objects.get(pk=ImageVariantsTests.user.pk).profile
+        self.assertEqual(
+            (profile.avatar_small.width, profile.avatar_small.height),
+            (50, 50),
+        )
+        self.assertEqual(
+            (profile.avatar_large.width, profile.avatar_large.height),
+            (300, 300),
+        )
+        response = self.authorized_client.get(
+            reverse(
+                'posts:profile',
+                kwargs={'username': ImageVariantsTests.user.username},
+            )
+        )
+        self.assertContains(response, profile.avatar_large.url)
+
+    def test_upload_validation(self):
+        '''Check large files, images with too many pixels and
+        unsupported formats are rejected without decoding.'''
+        buffer = BytesIO()
+        Image.new('RGB', (10, 10)).save(buffer, 'BMP')
+        cases = (
+            ({'MAX_UPLOAD_SIZE': 2000}, make_image()),
+            ({'MAX_IMAGE_PIXELS': 1000}, make_image()),
+            ({}, SimpleUploadedFile('image.bmp', buffer.getvalue())),
+        )
+        for overrides, image in cases:
+            with self.subTest(overrides=overrides):
+                with override_settings(**overrides):
+                    response = self.authorized_client.post(
+                        reverse('posts:new_post'),
+                        data={
+                            'text': 'Пост',
+                            'image': image,
+                        },
+                    )
+                self.assertTrue(response.context['form'].errors['image'])
+        self.assertFalse(Post.objects.exists())
+
+    def test_shared_files(self):
+        '''Check identical files are stored once and deleted
+        with the last reference.'''
+        first = Post.objects.create(
+            text='Пост',
+            author=ImageVariantsTests.user,
+            image=make_image(),
+        )
+        second = Post.objects.create(
+            text='Повтор',
+            author=ImageVariantsTests.user,
+            image=make_image('copy.jpg'),
+        )
+        profile = ImageVariantsTests.user.profile
+        profile.avatar = make_image('avatar.jpg')
+        profile.save()
+        image_jobs.run(once=True)
+        name = first.image.name
+        self.assertEqual(second.image.name, name)
+        self.assertEqual(User.objects.get().profile.avatar.name, name)
+        self.assertEqual(MediaBlob.objects.get(name=name).refcount, 3)
+        variants = [
+            variant.name for variant in Post.objects.get(pk=first.pk).variants
+        ]
+        self.assertEqual(
+            [
+                variant.name
+                for variant in Post.objects.get(pk=second.pk).variants
+            ],
+            variants,
+        )
+        Post.objects.get(pk=first.pk).delete()
+        profile = User.objects.get().profile
+        profile.avatar = None
+        profile.save()
+        self.assertTrue(default_storage.exists(name))
+        for variant in variants:
+            self.assertTrue(default_storage.exists(variant))
+        Post.objects.get(pk=second.pk).delete()
+        self.assertFalse(default_storage.exists(name))
+        for variant in variants:
+            self.assertFalse(default_storage.exists(variant))
+        self.assertFalse(MediaBlob.objects.exists())
+
+    def test_same_file_saved_again(self):
+        '''Check the reference taken by the storage for a file
+        uploaded again is counted once.'''
+        post = Post.objects.create(
+            text='Пост',
+            author=ImageVariantsTests.user,
+            image=make_image(),
+        )
+        name = post.image.name
+        post = Post.objects.get(pk=post.pk)
+        post.image = make_image('copy.jpg')
+        post.save()
+        self.assertEqual(post.image.name, name)
+        self.assertEqual(MediaBlob.objects.get(name=name).refcount, 1)
+        post.delete()
+        self.assertFalse(default_storage.exists(name))
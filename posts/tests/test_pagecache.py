@@ -0,0 +1,260 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from .. import pagecache
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class AnonymousPageCacheTests(TestCase):
+    '''Check the full-page cache of anonymous visitors.'''
+    @classmethod
+    def setUpClass(cls):
+        '''Create test objects in db.'''
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            'user_name',
+            password='dfltusrpsswrd',
+        )
+        cls.group = Group.objects.create(
+            title='Название группы',
+            slug='test_group',
+        )
+        cls.post = Post.objects.create(
+            text='Тело поста',
+            author=cls.user,
+            group=cls.group,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(AnonymousPageCacheTests.user)
+        self.post_url = reverse(
+            'posts:post',
+            kwargs={
+                'username': AnonymousPageCacheTests.user.username,
+                'post_id': AnonymousPageCacheTests.post.id,
+            }
+        )
+
+    def test_hit_without_queries(self):
+        '''Check a cached page is served without database queries.'''
+        self.guest_client.get(self.post_url)
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(self.post_url)
+        self.assertContains(response, 'Тело поста')
+
+    def test_invalidated_by_comment(self):
+        '''Check a new comment invalidates the post page.'''
+        self.guest_client.get(self.post_url)
+        Comment.objects.create(
+            text='Свежий комментарий',
+            author=AnonymousPageCacheTests.user,
+            post=AnonymousPageCacheTests.post,
+        )
+        response = self.guest_client.get(self.post_url)
+        self.assertContains(response, 'Свежий комментарий')
+
+    def test_invalidated_by_group_post(self):
+        '''Check a new post in the group invalidates the group page.'''
+        url = reverse(
+            'posts:group_posts',
+            kwargs={'slug': AnonymousPageCacheTests.group.slug},
+        )
+        self.guest_client.get(url)
+        Post.objects.create(
+            text='Новый пост в группе',
+            author=AnonymousPageCacheTests.user,
+            group=AnonymousPageCacheTests.group,
+        )
+        self.assertContains(self.guest_client.get(url), 'Новый пост в группе')
+
+    def test_invalidated_by_deleted_comment(self):
+        '''Check a deleted comment invalidates the author and group
+        pages.'''
+        comment = Comment.objects.create(
+            text='Комментарий',
+            author=AnonymousPageCacheTests.user,
+            post=AnonymousPageCacheTests.post,
+        )
+        tags = [
+            f'user:{AnonymousPageCacheTests.user.username}',
+            f'group:{AnonymousPageCacheTests.group.slug}',
+        ]
+        versions = pagecache.tag_versions(tags)
+        comment.delete()
+        for old, new in zip(versions, pagecache.tag_versions(tags)):
+            self.assertNotEqual(old, new)
+
+    def test_groups_tag(self):
+        '''Check the common groups tag changes with the post counts
+        of the groups only.'''
+        version = pagecache.tag_versions(['groups'])
+        post = Post.objects.create(
+            text='Новый пост в группе',
+            author=AnonymousPageCacheTests.user,
+            group=AnonymousPageCacheTests.group,
+        )
+        self.assertNotEqual(pagecache.tag_versions(['groups']), version)
+        version = pagecache.tag_versions(['groups'])
+        post.text = 'Изменённый текст'
+        post.save()
+        self.assertEqual(pagecache.tag_versions(['groups']), version)
+        post.delete()
+        self.assertNotEqual(pagecache.tag_versions(['groups']), version)
+
+    def test_response_with_cookies_not_stored(self):
+        '''Check pages getting a cookie from the middleware below
+        the page cache are not stored.'''
+        def view(request, cookie):
+            response = HttpResponse('Страница')
+            response.pagecache_key = 'test-page'
+            if cookie:
+                response.set_cookie('csrftoken', 'token')
+            return response
+
+        request = RequestFactory().get('/')
+        for cookie in (True, False):
+            with self.subTest(cookie=cookie):
+                pagecache.PageCacheMiddleware(
+                    lambda request: view(request, cookie),
+                )(request)
+                self.assertEqual(cache.get('test-page') is None, cookie)
+
+    def test_authorized_not_cached(self):
+        '''Check pages of logged in users are neither cached nor
+        served from the cache.'''
+        self.guest_client.get(self.post_url)
+        response = self.authorized_client.get(self.post_url)
+        self.assertContains(response, 'csrfmiddlewaretoken')
+        response = self.guest_client.get(self.post_url)
+        self.assertNotContains(response, 'csrfmiddlewaretoken')
+
+
+class ConditionalGetTests(TestCase):
+    '''Check ETag and Last-Modified validators of the pages.'''
+    @classmethod
+    def setUpClass(cls):
+        '''Create test objects in db.'''
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            'user_name',
+            password='dfltusrpsswrd',
+        )
+        cls.post = Post.objects.create(
+            text='Тело поста',
+            author=cls.user,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(ConditionalGetTests.user)
+        self.post_url = reverse(
+            'posts:post',
+            kwargs={
+                'username': ConditionalGetTests.user.username,
+                'post_id': ConditionalGetTests.post.id,
+            }
+        )
+
+    def test_not_modified_without_queries(self):
+        '''Check an unchanged page is answered with 304 before
+        the view runs.'''
+        response = self.guest_client.get(self.post_url)
+        self.assertTrue(response.has_header('Last-Modified'))
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(
+                self.post_url,
+                HTTP_IF_NONE_MATCH=response['ETag'],
+            )
+        self.assertEqual(response.status_code, 304)
+        last_modified = self.guest_client.get(self.post_url)['Last-Modified']
+        response = self.guest_client.get(
+            self.post_url,
+            HTTP_IF_MODIFIED_SINCE=last_modified,
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_modified_by_comment(self):
+        '''Check a new comment changes the ETag of the post page.'''
+        etag = self.guest_client.get(self.post_url)['ETag']
+        Comment.objects.create(
+            text='Свежий комментарий',
+            author=ConditionalGetTests.user,
+            post=ConditionalGetTests.post,
+        )
+        response = self.guest_client.get(
+            self.post_url,
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertContains(response, 'Свежий комментарий')
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_visitors_get_own_etags(self):
+        '''Check signed in visitors neither reuse the ETag
+        of anonymous ones nor get Last-Modified.'''
+        etag = self.guest_client.get(self.post_url)['ETag']
+        response = self.authorized_client.get(
+            self.post_url,
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.assertIn('private', response['Cache-Control'])
+        response = self.authorized_client.get(
+            self.post_url,
+            HTTP_IF_NONE_MATCH=response['ETag'],
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_changes_on_login(self):
+        '''Check a page kept from before signing in again is not
+        answered with 304: it has a stale CSRF token.'''
+        credentials = {
+            'username': ConditionalGetTests.user.username,
+            'password': 'dfltusrpsswrd',
+        }
+        self.guest_client.post(reverse('login'), credentials)
+        etag = self.guest_client.get(self.post_url)['ETag']
+        response = self.guest_client.get(
+            self.post_url,
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, 304)
+        self.guest_client.post(reverse('login'), credentials)
+        response = self.guest_client.get(
+            self.post_url,
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_modified_by_follow(self):
+        '''Check following an author changes the ETag of the pages
+        marking the followed authors.'''
+        url = reverse('posts:index')
+        author = User.objects.create_user('author')
+        etag = self.authorized_client.get(url)['ETag']
+        Follow.objects.create(user=ConditionalGetTests.user, following=author)
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_modified_by_edit(self):
+        '''Check an edited post is shown on the home page with
+        a new ETag for signed in visitors.'''
+        url = reverse('posts:index')
+        etag = self.authorized_client.get(url)['ETag']
+        post = ConditionalGetTests.post
+        post.text = 'Исправленный текст'
+        post.save()
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Исправленный текст')
+        self.assertNotEqual(response['ETag'], etag)
@@ -0,0 +1,112 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from ..models import Post
+from ..paginator import CursorPaginator, encode_cursor
+
+User = get_user_model()
+
+
+class CursorPaginatorTests(TestCase):
+    '''Check keyset pagination over posts.'''
+    @classmethod
+    def setUpClass(cls):
+        '''Create test objects in db.'''
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            'user_name',
+            password='dfltusrpsswrd',
+        )
+        for i in range(7):
+            Post.objects.create(
+                text=f'Тело поста {i}',
+                author=cls.user,
+            )
+        cls.ids = list(
+            Post.objects.order_by('-pub_date', '-id').values_list(
+                'id',
+                flat=True,
+            )
+        )
+
+    def test_walk_forward_and_back(self):
+        '''Check next and previous cursors visit every post once.'''
+        paginator = CursorPaginator(Post.objects.all(), 3)
+        first = paginator.get_page(None)
+        second = CursorPaginator(Post.objects.all(), 3).get_page(
+            first.next_cursor
+        )
+        third = CursorPaginator(Post.objects.all(), 3).get_page(
+            second.next_cursor
+        )
+        self.assertEqual(
+            [post.id for post in first] + [post.id for post in second]
+            + [post.id for post in third],
+            CursorPaginatorTests.ids,
+        )
+        self.assertFalse(first.has_previous())
+        self.assertTrue(second.has_previous())
+        self.assertFalse(third.has_next())
+        back = CursorPaginator(Post.objects.all(), 3).get_page(
+            third.previous_cursor
+        )
+        self.assertEqual(
+            [post.id for post in back],
+            [post.id for post in second],
+        )
+
+    def test_no_count_query(self):
+        '''Check a page costs a single query without COUNT.'''
+        with CaptureQueriesContext(connection) as queries:
+            page = CursorPaginator(Post.objects.all(), 3).get_page(None)
+            list(page)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('COUNT(', queries[0]['sql'].upper())
+
+    def test_invalid_cursor(self):
+        '''Check an invalid cursor falls back to the first page.'''
+        page = CursorPaginator(Post.objects.all(), 3).get_page('garbage')
+        self.assertEqual(page[0].id, CursorPaginatorTests.ids[0])
+
+    def test_list_of_keys(self):
+        '''Check pagination of a list of (pub_date, id) tuples.'''
+        keys = list(
+            Post.objects.order_by('-pub_date', '-id').values_list(
+                'pub_date',
+                'id',
+            )
+        )
+        first = CursorPaginator(keys, 5).get_page(None)
+        second = CursorPaginator(keys, 5).get_page(first.next_cursor)
+        self.assertEqual(list(first) + list(second), keys)
+
+    def test_tampered_cursor(self):
+        '''Check cursors with keys of wrong types fall back
+        to the first page.'''
+        keys = list(
+            Post.objects.order_by('-pub_date', '-id').values_list(
+                'pub_date',
+                'id',
+            )
+        )
+        for values in (
+            ['not a date', 'not an id'],
+            [{'a': 1}, [2]],
+            [True, None],
+            'ab',
+            ['2021-01-01T00:00:00', 1],
+            ['2021-01-01T00:00:00+00:00', float('inf')],
+            ['2021-01-01T00:00:00+00:00', float('nan')],
+            ['2021-01-01T00:00:00+00:00', 10 ** 400],
+            ['2021-01-01T00:00:00+00:00', 2 ** 63],
+        ):
+            cursor = encode_cursor('next', values)
+            with self.subTest(values=values):
+                page = CursorPaginator(Post.objects.all(), 3).get_page(
+                    cursor,
+                )
+                self.assertEqual(page[0].id, CursorPaginatorTests.ids[0])
+                page = CursorPaginator(keys, 3).get_page(cursor)
+                self.assertEqual(page[0], keys[0])
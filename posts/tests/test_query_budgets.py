@@ -0,0 +1,123 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(QUERY_BUDGETS_STRICT=True)
+class QueryBudgetTests(TestCase):
+    '''Check the pages stay within their query budgets and send
+    no repeated queries however many objects they show.'''
+    @classmethod
+    def setUpClass(cls):
+        '''Create test objects in db.'''
+        super().setUpClass()
+        cls.users = [
+            User.objects.create_user(
+                f'user_{number}',
+                password='dfltusrpsswrd',
+            )
+            for number in range(5)
+        ]
+        cls.user = cls.users[0]
+        cls.group = Group.objects.create(
+            title='Название группы',
+            slug='test_group',
+        )
+        for number in range(12):
+            Post.objects.create(
+                text=f'Тело поста {number}',
+                author=cls.users[number % 5],
+                group=cls.group if number % 2 else None,
+            )
+        cls.post = Post.objects.filter(author=cls.user).first()
+        for author in cls.users:
+            Comment.objects.create(
+                text='Текст комментария',
+                author=author,
+                post=cls.post,
+            )
+        for user in cls.users[1:4]:
+            Follow.objects.create(user=cls.user, following=user)
+            Follow.objects.create(user=user, following=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(QueryBudgetTests.user)
+        self.post_kwargs = {
+            'username': QueryBudgetTests.user.username,
+            'post_id': QueryBudgetTests.post.id,
+        }
+
+    def test_pages(self):
+        '''Check the pages for guests and signed in users, both with
+        a cold cache and with a warm one.'''
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_posts', kwargs={'slug': 'test_group'}),
+            reverse('posts:groups'),
+            reverse('posts:search') + '?q=тело',
+            reverse(
+                'posts:profile',
+                kwargs={'username': QueryBudgetTests.user.username},
+            ),
+            reverse(
+                'posts:profile',
+                kwargs={'username': QueryBudgetTests.users[1].username},
+            ),
+            reverse('posts:post', kwargs=self.post_kwargs),
+            reverse('posts:comments', kwargs=self.post_kwargs),
+        ]
+        for url in urls:
+            for client in (self.guest_client, self.authorized_client):
+                with self.subTest(url=url):
+                    cache.clear()
+                    self.assertEqual(client.get(url).status_code, 200)
+                    self.assertEqual(client.get(url).status_code, 200)
+        for url in (
+            reverse('posts:follow_index'),
+            reverse('posts:new_post'),
+            reverse('posts:post_edit', kwargs=self.post_kwargs),
+        ):
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+    def test_writes(self):
+        '''Check creating and editing posts, comments and follows.'''
+        client = self.authorized_client
+        client.post(
+            reverse('posts:new_post'),
+            {'text': 'Новый пост', 'group': QueryBudgetTests.group.id},
+        )
+        client.post(
+            reverse('posts:post_edit', kwargs=self.post_kwargs),
+            {'text': 'Новый текст', 'group': QueryBudgetTests.group.id},
+        )
+        client.post(
+            reverse('posts:add_comment', kwargs=self.post_kwargs),
+            {'text': 'Новый комментарий'},
+        )
+        client.post(
+            reverse('posts:add_comment', kwargs=self.post_kwargs),
+            {
+                'text': 'Ответ',
+                'parent': Comment.objects.get(text='Новый комментарий').pk,
+            },
+        )
+        username = QueryBudgetTests.users[4].username
+        client.get(
+            reverse('posts:profile_follow', kwargs={'username': username}),
+        )
+        client.get(
+            reverse('posts:profile_unfollow', kwargs={'username': username}),
+        )
+        self.assertTrue(
+            Post.objects.filter(text='Новый текст').exists()
+        )
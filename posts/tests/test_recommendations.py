@@ -0,0 +1,127 @@
+from unittest import skipIf
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import recommendations
+from ..models import Follow, FollowChange, Recommendation
+
+try:
+    from .. import recommender
+except ImportError:
+    recommender = None
+
+User = get_user_model()
+
+
+@skipIf(recommender is None, 'NumPy and SciPy are not installed')
+class RecommenderTests(TestCase):
+    '''Check friend-of-friend suggestions.'''
+    @classmethod
+    def setUpClass(cls):
+        '''Create test objects in db.'''
+        super().setUpClass()
+        cls.users = {
+            name: User.objects.create_user(name, password='dfltusrpsswrd')
+            for name in ('ann', 'bob', 'cid', 'dan', 'eve')
+        }
+
+    def setUp(self):
+        cache.clear()
+        self.follows = {}
+        for user, author in (
+            ('ann', 'bob'),
+            ('ann', 'eve'),
+            ('bob', 'cid'),
+            ('bob', 'dan'),
+            ('bob', 'ann'),
+            ('eve', 'cid'),
+            ('cid', 'dan'),
+        ):
+            self.follows[user, author] = Follow.objects.create(
+                user=self.users[user],
+                following=self.users[author],
+            )
+
+    def suggested(self, name):
+        return [
+            (recommendation.suggested.username, recommendation.score)
+            for recommendation in recommendations.suggestions(self.users[name])
+        ]
+
+    def test_full(self):
+        '''Рекомендуются авторы, на которых подписаны мои подписки.'''
+        self.assertEqual(recommender.refresh(full=True), 5)
+        self.assertEqual(self.suggested('ann'), [('cid', 2), ('dan', 1)])
+        self.assertEqual(self.suggested('bob'), [('eve', 1)])
+        self.assertEqual(self.suggested('eve'), [('dan', 1)])
+        self.assertEqual(self.suggested('cid'), [])
+        self.assertFalse(FollowChange.objects.exists())
+
+    def test_incremental(self):
+        '''Пересчитываются только затронутые пользователи.'''
+        recommender.refresh(full=True)
+        self.follows['bob', 'cid'].delete()
+        Recommendation.objects.filter(user=self.users['eve']).update(score=99)
+        # bob changed, ann follows bob.
+        self.assertEqual(recommender.refresh(), 2)
+        self.assertEqual(self.suggested('ann'), [('cid', 1), ('dan', 1)])
+        self.assertEqual(self.suggested('bob'), [('eve', 1)])
+        self.assertEqual(
+            Recommendation.objects.get(user=self.users['eve']).score,
+            99,
+        )
+        self.assertFalse(FollowChange.objects.exists())
+        Follow.objects.create(
+            user=self.users['dan'],
+            following=self.users['ann'],
+        )
+        # dan changed, bob and cid follow dan.
+        self.assertEqual(recommender.refresh(), 3)
+        self.assertEqual(self.suggested('cid'), [('ann', 1)])
+
+    def test_top_k(self):
+        self.assertEqual(recommender.refresh(full=True, top_k=1), 5)
+        self.assertEqual(self.suggested('ann'), [('cid', 2)])
+
+    def test_widget(self):
+        '''Рекомендации показываются в боковой панели ленты.'''
+        recommender.refresh(full=True)
+        client = Client()
+        client.force_login(self.users['ann'])
+        response = client.get(reverse('posts:index'))
+        self.assertContains(response, 'Кого почитать')
+        self.assertEqual(
+            [
+                recommendation.suggested.username
+                for recommendation in response.context['recommended_authors']
+            ],
+            ['cid', 'dan'],
+        )
+
+    def test_widget_skips_followed(self):
+        '''Check authors followed since the last refresh are left out
+        and a refresh changes the ETag of the pages.'''
+        recommender.refresh(full=True)
+        client = Client()
+        client.force_login(self.users['ann'])
+        Follow.objects.create(
+            user=self.users['ann'],
+            following=self.users['cid'],
+        )
+        response = client.get(reverse('posts:index'))
+        self.assertEqual(
+            [
+                recommendation.suggested.username
+                for recommendation in response.context['recommended_authors']
+            ],
+            ['dan'],
+        )
+        recommender.refresh()
+        response = client.get(
+            reverse('posts:index'),
+            HTTP_IF_NONE_MATCH=response['ETag'],
+        )
+        self.assertEqual(response.status_code, 200)
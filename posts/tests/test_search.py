@@ -0,0 +1,132 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import search
+from ..models import Post, PostTerm
+from ..paginator import CursorPaginator
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    '''Check the inverted index and the search page.'''
+    @classmethod
+    def setUpClass(cls):
+        '''Create test objects in db.'''
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            'user_name',
+            password='dfltusrpsswrd',
+        )
+        cls.once = Post.objects.create(
+            text='Кошка спит на окне',
+            author=cls.user,
+        )
+        cls.twice = Post.objects.create(
+            text='Кошка и ещё одна кошка, обе спят',
+            author=cls.user,
+        )
+        cls.other = Post.objects.create(
+            text='Собака гуляет',
+            author=cls.user,
+        )
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_index_updated_on_save(self):
+        '''Check the index is updated when a post is created or edited.'''
+        self.assertEqual(
+            PostTerm.objects.get(term='кошка', post=SearchTests.twice).count,
+            2,
+        )
+        post = Post.objects.get(pk=SearchTests.other.pk)
+        post.text = 'Собака спит'
+        post.save()
+        self.assertEqual(
+            set(post.terms.values_list('term', flat=True)),
+            {'собака', 'спит'},
+        )
+
+    def test_ranking(self):
+        '''Check posts with every word are found, best first.'''
+        found = list(search.search('КОШКА'))
+        self.assertEqual(
+            [post.id for post in found],
+            [SearchTests.twice.id, SearchTests.once.id],
+        )
+        self.assertEqual(
+            [post.id for post in search.search('кошка окне')],
+            [SearchTests.once.id],
+        )
+        self.assertFalse(search.search('').exists())
+
+    def test_rarest_term_candidates(self):
+        '''Check candidates come from the newest postings
+        of the rarest word.'''
+        cache.clear()
+        self.assertEqual(
+            search.term_counts(['кошка', 'окне']),
+            {'кошка': 2, 'окне': 1},
+        )
+        with mock.patch.object(search, 'MAX_CANDIDATES', 1):
+            self.assertEqual(
+                [post.id for post in search.search('окне кошка')],
+                [SearchTests.once.id],
+            )
+            self.assertEqual(
+                [post.id for post in search.search('кошка')],
+                [SearchTests.twice.id],
+            )
+
+    def test_cursor_pagination(self):
+        '''Check cursor pagination walks the results by rank.'''
+        first = CursorPaginator(
+            search.search('кошка'),
+            1,
+            ('score', 'id'),
+        ).get_page(None)
+        second = CursorPaginator(
+            search.search('кошка'),
+            1,
+            ('score', 'id'),
+        ).get_page(first.next_cursor)
+        self.assertEqual(
+            [post.id for post in first] + [post.id for post in second],
+            [SearchTests.twice.id, SearchTests.once.id],
+        )
+        self.assertFalse(second.has_next())
+
+    def test_search_page(self):
+        '''Check the search page shows the found posts and keeps
+        the query in the paginator links.'''
+        response = self.client.get(
+            reverse('posts:search'),
+            {
+                'q': 'собака',
+            },
+        )
+        self.assertEqual(
+            [post.id for post in response.context['page']],
+            [SearchTests.other.id],
+        )
+        self.assertEqual(response.context['query'], 'собака')
+        for i in range(10):
+            Post.objects.create(
+                text=f'Собака номер {i}',
+                author=SearchTests.user,
+            )
+        response = self.client.get(
+            reverse('posts:search'),
+            {
+                'q': 'собака',
+            },
+        )
+        self.assertContains(
+            response,
+            '&q=%D1%81%D0%BE%D0%B1%D0%B0%D0%BA%D0%B0',
+        )
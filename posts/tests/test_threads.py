@@ -0,0 +1,143 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import threads
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+class ThreadTests(TestCase):
+    '''Check threaded comments and their pages.'''
+    @classmethod
+    def setUpClass(cls):
+        '''Create test objects in db.'''
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            'author',
+            password='dfltusrpsswrd',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый пост',
+            author=cls.author,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(ThreadTests.author)
+
+    def comment(self, text, parent=None):
+        return Comment.objects.create(
+            text=text,
+            post=ThreadTests.post,
+            author=ThreadTests.author,
+            parent=parent,
+        )
+
+    def test_thread_order(self):
+        '''Ответы идут сразу за комментарием, на который отвечают.'''
+        first = self.comment('Первый')
+        second = self.comment('Второй')
+        reply = self.comment('Ответ', parent=first)
+        nested = self.comment('Ответ на ответ', parent=reply)
+        comments, after = threads.page(ThreadTests.post.pk)
+        self.assertEqual(comments, [first, reply, nested, second])
+        self.assertEqual([c.depth for c in comments], [0, 1, 2, 0])
+        self.assertIsNone(after)
+        comments, _ = threads.page(ThreadTests.post.pk, thread=reply)
+        self.assertEqual(comments, [reply, nested])
+
+    def test_pages(self):
+        '''Страницы продолжаются с пути последнего комментария.'''
+        created = [self.comment(str(number)) for number in range(5)]
+        comments, after = threads.page(ThreadTests.post.pk, size=3)
+        self.assertEqual(comments, created[:3])
+        comments, after = threads.page(ThreadTests.post.pk, after, size=3)
+        self.assertEqual(comments, created[3:])
+        self.assertIsNone(after)
+
+    def test_pages_without_paths(self):
+        '''Страница после комментариев без пути не начинается заново.'''
+        created = [self.comment(str(number)) for number in range(3)]
+        Comment.objects.filter(pk=created[0].pk).update(path='')
+        comments, after = threads.page(ThreadTests.post.pk, size=1)
+        self.assertEqual(comments, created[:1])
+        self.assertEqual(after, '')
+        comments, after = threads.page(ThreadTests.post.pk, after, size=2)
+        self.assertEqual(comments, created[1:])
+        self.assertIsNone(after)
+
+    def test_depth_limit(self):
+        '''Слишком глубокие ответы прикрепляются к последнему допустимому.'''
+        parent = None
+        for depth in range(threads.MAX_DEPTH + 1):
+            parent = self.comment(str(depth), parent=parent)
+        self.assertEqual(parent.depth, threads.MAX_DEPTH - 1)
+        parent.refresh_from_db()
+        self.assertEqual(parent.parent.depth, threads.MAX_DEPTH - 2)
+
+    def test_rebuild(self):
+        '''Команда восстанавливает пути старых комментариев.'''
+        first = self.comment('Первый')
+        reply = self.comment('Ответ', parent=first)
+        Comment.objects.update(path='')
+        self.assertEqual(threads.rebuild(batch_size=1), 2)
+        reply.refresh_from_db()
+        self.assertEqual(
+            reply.path,
+            threads.segment(first.pk) + threads.segment(reply.pk),
+        )
+
+    def test_rebuild_vanished_parent(self):
+        '''Check a reply whose parent vanished during the rebuild
+        becomes a root.'''
+        first = self.comment('Первый')
+        reply = self.comment('Ответ', parent=first)
+        Comment.objects.update(path='')
+        with mock.patch.object(
+            threads,
+            'parent_paths',
+            side_effect=lambda comments: {},
+        ):
+            self.assertEqual(threads.rebuild(batch_size=1), 2)
+        reply.refresh_from_db()
+        self.assertEqual(reply.path, threads.segment(reply.pk))
+        self.assertIsNone(reply.parent_id)
+
+    def test_reply(self):
+        '''Ответ добавляется через форму комментария.'''
+        first = self.comment('Первый')
+        url = reverse(
+            'posts:add_comment',
+            kwargs={'username': 'author', 'post_id': ThreadTests.post.pk},
+        )
+        response = self.client.get(url, {'parent': first.pk})
+        self.assertContains(response, f'value="{first.pk}"')
+        self.client.post(url, {'text': 'Ответ', 'parent': first.pk})
+        reply = Comment.objects.get(text='Ответ')
+        self.assertEqual(reply.parent, first)
+        response = self.client.post(url, {'text': 'Ответ', 'parent': 'x'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_more_comments(self):
+        '''Пост показывает первую страницу и ссылку на следующую.'''
+        created = [self.comment(f'Комментарий {n}') for n in range(3)]
+        kwargs = {'username': 'author', 'post_id': ThreadTests.post.pk}
+        page_size = threads.COMMENTS_PER_PAGE
+        threads.COMMENTS_PER_PAGE = 2
+        self.addCleanup(setattr, threads, 'COMMENTS_PER_PAGE', page_size)
+        response = self.client.get(reverse('posts:post', kwargs=kwargs))
+        self.assertEqual(response.context['comments'], created[:2])
+        self.assertContains(response, 'comments-more')
+        response = self.client.get(
+            reverse('posts:comments', kwargs=kwargs),
+            {'after': response.context['comments_after'], 'partial': 1},
+        )
+        self.assertEqual(response.context['comments'], created[2:])
+        self.assertNotContains(response, 'comments-more')
+        self.assertNotContains(response, '<html')
@@ -0,0 +1,184 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from .. import timeline
+from ..models import Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class TimelineTests(TestCase):
+    '''Check the materialized subscriptions feed.'''
+    @classmethod
+    def setUpClass(cls):
+        '''Create test objects in db.'''
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            'author',
+            password='dfltusrpsswrd',
+        )
+        cls.follower = User.objects.create_user(
+            'follower',
+            password='dfltusrpsswrd',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_new_post_fan_out(self):
+        '''Check a new post is pushed only to followers.'''
+        Follow.objects.create(
+            user=TimelineTests.follower,
+            following=TimelineTests.author,
+        )
+        post = Post.objects.create(
+            text='Тело поста',
+            author=TimelineTests.author,
+        )
+        self.assertEqual(
+            timeline.post_ids(TimelineTests.follower),
+            [post.id],
+        )
+        self.assertEqual(timeline.post_ids(TimelineTests.author), [])
+
+    def test_follow_backfill_and_unfollow(self):
+        '''Check subscription adds recent posts and unsubscription
+        removes them.'''
+        old_post = Post.objects.create(
+            text='Старый пост',
+            author=TimelineTests.author,
+        )
+        subscription = Follow.objects.create(
+            user=TimelineTests.follower,
+            following=TimelineTests.author,
+        )
+        self.assertEqual(
+            timeline.post_ids(TimelineTests.follower),
+            [old_post.id],
+        )
+        subscription.delete()
+        self.assertFalse(
+            TimelineEntry.objects.filter(
+                owner=TimelineTests.follower,
+            ).exists()
+        )
+
+    @override_settings(TIMELINE_LENGTH=3)
+    def test_timeline_is_capped(self):
+        '''Check the timeline returns only TIMELINE_LENGTH newest posts.'''
+        Follow.objects.create(
+            user=TimelineTests.follower,
+            following=TimelineTests.author,
+        )
+        posts = [
+            Post.objects.create(
+                text=f'Тело поста {i}',
+                author=TimelineTests.author,
+            ) for i in range(5)
+        ]
+        ids = timeline.post_ids(TimelineTests.follower)
+        self.assertEqual(len(ids), 3)
+        self.assertEqual(ids[0], posts[-1].id)
+        timeline.rebuild(TimelineTests.follower)
+        self.assertEqual(
+            TimelineEntry.objects.filter(
+                owner=TimelineTests.follower,
+            ).count(),
+            3,
+        )
+
+    def test_trim_all(self):
+        '''Check fan-out grown timelines are cut back by trim_all.'''
+        Follow.objects.create(
+            user=TimelineTests.follower,
+            following=TimelineTests.author,
+        )
+        for i in range(5):
+            Post.objects.create(
+                text=f'Тело поста {i}',
+                author=TimelineTests.author,
+            )
+        with override_settings(TIMELINE_LENGTH=3):
+            self.assertEqual(timeline.trim_all(), 1)
+            self.assertEqual(timeline.trim_all(), 0)
+        self.assertEqual(
+            TimelineEntry.objects.filter(
+                owner=TimelineTests.follower,
+            ).count(),
+            3,
+        )
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_popular_author_merged_on_read(self):
+        '''Check posts of authors above the fan-out limit are not
+        pushed but still merged into the feed in date order.'''
+        popular_author = User.objects.create_user(
+            'popular_author',
+            password='dfltusrpsswrd',
+        )
+        for user in (TimelineTests.follower, TimelineTests.author):
+            Follow.objects.create(
+                user=user,
+                following=popular_author,
+            )
+        Follow.objects.create(
+            user=TimelineTests.follower,
+            following=TimelineTests.author,
+        )
+        cache.clear()
+        first = Post.objects.create(
+            text='Пост популярного автора',
+            author=popular_author,
+        )
+        second = Post.objects.create(
+            text='Пост обычного автора',
+            author=TimelineTests.author,
+        )
+        third = Post.objects.create(
+            text='Ещё один пост популярного автора',
+            author=popular_author,
+        )
+        self.assertFalse(
+            TimelineEntry.objects.filter(
+                post__author=popular_author,
+            ).exists()
+        )
+        self.assertEqual(
+            timeline.post_ids(TimelineTests.follower),
+            [third.id, second.id, first.id],
+        )
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_demoted_author_stays_in_feed(self):
+        '''Check posts of an author falling under the fan-out limit
+        are still merged on read and then backfilled.'''
+        popular_author = User.objects.create_user(
+            'popular_author',
+            password='dfltusrpsswrd',
+        )
+        for user in (TimelineTests.follower, TimelineTests.author):
+            Follow.objects.create(
+                user=user,
+                following=popular_author,
+            )
+        cache.clear()
+        post = Post.objects.create(
+            text='Пост популярного автора',
+            author=popular_author,
+        )
+        Follow.objects.get(
+            user=TimelineTests.author,
+            following=popular_author,
+        ).delete()
+        cache.clear()
+        self.assertEqual(timeline.post_ids(TimelineTests.follower), [post.id])
+        self.assertEqual(timeline.demote_authors(), 1)
+        self.assertTrue(
+            TimelineEntry.objects.filter(
+                owner=TimelineTests.follower,
+                post=post,
+            ).exists()
+        )
+        self.assertNotIn(popular_author.id, timeline.popular_authors())
+        self.assertEqual(timeline.post_ids(TimelineTests.follower), [post.id])
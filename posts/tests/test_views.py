@@ -67,7 +67,9 @@ class PostPagesTests(TestCase):
 
     def setUp(self):
         '''Create an unauthorized and an authorized client;
-        create a dictionary "url name: url".'''
+        create a dictionary "url name: url"; forget cached follows
+        of the rolled back tests.'''
+        cache.clear()
         self.guest_client = Client()
         self.authorized_client = Client()
         self.follower_client = Client()
@@ -138,10 +140,12 @@ class PostPagesTests(TestCase):
         name = 'index'
         url = self.urls[name]
         start_response = self.guest_client.get(url)
-        Post.objects.create(
-            text='Дополнительный пост',
-            author=PostPagesTests.user,
-        )
+        Post.objects.bulk_create([
+            Post(
+                text='Дополнительный пост',
+                author=PostPagesTests.user,
+            ),
+        ])
         intermediate_response = self.guest_client.get(url)
         self.assertEqual(
             start_response.content,
@@ -154,6 +158,32 @@ class PostPagesTests(TestCase):
             end_response.content,
         )
 
+    def test_post_item_fragment_cache(self):
+        '''Check post fragments are cached until the post is edited.'''
+        url = self.urls['group_posts']
+        post = Post.objects.create(
+            text='Исходный текст',
+            author=PostPagesTests.user,
+            group=PostPagesTests.group,
+        )
+        self.guest_client.get(url)
+        Post.objects.filter(pk=post.pk).update(text='Тихая правка')
+        response = self.guest_client.get(url)
+        self.assertContains(response, 'Исходный текст')
+        post.refresh_from_db()
+        post.text = 'Новый текст'
+        post.save()
+        response = self.guest_client.get(url)
+        self.assertContains(response, 'Новый текст')
+        self.assertNotContains(
+            self.guest_client.get(url),
+            'Редактировать',
+        )
+        self.assertContains(
+            self.authorized_client.get(url),
+            'Редактировать',
+        )
+
     def test_group_page(self):
         '''Check group page context;
         check the post is in the correct group.'''
@@ -313,8 +343,9 @@ class PostPagesTests(TestCase):
             ),
             10,
         )
+        next_cursor = response.context.get('page').next_cursor
         response = self.authorized_client.get(
-            reverse('posts:index') + '?page=2'
+            reverse('posts:index') + f'?cursor={next_cursor}'
         )
         self.assertEqual(
             len(
@@ -322,3 +353,4 @@ class PostPagesTests(TestCase):
             ),
             6,
         )
+        self.assertFalse(response.context.get('page').has_next())
@@ -0,0 +1,157 @@
+'''Threaded comments.
+
+Every comment stores its materialized path: the zero-padded ids of its
+ancestors followed by its own. Ordering the comments of a post by path
+lists the threads depth first, oldest first, and the subthread of a
+comment is the range of paths starting with its own, so both are read
+a page at a time through the (post, path) index whatever the number of
+comments.
+
+Replies deeper than MAX_DEPTH are attached to the deepest ancestor
+allowed.'''
+from django.db.models import Case, CharField, Value, When
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+
+from .models import Comment
+
+SEGMENT_LENGTH = Comment.PATH_SEGMENT_LENGTH
+MAX_DEPTH = Comment.MAX_DEPTH
+COMMENTS_PER_PAGE = 50
+BATCH_SIZE = 1000
+
+
+def segment(comment_id):
+    return str(comment_id).zfill(SEGMENT_LENGTH)
+
+
+def parent_paths(comments):
+    '''Paths of the parents of the comments, loaded with one query
+    for the parents not cached on the comments.'''
+    paths = {}
+    missing = set()
+    for comment in comments:
+        if comment.parent_id is None:
+            continue
+        if Comment.parent.is_cached(comment):
+            paths[comment.parent_id] = comment.parent.path
+        else:
+            missing.add(comment.parent_id)
+    paths.update(
+        Comment.objects.filter(pk__in=missing).values_list('pk', 'path')
+    )
+    # Comments older than the paths are roots.
+    return {
+        parent_id: path or segment(parent_id)
+        for parent_id, path in paths.items()
+    }
+
+
+def make_path(comment, paths):
+    '''Set the path of the comment, moving a too deep reply up.'''
+    prefix = ''
+    if comment.parent_id is not None:
+        prefix = paths[comment.parent_id][:(MAX_DEPTH - 1) * SEGMENT_LENGTH]
+        parent_id = int(prefix[-SEGMENT_LENGTH:])
+        if parent_id != comment.parent_id:
+            Comment.parent.field.delete_cached_value(comment)
+            comment.parent_id = parent_id
+    comment.path = prefix + segment(comment.pk)
+
+
+def place(comments):
+    '''Save the paths of new comments with one statement.'''
+    comments = [comment for comment in comments if not comment.path]
+    if not comments:
+        return
+    paths = parent_paths(comments)
+    moved = []
+    for comment in comments:
+        parent_id = comment.parent_id
+        make_path(comment, paths)
+        if comment.parent_id != parent_id:
+            moved.append(comment)
+    Comment.objects.filter(
+        pk__in=[comment.pk for comment in comments],
+    ).update(
+        path=Case(
+            *[
+                When(pk=comment.pk, then=Value(comment.path))
+                for comment in comments
+            ],
+            output_field=CharField(),
+        ),
+    )
+    for comment in moved:
+        Comment.objects.filter(pk=comment.pk).update(parent=comment.parent_id)
+
+
+def rebuild(batch_size=BATCH_SIZE):
+    '''Recompute the paths of all comments a batch at a time; parents
+    are older than their replies, so one pass in id order is enough.
+
+    Only the paths of the batch are kept: parents from earlier batches
+    are read back with one query per batch. A reply whose parent has
+    vanished in between becomes a root.'''
+    updated = 0
+    last_id = 0
+    comments = Comment.objects.only('id', 'parent', 'path').order_by('id')
+    while True:
+        batch = list(comments.filter(pk__gt=last_id)[:batch_size])
+        if not batch:
+            return updated
+        batch_ids = {comment.pk for comment in batch}
+        paths = parent_paths(
+            [
+                comment for comment in batch
+                if comment.parent_id not in batch_ids
+            ]
+        )
+        for comment in batch:
+            if comment.parent_id not in paths:
+                comment.parent_id = None
+            comment.path = ''
+            make_path(comment, paths)
+            paths[comment.pk] = comment.path
+        Comment.objects.bulk_update(batch, ['path', 'parent'])
+        updated += len(batch)
+        last_id = batch[-1].pk
+
+
+def comment_or_404(comment_id, post_id):
+    '''The comment of the post with the given id, None without one.'''
+    if not comment_id:
+        return None
+    if not str(comment_id).isdigit():
+        raise Http404
+    return get_object_or_404(
+        Comment.objects.select_related('author'),
+        pk=comment_id,
+        post_id=post_id,
+    )
+
+
+def page(post_id, after=None, thread=None, size=None):
+    '''Return the comments of the post, or of the thread starting
+    with the given comment, in thread order after the path, and
+    the path to continue from, None on the last page.
+
+    An empty path is a valid one: comments older than the paths have
+    it until rebuild_comment_threads runs, and the next page starts
+    after them instead of from the beginning.'''
+    size = size or COMMENTS_PER_PAGE
+    queryset = Comment.objects.filter(
+        post_id=post_id,
+    ).select_related(
+        'author',
+    ).order_by(
+        'path',
+    )
+    if thread is not None:
+        queryset = queryset.filter(path__startswith=thread.path)
+    if after is not None:
+        queryset = queryset.filter(path__gt=after)
+    comments = list(queryset[:size + 1])
+    if len(comments) > size:
+        return comments[:size], comments[size - 1].path
+    return comments, None
@@ -0,0 +1,289 @@
+'''Materialized subscriptions feed.
+
+New posts are pushed into the timelines of the author's followers
+when they are saved (fan-out on write), so reading the feed only
+has to pick a capped list of post ids for a single user. Fan-out only
+appends; the trim_timelines command, run periodically, cuts the
+timelines back to TIMELINE_LENGTH entries.
+
+Authors with more than TIMELINE_FANOUT_LIMIT followers are not
+fanned out: their recent posts are kept in a per-author list and
+merged into the feed at read time (fan-out on read). Such authors are
+flagged with timeline_pulled and stay merged on read after falling
+back under the limit, until demote_authors backfills the timelines
+of their followers.'''
+import heapq
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from users.models import UserProfile
+
+from .models import Follow, Post, TimelineEntry
+
+BATCH_SIZE = 1000
+POPULAR_AUTHORS_KEY = 'timeline:popular_authors'
+POPULAR_AUTHORS_TIMEOUT = 60 * 5
+RECENT_POSTS_KEY = 'timeline:recent:{}'
+RECENT_POSTS_TIMEOUT = 60 * 60
+
+
+def popular_authors():
+    '''Return ids of the authors which are not fanned out.'''
+    authors = cache.get(POPULAR_AUTHORS_KEY)
+    if authors is None:
+        authors = frozenset(
+            UserProfile.objects.filter(
+                Q(followers_count__gt=settings.TIMELINE_FANOUT_LIMIT)
+                | Q(timeline_pulled=True)
+            ).values_list(
+                'user_id',
+                flat=True,
+            )
+        )
+        cache.set(POPULAR_AUTHORS_KEY, authors, POPULAR_AUTHORS_TIMEOUT)
+    return authors
+
+
+def recent_posts(author_ids):
+    '''Return {author id: [(pub_date, post id), ...]} with the newest
+    posts of the given authors.'''
+    keys = {
+        RECENT_POSTS_KEY.format(author_id): author_id
+        for author_id in author_ids
+    }
+    cached = cache.get_many(keys)
+    lists = {keys[key]: value for key, value in cached.items()}
+    for key, author_id in keys.items():
+        if key in cached:
+            continue
+        lists[author_id] = [
+            (pub_date, post_id)
+            for post_id, pub_date in author_entries(author_id)
+        ]
+        cache.set(key, lists[author_id], RECENT_POSTS_TIMEOUT)
+    return lists
+
+
+def author_entries(author_id):
+    '''Return (post id, pub_date) of the newest posts of the author.'''
+    return list(
+        Post.objects.filter(
+            author_id=author_id,
+        ).order_by(
+            '-pub_date',
+            '-id',
+        ).values_list(
+            'id',
+            'pub_date',
+        )[:settings.TIMELINE_LENGTH]
+    )
+
+
+def mark_pulled(author_id):
+    '''Remember the author has posts missing from the timelines.'''
+    UserProfile.objects.filter(
+        user_id=author_id,
+        timeline_pulled=False,
+    ).update(
+        timeline_pulled=True,
+    )
+
+
+def forget_recent_posts(author_id):
+    cache.delete(RECENT_POSTS_KEY.format(author_id))
+
+
+def push_post(post):
+    '''Add a new post to the timelines of the author's followers.'''
+    push_posts([post])
+
+
+def push_posts(posts):
+    '''Add new posts to the timelines of their authors' followers,
+    reading the followers of each author once.'''
+    by_author = {}
+    for post in posts:
+        by_author.setdefault(post.author_id, []).append(post)
+    popular = popular_authors()
+    for author_id, author_posts in by_author.items():
+        if author_id in popular:
+            mark_pulled(author_id)
+            forget_recent_posts(author_id)
+            continue
+        follower_ids = list(
+            Follow.objects.filter(
+                following_id=author_id,
+            ).values_list(
+                'user_id',
+                flat=True,
+            )
+        )
+        TimelineEntry.objects.bulk_create(
+            (
+                TimelineEntry(
+                    owner_id=follower_id,
+                    post_id=post.pk,
+                    pub_date=post.pub_date,
+                )
+                for post in author_posts
+                for follower_id in follower_ids
+            ),
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+
+def add_author(follow):
+    '''Backfill the follower timeline with recent posts of a new
+    subscription.'''
+    if follow.following_id in popular_authors():
+        mark_pulled(follow.following_id)
+        return
+    backfill([follow.user_id], author_entries(follow.following_id))
+
+
+def backfill(owner_ids, recent):
+    '''Add the (post id, pub_date) entries to the timelines.'''
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(
+                owner_id=owner_id,
+                post_id=post_id,
+                pub_date=pub_date,
+            )
+            for owner_id in owner_ids
+            for post_id, pub_date in recent
+        ],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def demote_authors():
+    '''Fan out again the authors merged on read who fell back under
+    TIMELINE_FANOUT_LIMIT followers; return their number.'''
+    author_ids = list(
+        UserProfile.objects.filter(
+            timeline_pulled=True,
+            followers_count__lte=settings.TIMELINE_FANOUT_LIMIT,
+        ).values_list(
+            'user_id',
+            flat=True,
+        )
+    )
+    for author_id in author_ids:
+        # Stop pulling first: posts published from now on are pushed,
+        # the older ones are copied below.
+        UserProfile.objects.filter(user_id=author_id).update(
+            timeline_pulled=False,
+        )
+        cache.delete(POPULAR_AUTHORS_KEY)
+        follower_ids = Follow.objects.filter(
+            following_id=author_id,
+        ).values_list(
+            'user_id',
+            flat=True,
+        )
+        backfill(list(follower_ids), author_entries(author_id))
+        forget_recent_posts(author_id)
+    return len(author_ids)
+
+
+def remove_author(follow):
+    '''Drop posts of a cancelled subscription from the follower
+    timeline.'''
+    TimelineEntry.objects.filter(
+        owner_id=follow.user_id,
+        post__author_id=follow.following_id,
+    ).delete()
+
+
+def rebuild(user):
+    '''Recreate the user timeline from the current subscriptions.'''
+    TimelineEntry.objects.filter(owner=user).delete()
+    for follow in Follow.objects.filter(user=user):
+        add_author(follow)
+    trim(user)
+
+
+def trim(user):
+    '''Keep only TIMELINE_LENGTH newest entries of the user timeline;
+    user may also be a user id.'''
+    oldest_kept = TimelineEntry.objects.filter(
+        owner=user,
+    ).values_list(
+        'pub_date',
+        flat=True,
+    )[settings.TIMELINE_LENGTH - 1:settings.TIMELINE_LENGTH]
+    if oldest_kept:
+        TimelineEntry.objects.filter(
+            owner=user,
+            pub_date__lt=oldest_kept[0],
+        ).delete()
+
+
+def trim_all():
+    '''Trim the timelines grown over TIMELINE_LENGTH entries by
+    fan-out; return their number.'''
+    owner_ids = list(
+        TimelineEntry.objects.order_by().values(
+            'owner',
+        ).annotate(
+            entries=Count('id'),
+        ).filter(
+            entries__gt=settings.TIMELINE_LENGTH,
+        ).values_list(
+            'owner',
+            flat=True,
+        )
+    )
+    for owner_id in owner_ids:
+        trim(owner_id)
+    return len(owner_ids)
+
+
+def entries(user):
+    '''Return a capped list of (pub_date, post id) from the user
+    timeline, newest first.'''
+    pushed = TimelineEntry.objects.filter(
+        owner=user,
+    ).values_list(
+        'pub_date',
+        'post_id',
+    )[:settings.TIMELINE_LENGTH]
+    popular = popular_authors()
+    if not popular:
+        return list(pushed)
+    pulled = recent_posts(
+        Follow.objects.filter(
+            user=user,
+            following_id__in=popular,
+        ).values_list(
+            'following_id',
+            flat=True,
+        )
+    )
+    merged = heapq.merge(pushed, *pulled.values(), reverse=True)
+    unique = {post_id: pub_date for pub_date, post_id in merged}
+    return list(islice(
+        ((pub_date, post_id) for post_id, pub_date in unique.items()),
+        settings.TIMELINE_LENGTH,
+    ))
+
+
+def post_ids(user):
+    '''Return a capped list of post ids from the user timeline,
+    newest first.'''
+    return [post_id for pub_date, post_id in entries(user)]
+
+
+def get_posts(ids):
+    '''Fetch posts by ids preserving the order of the ids.'''
+    posts = Post.objects.select_related(
+        'author',
+        'group',
+        'author__profile',
+    ).in_bulk(ids)
+    return [posts[post_id] for post_id in ids if post_id in posts]
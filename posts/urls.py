@@ -25,6 +25,11 @@ urlpatterns = [
         views.groups,
         name='groups',
     ),
+    path(
+        'search/',
+        views.search_posts,
+        name='search',
+    ),
     path(
         'new/',
         views.new_post,
@@ -45,6 +50,11 @@ urlpatterns = [
         views.post_edit,
         name='post_edit',
     ),
+    path(
+        'users/<str:username>/<int:post_id>/comments/',
+        views.post_comments,
+        name='comments',
+    ),
     path(
         'users/<str:username>/<int:post_id>/comment/',
         views.add_comment,
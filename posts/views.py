@@ -1,18 +1,26 @@
+from typing import Union
+
 from django.contrib import messages
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
 from django.db.models import QuerySet
 from django.shortcuts import get_object_or_404, redirect, render
+from yatter.querycount import query_budget
 
+from . import follow_graph, search, threads, timeline
+from .concurrent import gather
+from .pagecache import tagged_page
 from .forms import CommentForm, PostForm
-from .models import Comment, Follow, Group, Post
+from .models import Follow, Group, Post
+from .paginator import CursorPaginator
 
 User = get_user_model()
 
 POSTS_PER_PAGE = 10
 
 
+@query_budget(6)
+@tagged_page('posts', 'authors')
 def index(request):
     '''Pagination of all posts.'''
     all_posts = Post.objects.all().select_related(
@@ -21,6 +29,7 @@ def index(request):
         'author__profile',
     )
     page = pagination(request, all_posts)
+    follow_graph.mark_followed(request.user, page.object_list)
     return render(
         request,
         'posts/index.html',
@@ -30,15 +39,20 @@ def index(request):
     )
 
 
+@query_budget(6)
+@tagged_page('group:{slug}', 'authors')
 def group_posts(request, slug):
     '''Pagination of all posts in the group.'''
-    group = get_object_or_404(Group, slug=slug)
-    all_posts = Post.objects.filter(group=group).select_related(
+    all_posts = Post.objects.filter(group__slug=slug).select_related(
         'author',
         'group',
         'author__profile',
     )
-    page = pagination(request, all_posts)
+    group, page = gather(
+        lambda: get_object_or_404(Group, slug=slug),
+        lambda: pagination(request, all_posts),
+    )
+    follow_graph.mark_followed(request.user, page.object_list)
     return render(
         request,
         'posts/group.html',
@@ -49,6 +63,7 @@ def group_posts(request, slug):
     )
 
 
+@query_budget(12)
 @login_required
 def new_post(request):
     '''Add a new post.'''
@@ -82,69 +97,106 @@ def new_post(request):
     )
 
 
+@query_budget(6)
+@tagged_page('user:{username}')
 def profile(request, username):
     '''Pagination of all user posts.'''
-    all_posts = Post.objects.filter(author__username=username).select_related(
+    all_posts = Post.objects.filter(
+        author__username=username,
+    ).select_related(
         'author',
         'group',
+        'author__profile',
     )
-    page = pagination(request, all_posts)
-    post_author = get_object_or_404(
-        User.objects.select_related('profile'),
-        username=username,
+    post_author, page = gather(
+        lambda: get_object_or_404(
+            User.objects.select_related('profile'),
+            username=username,
+        ),
+        lambda: pagination(request, all_posts),
+    )
+    following = (
+        request.user.is_authenticated
+        and request.user != post_author
+        and follow_graph.is_following(request.user.pk, post_author.pk)
     )
-    subscribers = Follow.objects.filter(following__username=username).count()
-    subscriptions = Follow.objects.filter(user__username=username).count()
-    if request.user.is_authenticated and request.user != post_author:
-        following = Follow.objects.filter(
-            user=request.user,
-            following=post_author
-        ).exists
-    else:
-        following = False
     return render(
         request,
         'posts/profile.html',
         {
             'page': page,
             'post_author': post_author,
-            'subscribers': subscribers,
-            'subscriptions': subscriptions,
             'following': following,
         },
     )
 
 
+@query_budget(5)
+@tagged_page('post:{post_id}', 'user:{username}')
 def post_view(request, username, post_id):
     '''Display a single post.'''
-    post = get_object_or_404(
-        Post.objects.select_related(
-            'author',
-            'group',
-            'author__profile',
+    post, comments = gather(
+        lambda: get_object_or_404(
+            Post.objects.select_related(
+                'author',
+                'group',
+                'author__profile',
+            ),
+            pk=post_id
         ),
-        pk=post_id
+        lambda: threads.page(post_id),
     )
-    posts = Post.objects.filter(author__username=username).count()
+    comments, comments_after = comments
     form = CommentForm()
-    comments = Comment.objects.filter(post_id=post_id)
     return render(
         request,
         'posts/post.html',
         {
             'post': post,
-            'posts': posts,
             'post_author': post.author,
             'form': form,
             'comments': comments,
+            'comments_after': comments_after,
+        },
+    )
+
+
+@query_budget(5)
+@tagged_page('post:{post_id}', 'user:{username}')
+def post_comments(request, username, post_id):
+    '''Display the next page of the comments of a post or of a thread;
+    with `partial` only the comments themselves.'''
+    after = request.GET.get('after')
+    post, thread = gather(
+        lambda: get_object_or_404(
+            Post.objects.select_related('author'),
+            pk=post_id,
+        ),
+        lambda: threads.comment_or_404(request.GET.get('thread'), post_id),
+    )
+    comments, comments_after = threads.page(post_id, after, thread)
+    return render(
+        request,
+        (
+            'posts/comments_list.html'
+            if request.GET.get('partial')
+            else 'posts/comments_page.html'
+        ),
+        {
+            'post': post,
+            'post_author': post.author,
+            'thread': thread,
+            'comments': comments,
+            'comments_after': comments_after,
         },
     )
 
 
+@query_budget(10)
 @login_required
 def post_edit(request, username, post_id):
     '''Edit an existing post.'''
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(Post.objects.select_related('author'), pk=post_id)
     if request.user != post.author:
         return redirect('posts:post', username=username, post_id=post_id)
     form = PostForm(
@@ -174,10 +226,12 @@ def post_edit(request, username, post_id):
     )
 
 
+@query_budget(9)
 @login_required
 def add_comment(request, username, post_id):
-    '''Add a new comment.'''
+    '''Add a new comment or a reply to the `parent` comment.'''
     if request.method == 'POST':
+        parent = threads.comment_or_404(request.POST.get('parent'), post_id)
         form = CommentForm(request.POST)
         if form.is_valid():
             new_comment = form.save(commit=False)
@@ -185,6 +239,7 @@ def add_comment(request, username, post_id):
             new_comment.post = Post.objects.get(
                 pk=post_id,
             )
+            new_comment.parent = parent
             new_comment.save()
             messages.success(
                     request,
@@ -200,6 +255,7 @@ def add_comment(request, username, post_id):
             'posts/add_comment.html',
             {
                 'form': form,
+                'parent': parent,
             }
         )
     return render(
@@ -207,21 +263,22 @@ def add_comment(request, username, post_id):
         'posts/add_comment.html',
         {
             'form': CommentForm(),
+            'parent': threads.comment_or_404(
+                request.GET.get('parent'),
+                post_id,
+            ),
         }
     )
 
 
+@query_budget(8)
 @login_required
 def follow_index(request):
     '''Pagination of all posts subscriptions.'''
-    subscribed_posts = Post.objects.filter(
-        author__following__user=request.user
-    ).select_related(
-        'author',
-        'group',
-        'author__profile',
+    page = pagination(request, timeline.entries(request.user))
+    page.object_list = timeline.get_posts(
+        [post_id for pub_date, post_id in page.object_list]
     )
-    page = pagination(request, subscribed_posts)
     return render(
         request,
         'posts/follow.html',
@@ -231,13 +288,14 @@ def follow_index(request):
     )
 
 
+@query_budget(13)
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(
         User,
         username=username,
     )
-    if not request.user == author:
+    if request.user != author:
         Follow.objects.get_or_create(
             user=request.user,
             following=author,
@@ -248,24 +306,39 @@ def profile_follow(request, username):
     )
 
 
+@query_budget(12)
 @login_required
 def profile_unfollow(request, username):
     author = get_object_or_404(
         User,
         username=username,
     )
-    if Follow.objects.filter(user=request.user, following=author).exists():
-        subscription = Follow.objects.get(
-            user=request.user,
-            following=author,
-        )
-        subscription.delete()
+    Follow.objects.filter(user=request.user, following=author).delete()
     return redirect(
         'posts:profile',
         username=username,
     )
 
 
+@query_budget(6)
+@tagged_page('posts', 'authors')
+def search_posts(request):
+    '''Pagination of the posts found by the query, best matches first.'''
+    query = request.GET.get('q', '').strip()
+    page = pagination(request, search.search(query), ('score', 'id'))
+    follow_graph.mark_followed(request.user, page.object_list)
+    return render(
+        request,
+        'posts/search.html',
+        {
+            'page': page,
+            'query': query,
+        }
+    )
+
+
+@query_budget(3)
+@tagged_page()
 def groups(request):
     all_groups = Group.objects.all()
     return render(
@@ -294,8 +367,12 @@ def server_error(request):
     )
 
 
-def pagination(request, posts: QuerySet):
-    paginator = Paginator(posts, POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+def pagination(
+    request,
+    posts: Union[QuerySet, list],
+    ordering=('pub_date', 'id'),
+):
+    paginator = CursorPaginator(posts, POSTS_PER_PAGE, ordering)
+    cursor = request.GET.get('cursor')
+    page = paginator.get_page(cursor)
     return page
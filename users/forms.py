@@ -1,6 +1,7 @@
 from django import forms
 from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import UserCreationForm
+from posts import images
 
 from .models import UserProfile
 
@@ -36,3 +37,6 @@ class EditProfileForm(forms.ModelForm):
                 },
             )
         }
+
+    def clean_avatar(self):
+        return images.validate_upload(self.cleaned_data['avatar'])
@@ -1,10 +1,12 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from posts import images
+from posts.models import CountersModel
 
 User = get_user_model()
 
 
-class UserProfile(models.Model):
+class UserProfile(CountersModel):
     '''Extension of the User model.'''
     user = models.OneToOneField(
         User,
@@ -33,6 +35,66 @@ class UserProfile(models.Model):
         null=True,
         blank=True,
     )
+    avatar_variants = models.TextField(
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name='Уменьшенные копии аватара',
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        db_index=True,
+        editable=False,
+        verbose_name='Подписчиков',
+    )
+    following_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Подписок',
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Постов',
+    )
+    timeline_pulled = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Посты читаются в ленты при запросе',
+    )
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения',
+    )
+
+    # timeline_pulled is also set by UPDATE, see posts.timeline;
+    # avatar_variants is written only by the worker, see posts.image_jobs.
+    COUNTERS = (
+        'avatar_variants',
+        'followers_count',
+        'following_count',
+        'posts_count',
+        'timeline_pulled',
+    )
 
     def __str__(self):
         return f"{self.user.username}'s profile"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        '''Remember the loaded avatar to resize only a new one.'''
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_avatar = instance.__dict__.get('avatar')
+        return instance
+
+    @property
+    def avatar_small(self):
+        '''50x50 copy of the avatar, None until it is made.'''
+        variants = images.load_variants(self.avatar_variants)
+        return variants[0] if variants else None
+
+    @property
+    def avatar_large(self):
+        '''300x300 copy of the avatar, None until it is made.'''
+        variants = images.load_variants(self.avatar_variants)
+        return variants[-1] if variants else None
@@ -0,0 +1,25 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import UserProfile
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def create_profile(sender, instance, created, raw, **kwargs):
+    '''Every user gets a profile to keep counters in.'''
+    if created and not raw:
+        UserProfile.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=User)
+def touch_profile(sender, instance, created, raw, update_fields, **kwargs):
+    '''Names of the user are rendered with the profile: bump its
+    version, so cached fragments of the author are rebuilt.'''
+    if created or raw or update_fields == frozenset(['last_login']):
+        return
+    profile = UserProfile.objects.filter(user=instance).first()
+    if profile is not None:
+        profile.save(update_fields=['updated'])
@@ -0,0 +1,216 @@
+'''Two-tier cache backend: a small in-process LRU in front of a cache
+shared by all workers.
+
+Every write to the shared tier is also appended to an invalidation log
+kept in the shared tier itself, so the log works with any backend that
+supports atomic incr (Redis, Memcached, ...). Workers replay the log
+at most every SYNC_INTERVAL seconds and evict their local copies of the
+written keys; if the log has already expired, or more than
+MAX_LOG_REPLAY entries were written since the last sync, they drop the
+whole local tier instead.'''
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+LOG_SEQUENCE_KEY = 'tiered:log'
+LOG_ENTRY_KEY = 'tiered:log:{}'
+LOG_TIMEOUT = 60 * 5
+CLEAR_ALL = '*'
+
+
+class TieredCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._shared_alias = options.get('SHARED', 'shared')
+        self._local_timeout = options.get('LOCAL_TIMEOUT', 60)
+        self._sync_interval = options.get('SYNC_INTERVAL', 1)
+        self._max_log_replay = options.get('MAX_LOG_REPLAY', 1000)
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self._log_position = None
+        self._synced_at = 0
+
+    @property
+    def shared(self):
+        return caches[self._shared_alias]
+
+    # In-process tier.
+
+    def _local_get(self, key):
+        with self._lock:
+            item = self._local.get(key)
+            if item is None:
+                return None
+            expires_at, pickled = item
+            if expires_at <= time.monotonic():
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+        return pickle.loads(pickled)
+
+    def _local_set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        # get_backend_timeout() returns an epoch time, not a duration.
+        expires_at = self.get_backend_timeout(timeout)
+        timeout = self._local_timeout
+        if expires_at is not None:
+            timeout = min(timeout, expires_at - time.time())
+        if timeout <= 0:
+            self._local_delete(key)
+            return
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._local[key] = (time.monotonic() + timeout, pickled)
+            self._local.move_to_end(key)
+            while len(self._local) > self._max_entries:
+                self._local.popitem(last=False)
+
+    def _local_delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._local.pop(key, None)
+
+    def _local_clear(self):
+        with self._lock:
+            self._local.clear()
+
+    # Invalidation log.
+
+    def _publish(self, *keys):
+        '''Tell other workers the keys were written.'''
+        shared = self.shared
+        shared.add(LOG_SEQUENCE_KEY, 0, None)
+        try:
+            position = shared.incr(LOG_SEQUENCE_KEY)
+        except ValueError:
+            shared.set(LOG_SEQUENCE_KEY, 0, None)
+            position = shared.incr(LOG_SEQUENCE_KEY)
+        shared.set(LOG_ENTRY_KEY.format(position), keys, LOG_TIMEOUT)
+
+    def sync(self, force=False):
+        '''Evict local copies of the keys written by other workers.'''
+        now = time.monotonic()
+        if not force and now - self._synced_at < self._sync_interval:
+            return
+        self._synced_at = now
+        shared = self.shared
+        position = shared.get(LOG_SEQUENCE_KEY, 0)
+        if self._log_position is None or position < self._log_position:
+            self._local_clear()
+            self._log_position = position
+            return
+        if position == self._log_position:
+            return
+        if position - self._log_position > self._max_log_replay:
+            self._local_clear()
+            self._log_position = position
+            return
+        entry_keys = [
+            LOG_ENTRY_KEY.format(number)
+            for number in range(self._log_position + 1, position + 1)
+        ]
+        entries = shared.get_many(entry_keys)
+        self._log_position = position
+        if len(entries) < len(entry_keys):
+            self._local_clear()
+            return
+        for keys in entries.values():
+            if CLEAR_ALL in keys:
+                self._local_clear()
+                return
+            self._local_delete(*keys)
+
+    # Cache API.
+
+    def make_key(self, key, version=None):
+        return self.shared.make_key(key, version=version)
+
+    def get(self, key, default=None, version=None):
+        self.sync()
+        local_key = self.make_key(key, version)
+        value = self._local_get(local_key)
+        if value is not None:
+            return value
+        value = self.shared.get(key, version=version)
+        if value is None:
+            return default
+        self._local_set(local_key, value)
+        return value
+
+    def get_many(self, keys, version=None):
+        self.sync()
+        found = {}
+        missing = []
+        for key in keys:
+            value = self._local_get(self.make_key(key, version))
+            if value is None:
+                missing.append(key)
+            else:
+                found[key] = value
+        if missing:
+            fetched = self.shared.get_many(missing, version=version)
+            for key, value in fetched.items():
+                self._local_set(self.make_key(key, version), value)
+            found.update(fetched)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        local_key = self.make_key(key, version)
+        self.shared.set(key, value, timeout, version=version)
+        self._publish(local_key)
+        self._local_set(local_key, value, timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version=version)
+        local_keys = [self.make_key(key, version) for key in data]
+        self._publish(*local_keys)
+        for key, value in data.items():
+            if key not in failed:
+                self._local_set(self.make_key(key, version), value, timeout)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version=version)
+        if added:
+            local_key = self.make_key(key, version)
+            self._publish(local_key)
+            self._local_set(local_key, value, timeout)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        local_key = self.make_key(key, version)
+        self._local_delete(local_key)
+        self.shared.delete(key, version=version)
+        self._publish(local_key)
+
+    def delete_many(self, keys, version=None):
+        local_keys = [self.make_key(key, version) for key in keys]
+        self._local_delete(*local_keys)
+        self.shared.delete_many(keys, version=version)
+        self._publish(*local_keys)
+
+    def has_key(self, key, version=None):
+        return self.get(key, version=version) is not None
+
+    def incr(self, key, delta=1, version=None):
+        local_key = self.make_key(key, version)
+        value = self.shared.incr(key, delta, version=version)
+        self._local_delete(local_key)
+        self._publish(local_key)
+        return value
+
+    def clear(self):
+        self._local_clear()
+        self.shared.clear()
+        self._log_position = None
+        self._publish(CLEAR_ALL)
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
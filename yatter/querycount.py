@@ -0,0 +1,165 @@
+'''Per-request query counting.
+
+Every SQL statement sent while a request is handled is recorded with
+its fingerprint: the statement with literals and parameter lists
+replaced by placeholders, so the same query for different rows, the
+signature of an N+1, shows up as a repeated fingerprint.
+
+Views declare the number of queries they may send: function views
+with the query_budget decorator, class-based views with a query_budget
+attribute, viewsets with a query_budget dict by action. A request
+sending more queries than its budget or repeating a fingerprint more
+than QUERY_DUPLICATE_LIMIT times is logged, or fails with
+QueryBudgetExceeded when QUERY_BUDGETS_STRICT is set, as in tests.
+Fingerprinting is not free, so repeated queries are only looked for
+in requests over their budget, in strict runs and in a sample of
+QUERY_DUPLICATE_SAMPLE_RATE of the other requests.
+
+Statements are recorded through a connection execute wrapper reading
+a context variable, so queries sent from the pool threads of
+posts.concurrent are counted too.'''
+import logging
+import random
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+_recorder = ContextVar('query_recorder', default=None)
+
+FINGERPRINT_RES = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def fingerprint(sql):
+    for pattern, replacement in FINGERPRINT_RES:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+class QueryRecorder:
+    def __init__(self, parent=None):
+        self.statements = []
+        self.parent = parent
+
+    def add(self, sql):
+        recorder = self
+        while recorder is not None:
+            recorder.statements.append(sql)
+            recorder = recorder.parent
+
+    def __len__(self):
+        return len(self.statements)
+
+    def duplicates(self, limit):
+        '''Fingerprints sent more than limit times with their count.'''
+        counts = Counter(fingerprint(sql) for sql in self.statements)
+        return {sql: count for sql, count in counts.items() if count > limit}
+
+
+def _record(execute, sql, params, many, context):
+    recorder = _recorder.get()
+    if recorder is not None:
+        recorder.add(sql)
+    return execute(sql, params, many, context)
+
+
+def install(connection, **kwargs):
+    if _record not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record)
+
+
+connection_created.connect(install)
+
+
+@contextmanager
+def record_queries():
+    '''Record the statements sent in the block, in this thread
+    and in the threads started with a copy of its context; enclosing
+    recorders get them as well.'''
+    for connection in connections.all():
+        install(connection)
+    recorder = QueryRecorder(_recorder.get())
+    token = _recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _recorder.reset(token)
+
+
+def query_budget(budget):
+    '''Declare the number of queries the view may send.'''
+    def decorator(view):
+        view.query_budget = budget
+        return view
+    return decorator
+
+
+def get_budget(view, method):
+    budget = getattr(view, 'query_budget', None)
+    if budget is None:
+        # as_view() of class-based views and viewsets.
+        view_class = getattr(view, 'view_class', None) or getattr(
+            view,
+            'cls',
+            None,
+        )
+        budget = getattr(view_class, 'query_budget', None)
+    if isinstance(budget, dict):
+        actions = getattr(view, 'actions', None) or {}
+        budget = budget.get(actions.get(method.lower()))
+    return budget
+
+
+def check(request, recorder):
+    '''Report the request sending more queries than its budget
+    or repeating a query.'''
+    match = request.resolver_match
+    if match is None:
+        return
+    budget = get_budget(match.func, request.method)
+    problems = []
+    if budget is not None and len(recorder) > budget:
+        problems.append(f'{len(recorder)} queries, budget {budget}')
+    if problems or settings.QUERY_BUDGETS_STRICT or (
+        random.random() < settings.QUERY_DUPLICATE_SAMPLE_RATE
+    ):
+        for sql, count in recorder.duplicates(
+            settings.QUERY_DUPLICATE_LIMIT,
+        ).items():
+            problems.append(f'{count} times: {sql}')
+    if not problems:
+        return
+    message = f'{request.method} {request.path} ({match.view_name}): ' + (
+        '; '.join(problems)
+    )
+    if settings.QUERY_BUDGETS_STRICT:
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+class QueryCountMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with record_queries() as recorder:
+            response = self.get_response(request)
+        check(request, recorder)
+        if settings.DEBUG:
+            response['X-Query-Count'] = str(len(recorder))
+        return response
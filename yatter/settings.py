@@ -33,6 +33,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'yatter.querycount.QueryCountMiddleware',
+    'posts.pagecache.PageCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -62,6 +64,7 @@ TEMPLATES = [
                 'django.contrib.messages.context_processors.messages',
                 'posts.context_processors.year',
                 'posts.context_processors.all_groups',
+                'posts.context_processors.recommended_authors',
             ],
         },
     },
@@ -77,9 +80,23 @@ DATABASES = {
         'PASSWORD': os.environ.get('DB_PASSWORD'),
         'HOST': os.environ.get('DB_HOST'),
         'PORT': os.environ.get('DB_PORT'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', default=60)),
     }
 }
 
+# Threads per process sending independent queries of a view
+# at the same time, see posts.concurrent.
+VIEW_QUERY_THREADS = 8
+
+# Fail instead of logging requests over their query budget.
+QUERY_BUDGETS_STRICT = bool(os.environ.get('QUERY_BUDGETS_STRICT'))
+QUERY_DUPLICATE_LIMIT = 3
+# Share of requests within their budget checked for repeated queries;
+# requests over the budget and strict runs are always checked.
+QUERY_DUPLICATE_SAMPLE_RATE = float(
+    os.environ.get('QUERY_DUPLICATE_SAMPLE_RATE', 0),
+)
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -117,12 +134,39 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+DEFAULT_FILE_STORAGE = 'yatter.storage.ContentAddressedStorage'
+
+FILE_UPLOAD_HANDLERS = [
+    'yatter.uploadhandlers.LimitedTemporaryFileUploadHandler',
+]
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+MAX_IMAGE_PIXELS = 40 * 1000 * 1000
+
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'BACKEND': 'yatter.cache.TieredCache',
+        'OPTIONS': {
+            'SHARED': 'shared',
+            'MAX_ENTRIES': 1000,
+            'LOCAL_TIMEOUT': 60,
+            'SYNC_INTERVAL': 1,
+            'MAX_LOG_REPLAY': 1000,
+        },
+    },
+    'shared': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', default=''),
+    },
 }
 
+ANONYMOUS_CACHE_TIMEOUT = 60 * 15
+
+THUMBNAIL_KVSTORE = 'sorl.thumbnail.kvstores.cached_db_kvstore.KVStore'
+THUMBNAIL_CACHE = 'default'
+THUMBNAIL_CACHE_TIMEOUT = None
+# Thumbnail names are chosen by sorl itself.
+THUMBNAIL_STORAGE = 'django.core.files.storage.FileSystemStorage'
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -133,8 +177,16 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend',
     ),
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.CursorPagination',
+    'PAGE_SIZE': 20,
 }
 
+API_MAX_PAGE_SIZE = 100
+API_BULK_MAX_ITEMS = 1000
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=1000),
 }
+
+TIMELINE_LENGTH = 1000
+TIMELINE_FANOUT_LIMIT = 10000
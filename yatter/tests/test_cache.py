@@ -0,0 +1,91 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase
+
+from ..cache import LOG_ENTRY_KEY, TieredCache
+
+
+def make_worker(**options):
+    return TieredCache(None, {
+        'OPTIONS': {
+            'SHARED': 'shared',
+            'SYNC_INTERVAL': 0,
+            **options,
+        },
+    })
+
+
+class TieredCacheTests(SimpleTestCase):
+    '''Check two workers sharing one cache backend.'''
+    def setUp(self):
+        caches['shared'].clear()
+        self.first = make_worker()
+        self.second = make_worker()
+
+    def test_read_through_shared_tier(self):
+        '''Check a value set by one worker is seen by another.'''
+        self.first.set('key', 'value')
+        self.assertEqual(self.second.get('key'), 'value')
+
+    def test_local_hit(self):
+        '''Check a repeated read does not hit the shared cache.'''
+        self.first.set('key', 'value')
+        self.second.get('key')
+        with mock.patch.object(
+            caches['shared'],
+            'get',
+            wraps=caches['shared'].get,
+        ) as shared_get:
+            self.assertEqual(self.second.get('key'), 'value')
+        requested = [call[0][0] for call in shared_get.call_args_list]
+        self.assertNotIn('key', requested)
+
+    def test_invalidation_reaches_other_workers(self):
+        '''Check set and delete evict local copies in other workers.'''
+        self.first.set('key', 'old')
+        self.assertEqual(self.second.get('key'), 'old')
+        self.first.set('key', 'new')
+        self.assertEqual(self.second.get('key'), 'new')
+        self.first.delete('key')
+        self.assertIsNone(self.second.get('key'))
+
+    def test_expired_log_clears_local_tier(self):
+        '''Check a lost journal entry clears the whole local cache.'''
+        self.first.set('key', 'old')
+        self.second.get('key')
+        caches['shared'].set('key', 'new')
+        self.first.set('other', 'value')
+        caches['shared'].delete(LOG_ENTRY_KEY.format(2))
+        self.assertEqual(self.second.get('key'), 'new')
+
+    def test_long_log_gap_clears_local_tier(self):
+        '''Check a worker far behind the log drops its local cache
+        instead of replaying every entry.'''
+        worker = make_worker(MAX_LOG_REPLAY=2)
+        self.first.set('key', 'old')
+        worker.get('key')
+        caches['shared'].set('key', 'new')
+        for number in range(3):
+            self.first.set(f'other{number}', 'value')
+        with mock.patch.object(
+            caches['shared'],
+            'get_many',
+            wraps=caches['shared'].get_many,
+        ) as shared_get_many:
+            self.assertEqual(worker.get('key'), 'new')
+        shared_get_many.assert_not_called()
+
+    def test_expired_value_not_kept_locally(self):
+        '''Check a value set with a zero timeout is not read back
+        from the local tier.'''
+        worker = make_worker(SYNC_INTERVAL=60)
+        worker.sync(force=True)
+        worker.set('key', 'value', 0)
+        self.assertIsNone(worker.get('key'))
+
+    def test_local_values_are_copies(self):
+        '''Check mutating a returned object does not change the cache.'''
+        self.first.set('key', ['value'])
+        self.first.get('key').append('changed')
+        self.assertEqual(self.first.get('key'), ['value'])
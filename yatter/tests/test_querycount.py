@@ -0,0 +1,81 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.test.client import RequestFactory
+from django.urls import resolve
+
+from ..querycount import (QueryBudgetExceeded, check, fingerprint,
+                          get_budget, record_queries)
+
+User = get_user_model()
+
+
+class QueryCountTests(TestCase):
+    '''Check queries sent while handling a request are recorded.'''
+    def test_fingerprint(self):
+        '''Check queries for different rows share a fingerprint.'''
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id = 1 AND name = 'a''b'"),
+            fingerprint('SELECT * FROM t WHERE id = 25 AND name = \'c\''),
+        )
+        self.assertEqual(
+            fingerprint('SELECT * FROM t WHERE id IN (%s, %s,  %s)'),
+            'SELECT * FROM t WHERE id IN (...)',
+        )
+
+    def test_nested_recorders(self):
+        '''Check an outer recorder sees the queries of a nested one.'''
+        with record_queries() as outer:
+            User.objects.count()
+            with record_queries() as inner:
+                User.objects.exists()
+        self.assertEqual((len(outer), len(inner)), (2, 1))
+
+    def test_duplicates(self):
+        '''Check a repeated query is reported as N+1.'''
+        users = [
+            User.objects.create_user(f'user_{number}') for number in range(4)
+        ]
+        with record_queries() as recorder:
+            for user in users:
+                User.objects.get(pk=user.pk)
+        self.assertEqual(list(recorder.duplicates(3).values()), [4])
+        self.assertEqual(recorder.duplicates(4), {})
+
+    def test_budget(self):
+        '''Check an exceeded budget is logged, or raises in tests.'''
+        request = RequestFactory().get('/')
+        request.resolver_match = resolve('/')
+        budget = get_budget(request.resolver_match.func, 'GET')
+        with record_queries() as recorder:
+            for _ in range(budget + 1):
+                User.objects.exists()
+        with override_settings(QUERY_BUDGETS_STRICT=True):
+            with self.assertRaises(QueryBudgetExceeded):
+                check(request, recorder)
+        with self.assertLogs('yatter.querycount', 'WARNING') as logs:
+            check(request, recorder)
+        self.assertIn(
+            f'{budget + 1} queries, budget {budget}',
+            logs.output[0],
+        )
+
+    def test_duplicates_sampled(self):
+        '''Check repeated queries are looked for within the budget
+        only in strict runs and sampled requests.'''
+        request = RequestFactory().get('/')
+        request.resolver_match = resolve('/')
+        with record_queries() as recorder:
+            for _ in range(4):
+                User.objects.exists()
+        with mock.patch.object(recorder, 'duplicates', return_value={}):
+            with override_settings(QUERY_DUPLICATE_SAMPLE_RATE=0):
+                check(request, recorder)
+            recorder.duplicates.assert_not_called()
+            with override_settings(QUERY_DUPLICATE_SAMPLE_RATE=1):
+                check(request, recorder)
+            recorder.duplicates.assert_called_once()
+        with override_settings(QUERY_BUDGETS_STRICT=True):
+            with self.assertRaises(QueryBudgetExceeded):
+                check(request, recorder)
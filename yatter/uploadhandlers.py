@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+
+
+class LimitedTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    '''Stream every upload to a temporary file chunk by chunk, so
+    a request never holds more than one chunk in memory, and stop
+    writing a file at MAX_UPLOAD_SIZE bytes.
+
+    The completed file reports its full received size, which lets
+    form validation reject it.'''
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        allowed = settings.MAX_UPLOAD_SIZE - self.received
+        self.received += len(raw_data)
+        if allowed > 0:
+            super().receive_data_chunk(raw_data[:allowed], start)